@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- Access Policy ---
+# Directory prefixes each role is expected to work in; a file access anywhere
+# below one of its role's prefixes is in-role. A JSON file of the same shape
+# replaces the defaults:
+#   {"roles": {"developer": ["/src/project-phoenix/", ...], ...},
+#    "critical_files": ["/sales/client-prospects/q3_targets.csv", ...]}
+ACCESS_POLICY_FILE = 'access_policy.json'
+ROLE_PATHS = {
+    'developer': ['/src/project-phoenix/', '/docs/api-specs/', '/tests/project-phoenix/'],
+    'senior_developer': ['/src/project-phoenix/', '/src/project-valhalla/', '/docs/api-specs/', '/design/database-schemas/'],
+    'sales': ['/sales/client-prospects/', '/marketing/campaigns/'],
+}
+CRITICAL_FILES = ['/sales/client-prospects/q3_targets.csv', '/design/database-schemas/main_schema.sql']
+HOME_DIR = '/home/'  # every user may work under /home/<username>/, whatever the role
+
+# username,role; written by generate_logs.py next to the logs. Users missing
+# from it get DEFAULT_ROLE, the role the generator gives everyone else.
+USER_ROLES_FILE = 'user_roles.csv'
+DEFAULT_ROLE = 'developer'
+
+
+def load_user_roles(path=USER_ROLES_FILE):
+    """{username: role} from the roles file; empty when it does not exist."""
+    if not os.path.exists(path):
+        return {}
+    roles = pd.read_csv(path, dtype=str)
+    return dict(zip(roles['username'], roles['role']))
+
+
+def load_access_policy(policy_path=ACCESS_POLICY_FILE, roles_path=USER_ROLES_FILE):
+    """The policy file (or the defaults) combined with the user roles file."""
+    role_paths, critical_files = ROLE_PATHS, CRITICAL_FILES
+    if policy_path and os.path.exists(policy_path):
+        with open(policy_path) as f:
+            policy = json.load(f)
+        role_paths = policy.get('roles', role_paths)
+        critical_files = policy.get('critical_files', critical_files)
+    return AccessPolicy(role_paths, critical_files, load_user_roles(roles_path))
+
+
+def _directory(path):
+    path = str(path)
+    return path if path.endswith('/') else path + '/'
+
+
+class AccessPolicy:
+    """Role -> allowed directory prefixes, compiled into a path-prefix trie.
+
+    The trie is stored flat: a dict keyed by each node's full prefix
+    ('/', '/src/', '/src/project-phoenix/', ...) holding the set of roles
+    granted at that node. A directory's allowed roles are the union along its
+    path, one dict lookup per component, and are memoized as a row of a
+    (directory x role) table.
+
+    Log rows are never looked up one by one: each distinct directory and
+    each distinct user is resolved once per frame, and rows are classified by
+    indexing that table with their categorical codes.
+    """
+
+    def __init__(self, role_paths=ROLE_PATHS, critical_files=CRITICAL_FILES, user_roles=None,
+                 default_role=DEFAULT_ROLE):
+        self.user_roles = dict(user_roles or {})
+        self.default_role = default_role
+        self.roles = list(dict.fromkeys([*role_paths, default_role, *self.user_roles.values()]))
+        self._role_index = {role: i for i, role in enumerate(self.roles)}
+        self._grants = {}  # trie node prefix -> roles granted at that node
+        for role, prefixes in role_paths.items():
+            for prefix in prefixes:
+                self._grants.setdefault(_directory(prefix), set()).add(self._role_index[role])
+        self.critical_files = {}  # directory -> file names
+        for path in critical_files:
+            directory, _, name = str(path).rpartition('/')
+            self.critical_files.setdefault(directory + '/', set()).add(name)
+        self._row_of = {}  # directory -> row of self._table
+        self._table = np.zeros((0, len(self.roles)), dtype=bool)  # (directory x role) allowed
+
+    def role_of(self, username):
+        return self.user_roles.get(username, self.default_role)
+
+    def _walk(self, directory, row):
+        end = directory.find('/')
+        while end >= 0:
+            granted = self._grants.get(directory[:end + 1])
+            if granted:
+                row[list(granted)] = True
+            end = directory.find('/', end + 1)
+
+    def allowed(self, directories):
+        """(directories x self.roles) boolean table: which roles may access files in each directory."""
+        missing = list(dict.fromkeys(d for d in directories if d not in self._row_of))
+        if missing:
+            rows = np.zeros((len(missing), len(self.roles)), dtype=bool)
+            for i, directory in enumerate(missing):
+                self._walk(directory, rows[i])
+                self._row_of[directory] = len(self._table) + i
+            self._table = np.concatenate([self._table, rows])
+        return self._table[np.fromiter((self._row_of[d] for d in directories), dtype=np.intp, count=len(directories))]
+
+    def classify(self, usernames, directories, filenames=None):
+        """(out-of-role, critical-file) boolean arrays for file-access rows.
+
+        `directories` are the rows' directory prefixes with the trailing '/'
+        (log_schema.split_filepaths); rows with no path are neither.
+        Critical-file checks need `filenames` too.
+        """
+        user_codes, user_uniques = _factorize(usernames)
+        dir_codes, dir_uniques = _factorize(directories)
+
+        role_codes = np.array([self._role_index[self.role_of(u)] for u in user_uniques]
+                              + [self._role_index[self.default_role]], dtype=np.intp)[user_codes]
+        # One extra all-allowed row for missing paths (code -1).
+        table = np.concatenate([self.allowed(dir_uniques), np.ones((1, len(self.roles)), dtype=bool)])
+        in_role = table[dir_codes, role_codes]
+
+        # /home/<owner>/...: in-role for the owner only.
+        user_position = {u: i for i, u in enumerate(user_uniques)}
+        owners = np.array([user_position.get(d[len(HOME_DIR):].split('/', 1)[0], -2) if d.startswith(HOME_DIR)
+                           else -2 for d in dir_uniques] + [-2], dtype=np.intp)
+        in_role |= owners[dir_codes] == user_codes
+        out_of_role = ~in_role
+
+        critical = np.zeros(len(dir_codes), dtype=bool)
+        if filenames is not None and self.critical_files:
+            watched = [i for i, d in enumerate(dir_uniques) if d in self.critical_files]
+            if watched:
+                name_codes, name_uniques = _factorize(filenames)
+                name_position = {name: i for i, name in enumerate(name_uniques)}
+                pairs = [i * (len(name_uniques) + 1) + name_position[name]
+                         for i in watched for name in self.critical_files[dir_uniques[i]] if name in name_position]
+                critical = np.isin(dir_codes * (len(name_uniques) + 1) + name_codes, pairs) & (dir_codes >= 0)
+        return out_of_role, critical
+
+
+def _factorize(values):
+    """(int codes with -1 for missing, unique values as str); categoricals reuse their existing codes."""
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(dtype=np.intp), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    return codes.astype(np.intp), [str(value) for value in np.asarray(uniques, dtype=object)]
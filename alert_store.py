@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# --- Configuration ---
+ALERT_DB = 'alerts.db'
+PENDING = "Pending Review"
+ACTION_TAKEN = "Action Taken"
+BUSY_TIMEOUT_MS = 30_000  # writers wait this long for another writer's lock instead of failing
+PAGE_SIZE = 50
+
+# One row per flagged user-day per model version. Status survives rescoring
+# (the key does not depend on row positions) and every change is also
+# written to the append-only actions table.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    username TEXT NOT NULL,
+    date TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    anomaly_score REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Pending Review',
+    top_features TEXT,
+    attack_techniques TEXT,
+    features TEXT,
+    contributions TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    updated_by TEXT,
+    PRIMARY KEY (model_version, username, date)
+);
+CREATE INDEX IF NOT EXISTS alerts_by_score ON alerts (model_version, anomaly_score, username, date);
+CREATE INDEX IF NOT EXISTS alerts_by_status ON alerts (model_version, status, anomaly_score, username, date);
+CREATE INDEX IF NOT EXISTS alerts_by_user ON alerts (model_version, username, anomaly_score, date);
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    username TEXT NOT NULL,
+    date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    actor TEXT,
+    detail TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS actions_by_alert ON actions (model_version, username, date);
+CREATE TABLE IF NOT EXISTS syncs (
+    model_version TEXT PRIMARY KEY,
+    data_version TEXT NOT NULL,
+    alerts INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+ALERT_COLUMNS = ['username', 'date', 'model_version', 'anomaly_score', 'status', 'top_features',
+                 'attack_techniques', 'features', 'contributions', 'updated_at', 'updated_by']
+
+
+class AlertStore:
+    """SQLite alert and action store shared by every dashboard session and process.
+
+    The database runs in WAL mode, so readers never block the single writer.
+    Each thread gets its own connection, and writes run in short BEGIN
+    IMMEDIATE transactions that wait on busy_timeout, so concurrent
+    analysts queue up instead of failing. Queries read one page at a time
+    through the indexes and never load the whole table.
+    """
+
+    def __init__(self, path=ALERT_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def _query(self, sql, params=()):
+        with self._connect() as conn:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=[d[0] for d in cursor.description])
+
+    # --- Writes ---
+    def sync(self, model_version, data_version, alerts, feature_columns, contributions=None):
+        """Replaces a model version's pending alerts with a freshly scored set.
+
+        `alerts` has username, date, anomaly_score and the feature columns,
+        plus optional top_features / attack_techniques; `contributions` is
+        indexed like it. Alerts that were already acted on keep their status,
+        and pending alerts that are no longer flagged are removed.
+        """
+        now = time.time()
+        dates = pd.to_datetime(alerts['date']).dt.strftime('%Y-%m-%d')
+        features = alerts[feature_columns].to_dict('records')
+        contribution_rows = (contributions.round(4).to_dict('records') if contributions is not None
+                             else [None] * len(alerts))
+        rows = [
+            (username, date, model_version, float(score), top, techniques,
+             json.dumps(feature_row, default=int), None if contrib is None else json.dumps(contrib), now, now)
+            for username, date, score, top, techniques, feature_row, contrib in zip(
+                alerts['username'].astype(str), dates, alerts['anomaly_score'],
+                alerts.get('top_features', pd.Series([None] * len(alerts))).tolist(),
+                alerts.get('attack_techniques', pd.Series([None] * len(alerts))).tolist(),
+                features, contribution_rows)
+        ]
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS fresh (username TEXT, date TEXT, PRIMARY KEY (username, date))')
+            conn.execute('DELETE FROM fresh')
+            conn.executemany('INSERT INTO fresh VALUES (?, ?)', [(r[0], r[1]) for r in rows])
+            conn.execute(
+                "DELETE FROM alerts WHERE model_version = ? AND status = ? "
+                "AND (username, date) NOT IN (SELECT username, date FROM fresh)", (model_version, PENDING))
+            conn.executemany(
+                "INSERT INTO alerts (username, date, model_version, anomaly_score, top_features, attack_techniques, "
+                "features, contributions, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (model_version, username, date) DO UPDATE SET anomaly_score = excluded.anomaly_score, "
+                "top_features = excluded.top_features, attack_techniques = excluded.attack_techniques, "
+                "features = excluded.features, contributions = excluded.contributions", rows)
+            conn.execute("INSERT OR REPLACE INTO syncs VALUES (?, ?, ?, ?)",
+                         (model_version, str(data_version), len(rows), now))
+        return len(rows)
+
+    def set_status(self, model_version, keys, status, actor=None, detail=None):
+        """Sets the status of (username, date) alerts and logs the action; returns rows updated."""
+        now = time.time()
+        keys = [(str(username), pd.Timestamp(date).strftime('%Y-%m-%d')) for username, date in keys]
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            updated = conn.executemany(
+                "UPDATE alerts SET status = ?, updated_at = ?, updated_by = ? "
+                "WHERE model_version = ? AND username = ? AND date = ?",
+                [(status, now, actor, model_version, username, date) for username, date in keys]).rowcount
+            conn.executemany("INSERT INTO actions (model_version, username, date, status, actor, detail, at) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(model_version, username, date, status, actor, detail, now) for username, date in keys])
+        return updated
+
+    # --- Reads ---
+    def synced_data_version(self, model_version):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data_version FROM syncs WHERE model_version = ?", (model_version,)).fetchone()
+        return None if row is None else row['data_version']
+
+    def _where(self, model_version, status=None, username=None):
+        clauses, params = ["model_version = ?"], [model_version]
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if username is not None:
+            clauses.append("username = ?")
+            params.append(username)
+        return ' AND '.join(clauses), params
+
+    def count(self, model_version, status=None, username=None):
+        where, params = self._where(model_version, status, username)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM alerts WHERE {where}", params).fetchone()[0]
+
+    def page(self, model_version, status=None, username=None, page=0, page_size=PAGE_SIZE):
+        """One page of alerts, most anomalous first."""
+        where, params = self._where(model_version, status, username)
+        return self._query(f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts WHERE {where} "
+                           f"ORDER BY anomaly_score, username, date LIMIT ? OFFSET ?",
+                           params + [page_size, page * page_size])
+
+    def status_counts(self, model_version):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM alerts WHERE model_version = ? GROUP BY status",
+                                (model_version,)).fetchall()
+        return {status: n for status, n in rows}
+
+    def flagged_users(self, model_version):
+        """Usernames with at least one alert, most anomalous first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT username FROM alerts WHERE model_version = ? GROUP BY username "
+                                "ORDER BY MIN(anomaly_score)", (model_version,)).fetchall()
+        return [row[0] for row in rows]
+
+    def actions(self, model_version, username=None, limit=100):
+        where, params = self._where(model_version, username=username)
+        return self._query(f"SELECT * FROM actions WHERE {where} ORDER BY at DESC LIMIT ?", params + [limit])
+
+
+def expand_json(alerts, column):
+    """The JSON object column of a page of alerts as a frame of its own."""
+    return pd.DataFrame([json.loads(value) if value else {} for value in alerts[column]], index=alerts.index)
+
+
+class _Transaction:
+    """Context manager that commits an explicitly begun transaction, or rolls it back on error."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
@@ -0,0 +1,98 @@
+import json
+import operator
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- MITRE ATT&CK Rules ---
+# Each rule tags a user-day with one technique when all of its conditions
+# hold. A JSON file of the same shape replaces the defaults:
+#   [{"technique": "T1052", "name": "...", "tactic": "...",
+#     "all": [["usb_connection_count", ">", 0]]}, ...]
+# Several rules may share a technique; a row carries it if any of them match.
+ATTACK_RULES_FILE = 'attack_rules.json'
+DEFAULT_ATTACK_RULES = [
+    {'technique': 'T1052', 'name': 'Exfiltration Over Physical Medium', 'tactic': 'Exfiltration',
+     'all': [['usb_connection_count', '>', 0]]},
+    {'technique': 'T1048', 'name': 'Exfiltration Over Alternative Protocol', 'tactic': 'Exfiltration',
+     'all': [['personal_emails_sent_count', '>', 0], ['large_attachments_sent_count', '>', 0]]},
+    {'technique': 'T1083', 'name': 'File and Directory Discovery', 'tactic': 'Discovery',
+     'all': [['unusual_dir_access_count', '>', 0]]},
+    {'technique': 'T1005', 'name': 'Data from Local System', 'tactic': 'Collection',
+     'all': [['unusual_dir_access_count', '>', 0]]},
+    {'technique': 'T1078', 'name': 'Valid Accounts', 'tactic': 'Defense Evasion',
+     'all': [['after_hours_login_count', '>', 0]]},
+]
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+             '==': operator.eq, '!=': operator.ne}
+TECHNIQUES_COLUMN = 'attack_techniques'
+
+
+def load_rules(path=ATTACK_RULES_FILE):
+    """Reads a rule file, falling back to DEFAULT_ATTACK_RULES when it does not exist."""
+    if not os.path.exists(path):
+        return DEFAULT_ATTACK_RULES
+    with open(path) as f:
+        return json.load(f)
+
+
+class AttackRuleIndex:
+    """A rule set compiled into boolean masks over a feature frame.
+
+    Identical conditions are evaluated once for all rules that use them and
+    every rule is an AND of column masks, so tagging a frame is a fixed
+    number of vectorized comparisons whatever its length.
+    """
+
+    def __init__(self, rules=DEFAULT_ATTACK_RULES):
+        self.conditions = []  # unique (column, op, value)
+        self.rules = []  # (technique, condition positions)
+        self.names = {}
+        for rule in rules:
+            positions = []
+            for column, op, value in rule['all']:
+                if op not in OPERATORS:
+                    raise ValueError(f"Unknown operator '{op}' in rule {rule['technique']}.")
+                condition = (column, op, value)
+                if condition not in self.conditions:
+                    self.conditions.append(condition)
+                positions.append(self.conditions.index(condition))
+            self.rules.append((rule['technique'], positions))
+            self.names.setdefault(rule['technique'], rule.get('name', rule['technique']))
+        self.techniques = list(self.names)
+        if len(self.techniques) > 62:
+            raise ValueError("At most 62 distinct techniques are supported (tags are packed into an int64).")
+        self.flag_columns = [f'attack_{technique}' for technique in self.techniques]
+
+    def masks(self, frame):
+        """(rows x techniques) boolean array, one column per technique in self.techniques."""
+        condition_masks = [OPERATORS[op](frame[column].to_numpy(), value) for column, op, value in self.conditions]
+        flags = np.zeros((len(frame), len(self.techniques)), dtype=bool)
+        for technique, positions in self.rules:
+            mask = np.logical_and.reduce([condition_masks[p] for p in positions])
+            flags[:, self.techniques.index(technique)] |= mask
+        return flags
+
+    def tag(self, frame):
+        """One boolean column per technique plus a comma-separated `attack_techniques` column."""
+        flags = self.masks(frame)
+        # Label each distinct combination of techniques once rather than every row.
+        codes = flags.astype(np.int64) @ (1 << np.arange(len(self.techniques), dtype=np.int64))
+        combos, inverse = np.unique(codes, return_inverse=True)
+        labels = np.array([', '.join(t for i, t in enumerate(self.techniques) if int(combo) >> i & 1)
+                           for combo in combos], dtype=object)
+        tags = pd.DataFrame(flags, index=frame.index, columns=self.flag_columns)
+        tags[TECHNIQUES_COLUMN] = labels[inverse]
+        return tags
+
+    def enrich(self, frame):
+        """The frame with the tag columns appended."""
+        return pd.concat([frame, self.tag(frame)], axis=1)
+
+    def describe(self, techniques):
+        """'T1052 Exfiltration Over Physical Medium; ...' for an attack_techniques value."""
+        # Rules without a name are named after their technique; print the id once.
+        return '; '.join(t if self.names.get(t, t) == t else f"{t} {self.names[t]}"
+                         for t in techniques.split(', ') if t)
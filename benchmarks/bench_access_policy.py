@@ -0,0 +1,99 @@
+"""Role-aware file access classification: prefix-trie index vs. a per-row prefix scan.
+
+Run from the repository root:
+
+    python benchmarks/bench_access_policy.py --rows 2000000 --directories 50000 --roles 40
+
+Builds a synthetic policy in which each of `--roles` roles is granted a slice
+of `--directories` project directories, plus one critical file per project,
+and a typed file-access frame whose rows fall in those directories and in
+subdirectories below them. "scan" checks every row against every prefix of
+its user's role with str.startswith, the straightforward implementation; it
+is timed on a sample and extrapolated. "index" is AccessPolicy.classify,
+cold (empty memo) and warm (as for the second chunk of a streamed log). The
+two are checked to agree on the sample.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_policy import AccessPolicy
+from log_schema import split_filepaths
+
+
+def build(rows, directories, roles, users, seed=0):
+    rng = np.random.default_rng(seed)
+    projects = [f"/org/unit-{i % 97}/project-{i}/" for i in range(directories)]
+    role_names = [f"role-{r}" for r in range(roles)]
+    # Each role owns a contiguous slice of projects and shares a few with the next role.
+    per_role = directories // roles
+    role_paths = {role: projects[r * per_role:(r + 1) * per_role + per_role // 10] for r, role in enumerate(role_names)}
+    critical = [f"{project}secrets.db" for project in projects[::50]]
+    usernames = np.array([f"user{u}" for u in range(users)], dtype=object)
+    user_roles = dict(zip(usernames, rng.choice(role_names, users)))
+
+    subdirs = np.array(['', 'src/', 'src/core/', 'docs/', 'build/out/'], dtype=object)
+    names = np.array(['main.py', 'README.md', 'secrets.db', 'data.csv'], dtype=object)
+    who = rng.integers(0, users, rows)
+    # Mostly the user's own role's projects, sometimes anywhere.
+    own = np.array([role_names.index(user_roles[u]) for u in usernames])[who] * per_role + rng.integers(0, per_role, rows)
+    anywhere = rng.integers(0, directories, rows)
+    project = np.where(rng.random(rows) < 0.9, own, anywhere)
+    paths = (np.array(projects, dtype=object)[project] + subdirs[rng.integers(0, len(subdirs), rows)]
+             + names[rng.integers(0, len(names), rows)])
+    frame = pd.DataFrame({'username': pd.Categorical(usernames[who])})
+    frame['filepath_prefix'], frame['filename'] = split_filepaths(pd.Series(paths))
+    return role_paths, critical, user_roles, frame, paths
+
+
+def scan(role_paths, critical, user_roles, usernames, paths):
+    """Per-row reference: every prefix of the user's role, then a critical-file set lookup."""
+    critical = set(critical)
+    out_of_role = np.array([not any(path.startswith(prefix) for prefix in role_paths[user_roles[user]])
+                            for user, path in zip(usernames, paths)])
+    return out_of_role, np.array([path in critical for path in paths])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000, help="File-access rows (one day's worth).")
+    parser.add_argument('--directories', type=int, default=50_000, help="Project directories in the policy.")
+    parser.add_argument('--roles', type=int, default=40)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--sample', type=int, default=20_000, help="Rows the per-row scan is timed on.")
+    args = parser.parse_args()
+
+    role_paths, critical, user_roles, frame, paths = build(args.rows, args.directories, args.roles, args.users)
+    distinct = frame['filepath_prefix'].cat.categories.size
+    print(f"{args.rows:,} accesses by {args.users:,} users in {distinct:,} distinct directories; "
+          f"{args.roles} roles over {args.directories:,} granted prefixes, {len(critical):,} critical files\n")
+
+    sample = slice(0, args.sample)
+    start = time.perf_counter()
+    expected = scan(role_paths, critical, user_roles, frame['username'].to_numpy()[sample], paths[sample])
+    scan_seconds = (time.perf_counter() - start) * args.rows / args.sample
+
+    policy = AccessPolicy(role_paths, critical, user_roles)
+    timings = {}
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        out_of_role, found = policy.classify(frame['username'], frame['filepath_prefix'], frame['filename'])
+        timings[label] = time.perf_counter() - start
+    if not (np.array_equal(out_of_role[sample], expected[0]) and np.array_equal(found[sample], expected[1])):
+        raise AssertionError("index and per-row scan disagree")
+
+    print(f"{'approach':<14} {'seconds':>9} {'rows/s':>14} {'speedup':>8}")
+    print(f"{'scan (est.)':<14} {scan_seconds:>9.2f} {args.rows / scan_seconds:>14,.0f} {'1.0x':>8}")
+    for label, seconds in timings.items():
+        print(f"{'index ' + label:<14} {seconds:>9.3f} {args.rows / seconds:>14,.0f} {scan_seconds / seconds:>7.0f}x")
+    print(f"\nout-of-role: {int(out_of_role.sum()):,} rows; critical-file: {int(found.sum()):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Bulk LOCK_NOW dispatch against local remote_guide.py listeners: cold vs. pooled connections.
+
+Run from the repository root:
+
+    python benchmarks/bench_dispatch.py --users 2000 --listeners 20
+
+Starts `--listeners` headless listeners in-process on free local ports and
+writes a temporary mapping file that spreads `--users` flagged users over
+them. A few users point at a port nobody listens on, and one user is left
+unmapped, to exercise retries and failures. The same batch is dispatched
+twice: first over new connections, then over the pooled ones. Each
+listener is unlocked between passes, and the outcome counts and
+per-endpoint delivery latency of both passes are printed.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_lock_listener import free_port, start_server
+from remote_guide import LockController
+from response_dispatcher import ResponseDispatcher, load_endpoints, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--listeners', type=int, default=20)
+    parser.add_argument('--dead', type=int, default=5, help="Users mapped to a port with no listener.")
+    args = parser.parse_args()
+
+    controllers, ports = [], []
+    for _ in range(args.listeners):
+        controller, port = LockController(headless=True), free_port()
+        start_server(controller, port)
+        controllers.append(controller)
+        ports.append(port)
+    dead_port = free_port()
+
+    usernames = [f'user{i:05d}' for i in range(args.users)]
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        f.write('username,host,port\n')
+        for i, username in enumerate(usernames):
+            port = dead_port if i < args.dead else ports[i % len(ports)]
+            f.write(f'{username},127.0.0.1,{port}\n')
+        mapping = f.name
+    endpoints = load_endpoints(mapping)
+    os.unlink(mapping)
+
+    dispatcher = ResponseDispatcher(endpoints, log_path=None)
+    for label in ('cold connections', 'pooled connections'):
+        for controller in controllers:
+            controller.unlock()
+        started = time.perf_counter()
+        results = dispatcher.dispatch(usernames + ['unmapped.user'])
+        elapsed = time.perf_counter() - started
+        locked = sum(controller.locked for controller in controllers)
+        print(f"--- {label}: {elapsed:.2f}s, {locked}/{len(controllers)} listeners locked ---")
+        print(summarize(results))
+    dispatcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Email feature extraction throughput: per-row apply + regex vs. vectorized.
+
+Run from the repository root:
+
+    python benchmarks/bench_email_features.py --emails 1000000
+
+Synthesizes recipients (internal, partner, free-mail and look-alike domains)
+and attachment sizes, then times the original approach (Series.apply over the
+attachment parser, str.contains over a '|'-joined domain regex) against
+feature_engine's factorized size parsing and exact domain set lookup.
+Use --users to control how many distinct recipient addresses there are,
+and --personal-domains to time both approaches against a full provider
+feed instead of the short personal_domains.txt that ships with the repo.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_features import LEGACY_PERSONAL_DOMAINS, parse_attachment_size_mb
+from feature_engine import PERSONAL_DOMAINS, attachment_size_mb, is_personal_recipient, load_personal_domains
+
+
+def synthetic_emails(n, users=5000, seed=42):
+    rng = np.random.default_rng(seed)
+    domains = np.array(['acme-corp.com', 'partner-a.com', 'consulting-b.org', 'gmail.com',
+                        'yahoo.com', 'proton.me', 'gmail.com.evil.org', 'notgmail.com'], dtype=object)
+    weights = np.array([0.70, 0.08, 0.07, 0.06, 0.04, 0.02, 0.02, 0.01])
+    users = np.array([f'user{i}' for i in range(users)], dtype=object)
+    recipients = users[rng.integers(0, len(users), n)] + '@' + domains[rng.choice(len(domains), n, p=weights)]
+    units = np.array(['KB', 'MB', 'GB'], dtype=object)[rng.choice(3, n, p=[0.8, 0.19, 0.01])]
+    sizes = rng.integers(1, 1024, n).astype(str).astype(object) + units
+    attachments = np.where(rng.random(n) > 0.7, sizes, None)
+    return pd.DataFrame({'recipient': recipients, 'attachment': attachments})
+
+
+def legacy(emails, domains=LEGACY_PERSONAL_DOMAINS):
+    attachment_mb = emails['attachment'].apply(parse_attachment_size_mb)
+    personal = emails['recipient'].str.contains('|'.join(domains), na=False)
+    return attachment_mb, personal
+
+
+def vectorized(emails, domains=None):
+    attachment_mb = attachment_size_mb(emails['attachment'])
+    personal = is_personal_recipient(emails['recipient'], domains)
+    return attachment_mb, personal
+
+
+def timed(fn, emails, repeat, domains):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(emails, domains)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--emails', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=5000, help="Distinct recipient local parts.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--personal-domains', metavar='FILE',
+                        help="Provider list (one domain per line) used by both approaches.")
+    args = parser.parse_args()
+
+    emails = synthetic_emails(args.emails, args.users)
+    if args.personal_domains:
+        # The legacy regex gets the same list, escaped so dots match literally.
+        domains = load_personal_domains(args.personal_domains)
+        approaches = (('legacy', legacy, [re.escape(d) for d in sorted(domains)]), ('vectorized', vectorized, domains))
+    else:
+        domains = PERSONAL_DOMAINS
+        approaches = (('legacy', legacy, LEGACY_PERSONAL_DOMAINS), ('vectorized', vectorized, None))
+    print(f"{args.emails:,} emails, {len(domains)} personal domains\n")
+    print(f"{'approach':<12} {'seconds':>8} {'s / 1M emails':>14} {'emails/s':>12} {'personal':>9}")
+    for name, fn, fn_domains in approaches:
+        seconds, (_, personal) = timed(fn, emails, args.repeat, fn_domains)
+        print(f"{name:<12} {seconds:>8.3f} {seconds * 1e6 / args.emails:>14.3f} "
+              f"{args.emails / seconds:>12,.0f} {int(personal.sum()):>9,}")
+    print("\nThe legacy regex also counts the look-alike domains (gmail.com.evil.org, notgmail.com);\n"
+          "the legacy parser treats GB attachments as 0 MB.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Explanation cost for every flagged user-day: one row at a time vs. one batch.
+
+Run from the repository root after preprocess_data.py:
+
+    python benchmarks/bench_explanations.py --alerts 2000
+
+Fits the train_model.py IsolationForest on the daily feature table, takes the
+`--alerts` most anomalous rows and attributes their scores with
+anomaly_explainer.feature_contributions, first calling it once per alert (as
+a per-click explanation in the dashboard would) and then once for all of
+them. The per-row loop is timed on a sample and extrapolated.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anomaly_explainer import as_compact_forest, feature_contributions
+from feature_store import load_daily_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=2000, help="Number of flagged rows to explain.")
+    parser.add_argument('--sample', type=int, default=100, help="Rows timed in the one-at-a-time loop.")
+    args = parser.parse_args()
+
+    data = load_daily_features()
+    features = data.drop(columns=['username', 'date'])
+    model = IsolationForest(n_estimators=100, contamination='auto', random_state=42, n_jobs=-1).fit(features)
+    forest = as_compact_forest(model)
+    scores = forest.decision_function(features)
+    flagged = features.iloc[np.argsort(scores)[:args.alerts]]
+    inliers = features[scores >= 0]
+    print(f"Explaining {len(flagged):,} alerts against {len(inliers):,} inlier rows "
+          f"({len(features):,} user-days, {features.shape[1]} features).")
+
+    sample = flagged.iloc[:args.sample]
+    started = time.perf_counter()
+    for i in range(len(sample)):
+        feature_contributions(forest, sample.iloc[i:i + 1], inliers)
+    per_row = (time.perf_counter() - started) / max(len(sample), 1)
+
+    started = time.perf_counter()
+    feature_contributions(forest, flagged, inliers)
+    batched = time.perf_counter() - started
+
+    print(f"{'mode':<10} {'total s':>9} {'ms / alert':>11}")
+    print(f"{'per-row':<10} {per_row * len(flagged):>9.2f} {per_row * 1e3:>11.3f}")
+    print(f"{'batched':<10} {batched:>9.2f} {batched * 1e3 / max(len(flagged), 1):>11.3f}")
+    print(f"Speedup: {per_row * len(flagged) / batched:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
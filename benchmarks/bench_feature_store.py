@@ -0,0 +1,98 @@
+"""Load time and memory of the Parquet feature store vs. daily_user_features.csv.
+
+Run from the repository root:
+
+    python benchmarks/bench_feature_store.py --users 1000 --days 365
+
+A synthetic year of features is written both as CSV and to the store in a
+temporary directory. Each load runs in a fresh process so its peak RSS can be
+reported on its own.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_engine import FEATURE_COLUMNS
+from feature_store import read_features, write_features
+
+
+def synthetic_features(users, days, seed=42):
+    rng = np.random.default_rng(seed)
+    usernames = [f'user{i:05d}' for i in range(users)]
+    dates = pd.date_range('2025-01-01', periods=days, freq='D')
+    index = pd.MultiIndex.from_product([usernames, dates], names=['username', 'date'])
+    data = pd.DataFrame(index=index).reset_index()
+    for col in FEATURE_COLUMNS:
+        data[col] = rng.poisson(3, len(data))
+    data['date'] = data['date'].dt.date
+    return data
+
+
+def load_csv(workdir, columns, start, end):
+    usecols = None if columns is None else ['username', 'date'] + columns
+    data = pd.read_csv(os.path.join(workdir, 'features.csv'), usecols=usecols)
+    data['date'] = pd.to_datetime(data['date'])
+    if start is not None:
+        data = data[(data['date'] >= start) & (data['date'] <= end)]
+    return data
+
+
+def load_store(workdir, columns, start, end):
+    return read_features(columns=columns, start=start, end=end, root=workdir)
+
+
+def _measure(loader, workdir, columns, start, end, queue):
+    import pyarrow  # noqa: F401  -- import cost is not part of the load
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    data = loader(workdir, columns, start, end)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak - baseline) / 1024, data.memory_usage(deep=True).sum() / 2**20, len(data)))
+
+
+def measure(loader, workdir, columns=None, start=None, end=None):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(loader, workdir, columns, start, end, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data = synthetic_features(args.users, args.days)
+        data.to_csv(os.path.join(workdir, 'features.csv'), index=False)
+        write_features(data, root=workdir)
+        print(f"{len(data):,} user-days, {args.users} users x {args.days} days\n")
+
+        columns = ['usb_connection_count', 'personal_emails_sent_count']
+        start, end = pd.Timestamp('2025-12-01'), pd.Timestamp('2025-12-31')
+        cases = [
+            ('full table', None, None, None),
+            ('2 columns, 31 days', columns, start, end),
+        ]
+        print(f"{'query':<20} {'backend':<8} {'load s':>8} {'peak RSS MB':>12} {'frame MB':>9} {'rows':>10}")
+        for label, cols, lo, hi in cases:
+            for backend, loader in (('csv', load_csv), ('parquet', load_store)):
+                elapsed, rss, frame, rows = measure(loader, workdir, cols, lo, hi)
+                print(f"{label:<20} {backend:<8} {elapsed:>8.3f} {rss:>12.1f} {frame:>9.1f} {rows:>10,}")
+
+
+if __name__ == "__main__":
+    main()
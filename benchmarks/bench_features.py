@@ -0,0 +1,125 @@
+"""Fused aggregation engine vs. the original groupby + merge chain.
+
+Run from the repository root:
+
+    python benchmarks/bench_features.py --scales 1 10 100
+
+Each scale replicates the shipped log CSVs that many times, renaming the users
+in every copy so the number of (username, date) rows grows with the data.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_policy import CRITICAL_FILES
+from feature_engine import ACCESS_POLICY, FEATURE_COLUMNS, LOG_FILES, fused_daily_features
+
+# What the original script matched with a substring regex. On the shipped logs
+# it flags the same emails as the exact-domain set check.
+LEGACY_PERSONAL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'protonmail.com']
+
+
+def parse_attachment_size_mb(size):
+    """The original per-email attachment parser, applied with Series.apply."""
+    if pd.isna(size):
+        return 0
+    size = str(size).upper()
+    if 'MB' in size:
+        return float(size.replace('MB', ''))
+    elif 'KB' in size:
+        return float(size.replace('KB', '')) / 1024
+    else:
+        return 0
+
+
+def legacy_daily_features(frames):
+    """The pre-fusion pipeline: one filter + groupby per feature, nine left merges."""
+    login_df, file_df, usb_df, email_df = (frames[s].copy() for s in ('login', 'file', 'usb', 'email'))
+    for df in (login_df, file_df, usb_df, email_df):
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['date'] = df['timestamp'].dt.date
+
+    def count(df, name):
+        return df.groupby(['username', 'date']).size().reset_index(name=name)
+
+    login_df['hour'] = login_df['timestamp'].dt.hour
+    daily_features = count(login_df[login_df['action'] == 'login'], 'login_count')
+    daily_features = pd.merge(daily_features, count(login_df[login_df['success'] == False], 'failed_login_count'), on=['username', 'date'], how='left')
+    daily_features = pd.merge(daily_features, count(login_df[(login_df['hour'] < 8) | (login_df['hour'] > 19)], 'after_hours_login_count'), on=['username', 'date'], how='left')
+    daily_features = daily_features.fillna(0)
+
+    email_df['attachment_mb'] = email_df['attachment'].apply(parse_attachment_size_mb)
+    others = [
+        count(file_df, 'file_access_count'),
+        count(file_df[file_df['filepath'].str.contains('/sales/', na=False)], 'unusual_dir_access_count'),
+        count(file_df[file_df['action'] == 'file_write'], 'file_write_count'),
+        # Not in the original script; added so both pipelines produce the same columns.
+        count(file_df[file_df['filepath'].isin(CRITICAL_FILES)], 'critical_file_access_count'),
+        count(usb_df[usb_df['action'] == 'usb_connect'], 'usb_connection_count'),
+        count(email_df, 'emails_sent_count'),
+        count(email_df[email_df['recipient'].str.contains('|'.join(LEGACY_PERSONAL_DOMAINS), na=False)], 'personal_emails_sent_count'),
+        count(email_df[email_df['attachment_mb'] > 5], 'large_attachments_sent_count'),
+    ]
+    for other in others:
+        daily_features = pd.merge(daily_features, other, on=['username', 'date'], how='left')
+    daily_features = daily_features.fillna(0)
+    for col in FEATURE_COLUMNS:
+        daily_features[col] = daily_features[col].astype(int)
+    return daily_features
+
+
+def replicate(frames, scale):
+    """Concatenates `scale` copies of every log, with distinct users per copy."""
+    if scale == 1:
+        return frames
+    scaled = {}
+    for source, df in frames.items():
+        copies = []
+        for i in range(scale):
+            copy = df.copy()
+            copy['username'] = copy['username'] + f'.{i}'
+            copies.append(copy)
+        scaled[source] = pd.concat(copies, ignore_index=True)
+    # Copies keep their original's role, so out-of-role counts stay comparable.
+    ACCESS_POLICY.user_roles.update({f'{user}.{i}': role for user, role in list(ACCESS_POLICY.user_roles.items())
+                                     for i in range(scale)})
+    return scaled
+
+
+def best_of(fn, frames, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(frames)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Raw, untyped frames: both pipelines start from what read_csv returns.
+    base = {source: pd.read_csv(path) for source, path in LOG_FILES.items()}
+    print(f"{'scale':>6} {'events':>12} {'rows':>10} {'legacy s':>10} {'fused s':>10} {'speedup':>8}")
+    for scale in args.scales:
+        frames = replicate(base, scale)
+        events = sum(len(df) for df in frames.values())
+        legacy_time, legacy = best_of(legacy_daily_features, frames, args.repeat)
+        fused_time, fused = best_of(fused_daily_features, frames, args.repeat)
+        pd.testing.assert_frame_equal(
+            legacy.astype({'username': str}).reset_index(drop=True),
+            fused.astype({'username': str}).reset_index(drop=True),
+        )
+        print(f"{scale:>5}x {events:>12,} {len(fused):>10,} {legacy_time:>10.3f} {fused_time:>10.3f} {legacy_time / fused_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
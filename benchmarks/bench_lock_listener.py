@@ -0,0 +1,118 @@
+"""Load test for the remote_guide.py listener: concurrent LOCK_NOW floods and silent clients.
+
+Run from the repository root:
+
+    python benchmarks/bench_lock_listener.py --clients 500 --rounds 20
+
+Starts the asyncio listener in-process with a headless LockController (no
+window is opened) on a free local port. Before the flood, `--silent`
+clients connect and never send anything and as many more send half a
+header and stall, so the run also shows that stuck peers do not hold up
+anyone else. Each round unlocks the controller, then fires `--clients`
+concurrent LOCK_NOW commands. It reports command-to-ack latency
+percentiles, command-to-lock latency of the command that engaged the lock,
+and checks that every round engaged exactly one lock.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from remote_guide import HEADER, LockController, encode_message, read_message, serve
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(controller, port):
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete,
+                              args=(serve(controller, '127.0.0.1', port, ready),), daemon=True)
+    thread.start()
+    ready.wait()
+
+
+async def lock_now(port):
+    """(seconds from send to ack, send time, reply) of one LOCK_NOW on its own connection."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    sent = time.perf_counter()
+    writer.write(encode_message("LOCK_NOW"))
+    await writer.drain()
+    reply = await read_message(reader, timeout=30)
+    acked = time.perf_counter()
+    writer.close()
+    return acked - sent, sent, reply
+
+
+async def stalled_clients(port, silent):
+    """Connections that never complete a message: half of them silent, half a partial header."""
+    conns = []
+    for i in range(silent * 2):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        if i % 2:
+            writer.write(HEADER.pack(8)[:2])
+            await writer.drain()
+        conns.append(writer)
+    return conns
+
+
+async def run(port, controller, clients, rounds, silent):
+    stalled = await stalled_clients(port, silent)
+    ack_latencies, lock_latencies, engaged_per_round = [], [], []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        controller.unlock()
+        results = await asyncio.gather(*(lock_now(port) for _ in range(clients)))
+        engaged = [r for r in results if r[2] == "ACK LOCK_NOW locked"]
+        engaged_per_round.append(len(engaged))
+        errors = [r[2] for r in results if not r[2].startswith("ACK LOCK_NOW")]
+        if errors:
+            raise RuntimeError(f"unexpected replies: {errors[:3]}")
+        ack_latencies += [r[0] for r in results]
+        # locked_at is wall-clock; convert it onto the perf_counter timeline of the sends.
+        lock_perf = controller.locked_at - time.time() + time.perf_counter()
+        lock_latencies += [lock_perf - r[1] for r in engaged]
+    elapsed = time.perf_counter() - started
+    for writer in stalled:
+        writer.close()
+    return np.array(ack_latencies), np.array(lock_latencies), engaged_per_round, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=500, help="Concurrent LOCK_NOW senders per round.")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--silent', type=int, default=50, help="Stalled connections of each kind.")
+    args = parser.parse_args()
+
+    port = free_port()
+    controller = LockController(headless=True)
+    start_server(controller, port)
+    ack, lock, engaged, elapsed = asyncio.run(run(port, controller, args.clients, args.rounds, args.silent))
+
+    total = args.clients * args.rounds
+    print(f"{total:,} LOCK_NOW commands from {args.clients} concurrent clients x {args.rounds} rounds, "
+          f"{args.silent * 2} stalled connections held open; {total / elapsed:,.0f} commands/s.")
+    print(f"{'latency':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, values in (('command-to-ack', ack), ('command-to-lock', lock)):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1e3
+        print(f"{label:<16} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {values.max() * 1e3:>8.2f}")
+    if all(n == 1 for n in engaged):
+        print("✅ Exactly one lock engaged per round; every other command was acknowledged as already_locked.")
+    else:
+        print(f"⚠️ Locks engaged per round: {engaged}")
+
+
+if __name__ == "__main__":
+    main()
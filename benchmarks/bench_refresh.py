@@ -0,0 +1,73 @@
+"""Nightly retrain vs. incremental refresh as the feature history grows.
+
+Run from the repository root:
+
+    python benchmarks/bench_refresh.py --histories 1 4 16 64 --new-days 1
+
+Builds histories of daily_user_features.csv repeated back to back in time
+(`--histories` copies, each shifted by the span of the file), then times
+what a nightly job does once `--new-days` more days have arrived: train_model.py's
+full refit on all of history and scoring of every user-day, against one
+model_refresh round that fingerprints the days of the last window, samples
+the new days into the reservoir, replaces `--replace` trees and scores the
+new days. The refresh state is bootstrapped on the history first and not
+timed.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_forest import CompactForest
+from model_refresh import MODEL_PARAMS, RESERVOIR_SIZE, WINDOW_DAYS, refresh
+
+
+def history(data, copies):
+    dates = pd.to_datetime(data['date'])
+    span = dates.max() - dates.min() + pd.Timedelta(days=1)
+    frames = [data.assign(date=dates + span * i) for i in range(copies)]
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--features', default='daily_user_features.csv')
+    parser.add_argument('--histories', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help="Copies of the feature file laid end to end.")
+    parser.add_argument('--new-days', type=int, default=1, help="Days arriving since the last run.")
+    parser.add_argument('--replace', type=int, default=20)
+    parser.add_argument('--reservoir', type=int, default=RESERVOIR_SIZE)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.features)
+    print(f"{'history':>10} {'user-days':>10} {'full refit s':>13} {'refresh s':>10} {'speedup':>8}")
+    for copies in args.histories:
+        data = history(base, copies)
+        days = pd.Series(data['date'].unique()).sort_values()
+        old, new = data[data['date'] < days.iloc[-args.new_days]], data[data['date'] >= days.iloc[-args.new_days]]
+        features = data.drop(columns=['username', 'date'])
+
+        start = time.perf_counter()
+        model = IsolationForest(**MODEL_PARAMS, n_jobs=-1).fit(features)
+        CompactForest.from_model(model, n_jobs=-1).decision_function(features)
+        full_seconds = time.perf_counter() - start
+
+        state = refresh(old, None, args.reservoir, WINDOW_DAYS, args.replace)
+        start = time.perf_counter()
+        window = data[data['date'] >= pd.Timestamp(state['window'][0])]  # what model_refresh.py reads
+        state = refresh(window, state, args.reservoir, WINDOW_DAYS, args.replace)
+        new_features = new[list(state['model'].feature_names_in_)]
+        CompactForest.from_model(state['model'], n_jobs=-1).decision_function(new_features)
+        refresh_seconds = time.perf_counter() - start
+
+        print(f"{f'{len(days)} days':>10} {len(data):>10,} {full_seconds:>13.3f} {refresh_seconds:>10.3f} "
+              f"{full_seconds / refresh_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""CompactForest vs. sklearn's IsolationForest: single-row latency and batch throughput.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py --rows 1000000 --single 2000
+
+Fits the model train_model.py fits on daily_user_features.csv, then times
+decision_function on `--rows`-row batches with sklearn, and with
+CompactForest on one thread and on `--threads` threads. The "repeated" batch
+tiles the feature rows, so vectors repeat as much as in real daily counts
+and CompactForest walks each distinct one once; the "distinct" batch adds
+jitter so every row is unique and has to be walked. It also reports the
+median latency of scoring one row `--single` times: sklearn on a one-row
+frame, CompactForest on a one-row frame, and CompactForest.score_row on a
+plain vector. Every CompactForest result is checked against sklearn's scores.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_forest import CompactForest
+
+# Same settings as train_model.py.
+MODEL_PARAMS = {'n_estimators': 100, 'contamination': 'auto', 'random_state': 42, 'n_jobs': -1}
+TOLERANCE = 1e-12
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def median_latency(fn, calls):
+    timings = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        timings[i] = time.perf_counter() - start
+    return np.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--features', default='daily_user_features.csv')
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Rows in the throughput batch.")
+    parser.add_argument('--single', type=int, default=2_000, help="One-row calls for the latency test.")
+    parser.add_argument('--threads', type=int, default=os.cpu_count(), help="Threads for the multi-threaded run.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.features)
+    features = data.drop(columns=['username', 'date'])
+    model = IsolationForest(**MODEL_PARAMS).fit(features)
+    compact = CompactForest.from_model(model)
+    print(f"{model.n_estimators} trees, max depth {compact.meta['max_depth']}, {len(compact.feature):,} nodes, "
+          f"{features.shape[1]} features; {os.cpu_count()} cores\n")
+
+    repeated = features.iloc[np.arange(args.rows) % len(features)].reset_index(drop=True)
+    jitter = np.random.default_rng(0).random(repeated.shape)
+    batches = {'repeated': repeated, 'distinct': repeated + jitter}
+    print(f"{'batch of ' + format(args.rows, ','):<24} {'distinct':>9} {'seconds':>8} {'rows/s':>13} "
+          f"{'speedup':>8} {'max |diff|':>11}")
+    for name, batch in batches.items():
+        sk_seconds, expected = best_of(lambda: model.decision_function(batch), args.repeat)
+        runs = [('sklearn', sk_seconds, expected)]
+        for threads in dict.fromkeys([1, args.threads]):
+            compact.n_jobs = threads
+            seconds, scores = best_of(lambda: compact.decision_function(batch), args.repeat)
+            runs.append((f'compact x{threads}', seconds, scores))
+        distinct = len(batch.drop_duplicates())
+        for label, seconds, scores in runs:
+            diff = np.abs(scores - expected).max()
+            if diff > TOLERANCE:
+                raise AssertionError(f"{label} differs from sklearn by {diff} on the {name} batch")
+            print(f"{name + ' ' + label:<24} {distinct:>9,} {seconds:>8.3f} {args.rows / seconds:>13,.0f} "
+                  f"{sk_seconds / seconds:>7.1f}x {diff:>11.1e}")
+
+    compact.n_jobs = 1
+    frames = [features.iloc[[i % len(features)]] for i in range(args.single)]
+    vectors = features.to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # sklearn's parallel backend warns about one-row inputs on some versions
+        sk_latency = median_latency(lambda i: model.decision_function(frames[i]), args.single)
+    latencies = [
+        ('sklearn frame', sk_latency),
+        ('compact frame', median_latency(lambda i: compact.decision_function(frames[i]), args.single)),
+        ('compact score_row', median_latency(lambda i: compact.score_row(vectors[i % len(vectors)]), args.single)),
+    ]
+    for i in range(min(args.single, len(vectors))):
+        if abs(compact.score_row(vectors[i]) - model.decision_function(frames[i])[0]) > TOLERANCE:
+            raise AssertionError(f"score_row differs from sklearn on row {i}")
+    print(f"\n{'single row':<20} {'median us':>10} {'speedup':>8}")
+    for label, seconds in latencies:
+        print(f"{label:<20} {seconds * 1e6:>10.1f} {sk_latency / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
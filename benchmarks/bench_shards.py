@@ -0,0 +1,75 @@
+"""Sharded training: a full fit vs. a rerun after one user's data changed.
+
+Run from the repository root:
+
+    python benchmarks/bench_shards.py --scale 10 --workers 4
+
+Replicates daily_user_features.csv `--scale` times with distinct users per
+copy, fits role shards plus one shard per user into a temporary directory,
+then bumps one count of a single user-day and reruns. The rerun refits only
+that user's shard and their peer group's, so its cost stays flat as the
+number of users grows, while a single global IsolationForest would be refit
+on every row.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_engine import FEATURE_COLUMNS
+from shard_models import MODEL_PARAMS, train_shards
+
+
+def replicate(data, scale):
+    copies = []
+    for i in range(scale):
+        copy = data.copy()
+        copy['username'] = copy['username'] + (f'.{i}' if i else '')
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--features', default='daily_user_features.csv')
+    parser.add_argument('--scale', type=int, default=10, help="Copies of the users in the feature table.")
+    parser.add_argument('--per-user-min-days', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    data = replicate(pd.read_csv(args.features), args.scale)
+    print(f"{len(data):,} user-days of {data['username'].nunique():,} users\n")
+    global_seconds, _ = timed(lambda: IsolationForest(**MODEL_PARAMS, n_jobs=-1).fit(data[FEATURE_COLUMNS]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        def run():
+            return train_shards(data, directory, per_user_min_days=args.per_user_min_days, workers=args.workers)[1]
+
+        full_seconds, full = timed(run)
+        unchanged_seconds, unchanged = timed(run)
+        changed_user = data['username'].iloc[-1]
+        data.loc[data.index[-1], 'file_access_count'] += 1
+        one_seconds, one = timed(run)
+
+    print(f"{'run':<36} {'seconds':>8} {'shards fit':>11}")
+    print(f"{'global model (all rows)':<36} {global_seconds:>8.2f} {1:>11}")
+    for label, seconds, report in (('shards, first run', full_seconds, full),
+                                   ('shards, nothing changed', unchanged_seconds, unchanged),
+                                   (f'shards, {changed_user} changed', one_seconds, one)):
+        print(f"{label:<36} {seconds:>8.2f} {int((report['status'] != 'unchanged').sum()):>11} / {len(report)}")
+
+
+if __name__ == "__main__":
+    main()
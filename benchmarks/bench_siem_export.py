@@ -0,0 +1,75 @@
+"""Bulk NDJSON export to a local stub _bulk endpoint: throughput and batch latency by concurrency.
+
+Run from the repository root:
+
+    python benchmarks/bench_siem_export.py --events 200000 --in-flight 1 4 8 --delay 0.02
+
+Encodes `--events` raw file-access events (file_access_logs.csv tiled to
+that size, each with its own _id) once, then ships them through BulkSink
+to an in-process StubBulkServer with each `--in-flight` setting. The stub
+adds `--delay` seconds of service time per request, standing in for the
+network and indexing time of a real cluster, and rejects `--reject-rate`
+of the documents with 429 so that resends are exercised. Every run is
+checked to have delivered each document exactly once, over no more
+connections than it has senders. A final row writes the same NDJSON to a
+temporary file through the file sink.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from siem_export import BATCH_EVENTS, BulkSink, StubBulkServer, bulk_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logs', default='file_access_logs.csv')
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--batch-events', type=int, default=BATCH_EVENTS)
+    parser.add_argument('--delay', type=float, default=0.02, help="Stub service time per request, in seconds.")
+    parser.add_argument('--reject-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    logs = pd.read_csv(args.logs)
+    events = logs.iloc[np.arange(args.events) % len(logs)].reset_index(drop=True)
+    start = time.perf_counter()
+    lines = bulk_lines(events, 'bench-events', [f"file-{i}" for i in range(len(events))])
+    encode_seconds = time.perf_counter() - start
+    print(f"{len(lines):,} events, {sum(map(len, lines)) / 2**20:.1f} MiB of NDJSON, encoded in {encode_seconds:.2f}s "
+          f"({len(lines) / encode_seconds:,.0f} events/s); stub delay {args.delay * 1e3:.0f} ms/request\n")
+
+    print(f"{'sink':<14} {'seconds':>8} {'events/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9} "
+          f"{'conns':>6} {'resent':>7}")
+    for in_flight in args.in_flight:
+        stub = StubBulkServer(reject_rate=args.reject_rate, delay=args.delay).start()
+        sink = BulkSink(stub.url, batch_events=args.batch_events, in_flight=in_flight)
+        sink.add(lines)
+        stats = sink.close()
+        stub.stop()
+        if stats['accepted'] != len(lines) or len(stub.ids) != len(lines) or stub.connections > in_flight:
+            raise AssertionError(f"in-flight {in_flight}: {stats['accepted']} accepted, {len(stub.ids)} distinct "
+                                 f"documents received over {stub.connections} connections")
+        p50, p99 = np.percentile(sink.latencies, [50, 99]) * 1e3
+        print(f"{f'http x{in_flight}':<14} {stats['seconds']:>8.2f} {len(lines) / stats['seconds']:>10,.0f} "
+              f"{p50:>8.1f} {p99:>8.1f} {stats['requests']:>9} {stub.connections:>6} {stats['resent']:>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'events.ndjson')
+        sink = BulkSink(path, batch_events=args.batch_events)
+        sink.add(lines)
+        stats = sink.close()
+        p50, p99 = np.percentile(sink.latencies, [50, 99]) * 1e3
+        print(f"{'file':<14} {stats['seconds']:>8.2f} {len(lines) / stats['seconds']:>10,.0f} "
+              f"{p50:>8.1f} {p99:>8.1f} {stats['requests']:>9} {'-':>6} {stats['resent']:>7}")
+
+
+if __name__ == "__main__":
+    main()
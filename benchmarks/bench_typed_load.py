@@ -0,0 +1,60 @@
+"""Load time and memory per million rows: untyped read_csv vs. the typed log schemas.
+
+Run from the repository root:
+
+    python benchmarks/bench_typed_load.py --log-dir benchmarks/data/1000x12-seed42
+
+"untyped" is what the original preprocess_data.py held in memory: every
+column as read_csv infers it, timestamps parsed without a format and a
+Python `date` object per row. "typed" is log_schema.read_typed_log: a
+fixed-format timestamp, an int32 day number, categorical username / action /
+device_id / filepath prefix and name, and only the columns the features use.
+Use benchmarks/run_suite.py --generate-only to build larger log directories.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_engine import LOG_FILES
+from log_schema import memory_mb_per_million, read_typed_log
+
+
+def read_untyped(source, path):
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['date'] = df['timestamp'].dt.date
+    return df
+
+
+def timed(fn, source, path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = fn(source, path)
+        best = min(best, time.perf_counter() - started)
+    return best, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--log-dir', default='.', help="Directory holding the four log CSVs.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'log':<6} {'rows':>11} {'loader':<8} {'load s':>8} {'s / 1M rows':>12} {'MB / 1M rows':>13}")
+    for source, name in LOG_FILES.items():
+        path = os.path.join(args.log_dir, name)
+        for label, loader in (('untyped', read_untyped), ('typed', read_typed_log)):
+            seconds, df = timed(loader, source, path, args.repeat)
+            rows = max(len(df), 1)
+            print(f"{source:<6} {len(df):>11,} {label:<8} {seconds:>8.3f} {seconds * 1e6 / rows:>12.3f} "
+                  f"{memory_mb_per_million(df):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""End-to-end benchmark suite over generated datasets of several sizes.
+
+Run from the repository root:
+
+    python benchmarks/run_suite.py --scales 50x1 50x12 1000x1 1000x12 --label before
+    python benchmarks/run_suite.py --label after
+    python benchmarks/run_suite.py --compare benchmarks/results/before.json benchmarks/results/after.json
+
+A scale is `<users>x<months>`. Logs come from generate_logs.generate_logs_fast
+with a fixed seed and are cached under benchmarks/data/, so every run of a
+scale times exactly the same input. Each scale runs in a fresh process and
+times feature engineering (in-process and with parallel_daily_features),
+writing the feature store, IsolationForest training, batch scoring and the
+dashboard's data load + scoring. Results go to benchmarks/results/<label>.json. Everything runs offline on the CPU.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from access_policy import USER_ROLES_FILE
+from feature_engine import (FEATURE_COLUMNS, LOG_FILES, configure_access_policy, fused_daily_features, load_logs,
+                            parallel_daily_features)
+from pipeline_profiler import PipelineProfiler
+
+# --- Configuration ---
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SCALES = ['50x1', '50x12', '1000x1', '1000x12']  # add 10000x1 / 10000x12 for the large runs
+START_DATE = datetime(2025, 1, 1)
+SEED = 42
+# Same settings as train_model.py.
+MODEL_PARAMS = {'n_estimators': 100, 'contamination': 'auto', 'random_state': 42, 'n_jobs': -1}
+
+
+def parse_scale(scale):
+    users, months = scale.lower().split('x')
+    return int(users), int(months)
+
+
+def dataset_dir(scale):
+    return os.path.join(DATA_DIR, f"{scale}-seed{SEED}")
+
+
+def ensure_dataset(scale, workers=None):
+    """Generates the logs for a scale once; later runs reuse the cached files."""
+    from generate_logs import generate_logs_fast
+    import pandas as pd
+
+    out_dir = dataset_dir(scale)
+    marker = os.path.join(out_dir, 'COMPLETE')
+    if os.path.exists(marker):
+        return out_dir
+    users, months = parse_scale(scale)
+    end = START_DATE + pd.DateOffset(months=months) - pd.Timedelta(days=1)
+    print(f"Generating {scale} ({users} users, {START_DATE.date()} to {end.date()}) into {out_dir}...")
+    totals = generate_logs_fast(users, START_DATE, end.to_pydatetime(), out_dir, SEED, workers)
+    with open(marker, 'w') as f:
+        json.dump(totals, f)
+    return out_dir
+
+
+def _run_stages(data_dir, repeat, queue):
+    """Worker process: runs every stage `repeat` times and reports the stage records."""
+    import tempfile
+
+    import joblib
+    from sklearn.ensemble import IsolationForest
+
+    from feature_store import load_daily_features, write_features
+
+    log_files = {source: os.path.join(data_dir, name) for source, name in LOG_FILES.items()}
+    configure_access_policy(roles_path=os.path.join(data_dir, USER_ROLES_FILE))
+    runs = []
+    for _ in range(repeat):
+        profiler = PipelineProfiler('benchmark')
+        with tempfile.TemporaryDirectory() as workdir:
+            with profiler.stage('load_logs') as record:
+                frames = load_logs(log_files)
+                record['rows'] = sum(len(df) for df in frames.values())
+            with profiler.stage('feature_engineering', rows=record['rows']) as record:
+                daily_features = fused_daily_features(frames)
+                record['rows'] = len(daily_features)
+            del frames
+            with profiler.stage('parallel_features') as record:
+                record['rows'] = len(parallel_daily_features(log_files))
+            with profiler.stage('write_store', rows=len(daily_features)):
+                write_features(daily_features, root=workdir)
+
+            features = daily_features[FEATURE_COLUMNS]
+            model = IsolationForest(**MODEL_PARAMS)
+            with profiler.stage('train', rows=len(features)):
+                model.fit(features)
+            with profiler.stage('batch_score', rows=len(features)):
+                scores = model.decision_function(features)
+                flags = model.predict(features)
+            model_path = os.path.join(workdir, 'model.pkl')
+            joblib.dump(model, model_path)
+
+            # What dashboard.py does on a cold cache: load both, score, pick anomalies.
+            with profiler.stage('dashboard_load') as record:
+                data = load_daily_features(root=workdir)
+                loaded = joblib.load(model_path)
+                record['rows'] = len(data)
+            with profiler.stage('dashboard_score', rows=len(data)):
+                data['anomaly_score'] = loaded.decision_function(data[FEATURE_COLUMNS])
+                anomalies = data[data['anomaly_score'] < 0].sort_values(by='anomaly_score')
+        runs.append({
+            'stages': profiler.stages,
+            'anomalies': int((flags == -1).sum()),
+            'dashboard_anomalies': len(anomalies),
+            'mean_score': float(np.mean(scores)),
+        })
+    queue.put(runs)
+
+
+def run_scale(scale, repeat):
+    data_dir = ensure_dataset(scale)
+    with open(os.path.join(data_dir, 'COMPLETE')) as f:
+        events = json.load(f)
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_stages, args=(data_dir, repeat, queue))
+    process.start()
+    runs = queue.get()
+    process.join()
+
+    stages = {}
+    for run in runs:
+        for record in run['stages']:
+            stages.setdefault(record['stage'], []).append(record)
+    summary = {}
+    for name, records in stages.items():
+        walls = [r['wall_s'] for r in records]
+        summary[name] = {
+            'rows': records[0]['rows'],
+            'wall_s_min': min(walls),
+            'wall_s_median': float(np.median(walls)),
+            'cpu_s_median': float(np.median([r['cpu_s'] for r in records])),
+            'peak_rss_mb': max(r['peak_rss_mb'] for r in records),
+        }
+    users, months = parse_scale(scale)
+    return {
+        'users': users, 'months': months, 'events': events, 'repeat': repeat,
+        'anomalies': runs[0]['anomalies'], 'mean_score': runs[0]['mean_score'],
+        'stages': summary,
+    }
+
+
+def environment():
+    import pandas as pd
+    import sklearn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def print_results(results):
+    print(f"{'scale':<10} {'stage':<22} {'rows':>12} {'min s':>9} {'median s':>9} {'peak MB':>9}")
+    for scale, result in results['scales'].items():
+        for name, stage in result['stages'].items():
+            rows = '' if stage['rows'] is None else f"{stage['rows']:,}"
+            print(f"{scale:<10} {name:<22} {rows:>12} {stage['wall_s_min']:>9.3f} "
+                  f"{stage['wall_s_median']:>9.3f} {stage['peak_rss_mb']:>9.1f}")
+
+
+def compare(base_path, new_path):
+    """Prints median wall time per (scale, stage) for two result files and the ratio new/base."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"base: {base_path} ({base['environment']['commit']})\nnew:  {new_path} ({new['environment']['commit']})\n")
+    print(f"{'scale':<10} {'stage':<22} {'base s':>9} {'new s':>9} {'new/base':>9} {'base MB':>9} {'new MB':>9}")
+    for scale, result in new['scales'].items():
+        base_stages = base['scales'].get(scale, {}).get('stages', {})
+        for name, stage in result['stages'].items():
+            before = base_stages.get(name)
+            if before is None:
+                print(f"{scale:<10} {name:<22} {'-':>9} {stage['wall_s_median']:>9.3f}")
+                continue
+            ratio = stage['wall_s_median'] / before['wall_s_median'] if before['wall_s_median'] else float('nan')
+            print(f"{scale:<10} {name:<22} {before['wall_s_median']:>9.3f} {stage['wall_s_median']:>9.3f} "
+                  f"{ratio:>8.2f}x {before['peak_rss_mb']:>9.1f} {stage['peak_rss_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES, help="Datasets as <users>x<months>.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per scale; medians and minimums are reported.")
+    parser.add_argument('--label', default=None, help="Results file name (default: commit and timestamp).")
+    parser.add_argument('--generate-only', action='store_true', help="Build the cached datasets and stop.")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="Compare two result files and exit.")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    for scale in args.scales:
+        parse_scale(scale)
+        ensure_dataset(scale)
+    if args.generate_only:
+        return
+
+    results = {'created_at': datetime.now().isoformat(), 'environment': environment(), 'scales': {}}
+    for scale in args.scales:
+        print(f"Running {scale} x{args.repeat}...")
+        results['scales'][scale] = run_scale(scale, args.repeat)
+
+    label = args.label or f"{results['environment']['commit'] or 'nogit'}-{datetime.now():%Y%m%dT%H%M%S}"
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print()
+    print_results(results)
+    print(f"\nResults saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import json
+import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --- Array Layout ---
+# A fitted IsolationForest flattened into one set of node arrays shared by all
+# trees. Nodes are numbered breadth-first so the right child of every split
+# sits right after the left one, and one step of the walk is
+# `node = left[node] + (x > threshold[node])`. Leaves point at themselves
+# with an infinite threshold, so every row can take the same number of steps.
+# Each tree's features are already mapped back to column positions. Saved as
+# one .npy per array, the forest can be memory-mapped and shared by every
+# process that scores with it.
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'leaf_value', 'roots']
+META_FILE = 'forest.json'
+ROW_BLOCK = 512  # rows per block; keeps the (rows x trees) node matrix in cache
+# NumPy's take and comparisons release the GIL, so blocks can be walked on
+# threads; n_jobs=-1 uses one thread per core.
+N_JOBS = 1
+
+
+def average_path_length(n_samples):
+    """Expected path length of an unsuccessful BST search among n points, c(n)."""
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+
+def distinct_rows(X):
+    """(index of the first occurrence of each distinct row, each row's distinct-row number).
+
+    Columns are factorized one at a time and folded into a running row key,
+    so this is a few hash passes rather than a sort of whole rows.
+    """
+    key = np.zeros(len(X), dtype=np.int64)
+    distinct = 1
+    for column in X.T:
+        codes, uniques = pd.factorize(column)
+        key, keys = pd.factorize(key * len(uniques) + codes)
+        distinct = len(keys)
+        if distinct == len(X):
+            break  # already all distinct
+    first = np.empty(distinct, dtype=np.intp)
+    first[key[::-1]] = np.arange(len(key) - 1, -1, -1)
+    return first, key
+
+
+def _flatten_tree(tree, columns, offset):
+    """One tree's nodes in breadth-first order, renumbered from `offset`."""
+    left, right = tree.children_left, tree.children_right
+    order, depth = [0], [0]
+    for node, node_depth in zip(order, depth):  # the lists grow while they are walked
+        if left[node] != -1:
+            order += [left[node], right[node]]
+            depth += [node_depth + 1, node_depth + 1]
+    order, depth = np.array(order), np.array(depth)
+    new_id = np.empty(tree.node_count, dtype=np.int64)
+    new_id[order] = np.arange(len(order)) + offset
+    is_leaf = left[order] == -1
+    return {
+        'feature': np.where(is_leaf, 0, np.asarray(columns)[np.maximum(tree.feature[order], 0)]),
+        'threshold': np.where(is_leaf, np.inf, tree.threshold[order]),
+        'left': np.where(is_leaf, new_id[order], new_id[np.maximum(left[order], 0)]),
+        'leaf_value': np.where(is_leaf, depth + average_path_length(tree.n_node_samples[order]), 0.0),
+    }, int(depth.max())
+
+
+def export_forest(model):
+    """Flattens a fitted IsolationForest into (arrays, meta)."""
+    parts, roots = [], []
+    offset, max_depth = 0, 0
+    all_columns = np.arange(model.n_features_in_)
+    subsample = model._max_features != model.n_features_in_
+    for estimator, columns in zip(model.estimators_, model.estimators_features_):
+        part, depth = _flatten_tree(estimator.tree_, columns if subsample else all_columns, offset)
+        parts.append(part)
+        roots.append(offset)
+        offset += estimator.tree_.node_count
+        max_depth = max(max_depth, depth)
+    arrays = {
+        'feature': np.concatenate([p['feature'] for p in parts]).astype(np.int32),
+        'threshold': np.concatenate([p['threshold'] for p in parts]).astype(np.float64),
+        'left': np.concatenate([p['left'] for p in parts]).astype(np.int32),
+        'leaf_value': np.concatenate([p['leaf_value'] for p in parts]).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+    }
+    feature_names = getattr(model, 'feature_names_in_', None)
+    meta = {
+        'n_trees': len(model.estimators_),
+        'max_depth': max_depth,
+        'n_features': int(model.n_features_in_),
+        'feature_names': None if feature_names is None else [str(name) for name in feature_names],
+        'max_samples': int(model._max_samples),
+        'offset': float(model.offset_),
+    }
+    return arrays, meta
+
+
+class CompactForest:
+    """Scores with the flat node arrays of an IsolationForest.
+
+    Mirrors the IsolationForest scoring API (score_samples, decision_function,
+    predict) and returns the same scores, so it can stand in for the sklearn
+    model wherever only scoring is needed. Large batches are split into row
+    blocks walked on `n_jobs` threads; score_row scores a single row without
+    any batching overhead.
+    """
+
+    def __init__(self, arrays, meta, n_jobs=N_JOBS):
+        for name in ARRAY_NAMES:
+            # Plain ndarray views of memory-mapped files index faster than np.memmap.
+            setattr(self, name, np.asarray(arrays[name]))
+        self.meta = meta
+        self.n_jobs = n_jobs
+        self.offset_ = meta['offset']
+        self.n_features_in_ = meta['n_features']
+        if meta['feature_names'] is not None:
+            self.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+        # Index arrays as intp, so take() does not convert them on every step.
+        self._feature_ix, self._left_ix, self._roots_ix = (np.asarray(a, dtype=np.intp)
+                                                           for a in (self.feature, self.left, self.roots))
+        c = average_path_length([meta['max_samples']])[0]
+        self._denominator = meta['n_trees'] * c
+
+    @classmethod
+    def from_model(cls, model, n_jobs=N_JOBS):
+        return cls(*export_forest(model), n_jobs=n_jobs)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r', n_jobs=N_JOBS):
+        """Opens a saved forest; with mmap_mode='r' the arrays are paged in from the files and shared."""
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        return cls(arrays, meta, n_jobs=n_jobs)
+
+    def _matrix(self, X):
+        if isinstance(X, pd.DataFrame):
+            if self.meta['feature_names'] is not None:
+                X = X[self.meta['feature_names']]
+            X = X.to_numpy()
+        # The trees were grown on float32 inputs; cast the same way sklearn does.
+        return np.asarray(X, dtype=np.float32)
+
+    def _block_path_lengths(self, block):
+        """Summed path lengths of one contiguous (rows x features) block."""
+        rows, n_features = block.shape
+        flat = block.astype(np.float64).ravel()  # exact; saves casting every gathered value to compare
+        row_base = (np.arange(rows, dtype=np.intp) * n_features)[:, None]
+        node = np.repeat(self._roots_ix[None, :], rows, axis=0)
+        for _ in range(self.meta['max_depth']):
+            x = flat.take(row_base + self._feature_ix.take(node))
+            node = self._left_ix.take(node) + (x > self.threshold.take(node))
+        return self.leaf_value.take(node).sum(axis=1)
+
+    def path_lengths(self, X):
+        """Sum over trees of each row's isolation path length. Inputs must be finite.
+
+        Daily count vectors repeat heavily, so large batches walk each
+        distinct row once and broadcast the result back.
+        """
+        X = self._matrix(X)
+        if len(X) > ROW_BLOCK:
+            first, inverse = distinct_rows(X)
+            if len(first) < len(X):
+                return self._walk_blocks(X[first])[inverse]
+        return self._walk_blocks(X)
+
+    def _walk_blocks(self, X):
+        depths = np.zeros(len(X))
+
+        def walk_block(start):
+            depths[start:start + ROW_BLOCK] = self._block_path_lengths(np.ascontiguousarray(X[start:start + ROW_BLOCK]))
+
+        starts = range(0, len(X), ROW_BLOCK)
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs in (None, -1) else self.n_jobs
+        threads = min(len(starts), n_jobs)
+        if threads > 1:
+            with ThreadPoolExecutor(threads, thread_name_prefix='compact-forest') as pool:
+                list(pool.map(walk_block, starts))
+        else:
+            for start in starts:
+                walk_block(start)
+        return depths
+
+    def path_attributions(self, X):
+        """Per-feature share of each row's isolation, as a (rows x features) DataFrame.
+
+        Columns are the model's features in training order, whatever the
+        column order of X (X's own order for a model fitted without feature
+        names); a DataFrame X keeps its index.
+
+        Every split a row passes through on its way to a leaf credits the split
+        feature with 1 / (that tree's path length), averaged over trees: a
+        feature that isolates the row after a few splits earns a large share,
+        one that only appears deep inside long paths earns little. Rows are
+        walked in blocks exactly as in path_lengths.
+        """
+        index, columns = (X.index, list(X.columns)) if isinstance(X, pd.DataFrame) else (None, None)
+        if self.meta['feature_names'] is not None:
+            columns = list(self.meta['feature_names'])
+        X = self._matrix(X)
+        n_features = X.shape[1]
+        out = np.zeros((len(X), n_features))
+        for start in range(0, len(X), ROW_BLOCK):
+            block = np.ascontiguousarray(X[start:start + ROW_BLOCK]).ravel()
+            rows = len(block) // max(n_features, 1)
+            row_base = (np.arange(rows, dtype=np.int32) * n_features)[:, None]
+            node = np.repeat(self.roots[None, :], rows, axis=0)
+            visited = np.empty((self.meta['max_depth'],) + node.shape, dtype=np.int32)
+            for step in range(self.meta['max_depth']):
+                feature = self.feature.take(node)
+                threshold = self.threshold.take(node)
+                # Leaves loop onto themselves with an infinite threshold; they split nothing.
+                visited[step] = np.where(np.isinf(threshold), -1, feature)
+                node = self.left.take(node) + (block.take(row_base + feature) > threshold)
+            weight = 1.0 / np.maximum(self.leaf_value.take(node), 1.0)
+            split = visited >= 0
+            cells = (np.arange(rows)[:, None] * n_features + visited)[split]
+            weights = np.broadcast_to(weight, visited.shape)[split]
+            out[start:start + rows] = np.bincount(cells, weights, minlength=rows * n_features).reshape(rows, n_features)
+        return pd.DataFrame(out / max(self.meta['n_trees'], 1), index=index, columns=columns)
+
+    def _scores(self, depths):
+        if self._denominator == 0:
+            return -np.ones_like(depths)
+        return -(2.0 ** (-depths / self._denominator))
+
+    def score_samples(self, X):
+        return self._scores(self.path_lengths(X))
+
+    def score_row(self, x):
+        """decision_function of one row, a 1-D sequence or a {feature name: value} mapping.
+
+        Walks every tree at once for the single row, skipping the frame
+        conversion and block setup of a batch call; for live scoring.
+        """
+        if isinstance(x, Mapping):
+            x = [x[name] for name in self.meta['feature_names']]
+        x = np.asarray(x, dtype=np.float32).ravel()
+        node = self._roots_ix
+        for _ in range(self.meta['max_depth']):
+            node = self._left_ix.take(node) + (x.take(self._feature_ix.take(node)) > self.threshold.take(node))
+        return float(self._scores(self.leaf_value.take(node).sum())) - self.offset_
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
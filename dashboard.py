@@ -1,84 +1,247 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import joblib
+import hashlib
+import json
+import math
+import os
 from datetime import datetime
 
+from alert_store import ACTION_TAKEN, PAGE_SIZE, PENDING, AlertStore, expand_json
+from attack_enrichment import AttackRuleIndex, load_rules
+from anomaly_explainer import feature_contributions, top_features
+from compact_forest import CompactForest
+from feature_store import features_version, load_daily_features
+from model_registry import list_versions
+from model_registry import load_model as load_registered_model
+from pipeline_profiler import PROFILE_ENV, PipelineProfiler
+from response_dispatcher import ENDPOINTS_FILE, ResponseDispatcher, load_endpoints
+from rolling_features import rolling_version, with_rolling_features
+
+MODEL_FILE = 'insider_threat_model.pkl'
+
 # Use caching to load model and data only once for efficiency
+@st.cache_data
+def model_hash(path, mtime_ns, size):
+    """SHA-256 of the model file; re-hashed only when its size or mtime changes."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 @st.cache_resource
-def load_model():
-    """Loads the saved insider threat detection model."""
+def load_model(model_version, registry_version=None):
+    """Loads a registered model version (memory-mapped), else the saved pickle, as a CompactForest."""
+    if registry_version is not None:
+        return load_registered_model(registry_version, n_jobs=-1)
     try:
-        model = joblib.load('insider_threat_model.pkl')
+        # Flat node arrays score the same as the pickle, without sklearn's per-call overhead.
+        model = CompactForest.from_model(joblib.load(MODEL_FILE), n_jobs=-1)
         return model
     except FileNotFoundError:
-        st.error("Model file 'insider_threat_model.pkl' not found. Please run train_model.py first.")
+        st.error(f"Model file '{MODEL_FILE}' not found. Please run train_model.py first.")
         return None
 
-@st.cache_data
-def load_data():
-    """Loads the preprocessed user features dataset."""
+@st.cache_resource
+def open_alert_store():
+    """The shared SQLite alert store; alert status lives here rather than in the session."""
+    return AlertStore()
+
+def model_feature_columns(model, data):
+    return list(getattr(model, 'feature_names_in_', data.columns.drop(['username', 'date'])))
+
+def model_input_columns(model, feature_columns):
+    """Feature columns plus whatever the model routes rows on (username for a sharded model)."""
+    return feature_columns + list(getattr(model, 'routing_columns', []))
+
+def score_data(model, data, attack_index):
+    """Scores every user-day of the feature table.
+
+    is_anomaly is derived from the score (IsolationForest.predict is just
+    decision_function < 0), so the forest is walked once.
+    """
+    # Set INSIDER_PROFILE=1 before `streamlit run` to get a JSON stage report.
+    profiler = PipelineProfiler('dashboard', enabled=os.environ.get(PROFILE_ENV) == '1')
+    scored = data.copy()
+    feature_columns = model_feature_columns(model, scored)
+    if not set(feature_columns) <= set(scored.columns):
+        # Trained with train_model.py --rolling.
+        scored = with_rolling_features(scored)
+    features = scored[model_input_columns(model, feature_columns)]
+    with profiler.stage('decision_function', rows=len(features)):
+        scored['anomaly_score'] = model.decision_function(features)
+    with profiler.stage('index_results', rows=len(scored)):
+        scored['is_anomaly'] = np.where(scored['anomaly_score'] < 0, -1, 1)
+        scored['date'] = pd.to_datetime(scored['date'])
+        anomalies = scored[scored['is_anomaly'] == -1].sort_values(by='anomaly_score')
+    with profiler.stage('attack_enrichment', rows=len(anomalies)):
+        anomalies = attack_index.enrich(anomalies)
+    profiler.write()
+    return scored, feature_columns, anomalies
+
+def sync_alerts(model_version, data_version, model, attack_index):
+    """Scores the full feature table and writes its alerts to the store.
+
+    Runs once per (model, data) version across all sessions and processes;
+    afterwards the dashboard reads alerts from the store page by page.
+    """
     try:
-        data = pd.read_csv('daily_user_features.csv')
-        return data
+        data = load_daily_features()
     except FileNotFoundError:
         st.error("Data file 'daily_user_features.csv' not found. Please run preprocess_data.py first.")
         return None
+    scored, feature_columns, anomalies = score_data(model, data, attack_index)
+    # Feature contributions of every flagged user-day, in one batch.
+    input_columns = model_input_columns(model, feature_columns)
+    inliers = scored.loc[scored['is_anomaly'] == 1, input_columns]
+    contributions = feature_contributions(model, anomalies[input_columns], inliers)
+    anomalies['top_features'] = top_features(contributions)
+    return store.sync(model_version, data_version, anomalies, feature_columns, contributions)
+
+@st.cache_data
+def list_users(data_version):
+    return sorted(load_daily_features(columns=['username'])['username'].astype(str).unique())
+
+@st.cache_data
+def load_user_data(model_version, data_version, _model, username):
+    """One user's daily rows, scored; read from the feature store without loading other users."""
+    user_data = load_daily_features(users=[username])
+    user_data['username'] = user_data['username'].astype(str)
+    feature_columns = model_feature_columns(_model, user_data)
+    if not set(feature_columns) <= set(user_data.columns):
+        user_data = with_rolling_features(user_data)
+    user_data['anomaly_score'] = _model.decision_function(user_data[model_input_columns(_model, feature_columns)])
+    user_data['is_anomaly'] = np.where(user_data['anomaly_score'] < 0, -1, 1)
+    user_data['date'] = pd.to_datetime(user_data['date'])
+    return user_data
+
+@st.cache_resource
+def load_dispatcher(endpoints_version):
+    """One dispatcher, and so one pool of endpoint connections, per version of the mapping file."""
+    if endpoints_version is None:
+        return None
+    return ResponseDispatcher(load_endpoints(ENDPOINTS_FILE))
+
+def dispatch_locks(usernames):
+    """Sends LOCK_NOW to the users' endpoints and marks each delivered user's top alert as actioned."""
+    results = dispatcher.dispatch(usernames)
+    for result in results:
+        if result['outcome'] in ('locked', 'already_locked'):
+            top_alert = store.page(model_version, username=result['username'], page_size=1)
+            store.set_status(model_version, top_alert[['username', 'date']].itertuples(index=False), ACTION_TAKEN,
+                             analyst, f"LOCK_NOW {result['host']}:{result['port']} {result['outcome']}")
+    st.session_state.dispatch_results = results
+    return results
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Insider Threat Detection Dashboard", layout="wide")
 st.title("🚨 AI-Powered Insider Threat Detection Dashboard")
 
-# --- Initialize Session State ---
-# This is used to store information that persists between user interactions.
-if 'action_log' not in st.session_state:
-    st.session_state.action_log = {}
+# --- Alert Store ---
+# Alert status is shared by every analyst and survives restarts; actions are recorded under this name.
+store = open_alert_store()
+analyst = st.sidebar.text_input("Analyst", value=os.environ.get('USER', 'analyst'))
 
 # --- Load Model and Data ---
-model = load_model()
-data = load_data()
+registered = list_versions()
+if registered:
+    # Registry versions are immutable, so the version name is the cache key.
+    st.sidebar.header("Model")
+    model_meta = st.sidebar.selectbox("Model version", registered[::-1], format_func=lambda meta: meta['version'])
+    model_version = model_meta['version']
+    st.sidebar.caption(f"Trained {model_meta['created_at'][:16]} on {model_meta['training_data']['rows']:,} user-days "
+                       f"({model_meta['training_data']['start']} to {model_meta['training_data']['end']}).")
+    model = load_model(model_version, model_version)
+else:
+    if not os.path.exists(MODEL_FILE):
+        st.error(f"Model file '{MODEL_FILE}' not found. Please run train_model.py first.")
+        st.stop()
+    model_stat = os.stat(MODEL_FILE)
+    model_version = model_hash(MODEL_FILE, model_stat.st_mtime_ns, model_stat.st_size)
+    model = load_model(model_version)
+data_version = str((features_version(), rolling_version()))
 
-if model is None or data is None:
+if model is None:
     st.stop()
 
 # --- Apply Model to Data ---
-features = data.drop(columns=['username', 'date'])
-data['anomaly_score'] = model.decision_function(features)
-data['is_anomaly'] = model.predict(features)
-data['date'] = pd.to_datetime(data['date'])
-anomalies = data[data['is_anomaly'] == -1].sort_values(by='anomaly_score')
+# The full table is scored only when this model version has not seen this data yet.
+attack_index = AttackRuleIndex(load_rules())
+if store.synced_data_version(model_version) != data_version:
+    with st.spinner("Scoring all user-days for this model version..."):
+        if sync_alerts(model_version, data_version, model, attack_index) is None:
+            st.stop()
+endpoints_stat = os.stat(ENDPOINTS_FILE) if os.path.exists(ENDPOINTS_FILE) else None
+dispatcher = load_dispatcher(None if endpoints_stat is None else (endpoints_stat.st_size, endpoints_stat.st_mtime_ns))
 
 
 # --- Main Dashboard Display ---
 st.header("Anomalous Activity Alerts")
 st.info("This table lists all user activities flagged as potential threats. Lower scores are more anomalous.")
 
-# Add a status column to the anomalies dataframe
-anomalies['status'] = [st.session_state.action_log.get(idx, "Pending Review") for idx in anomalies.index]
-st.dataframe(anomalies[['username', 'date', 'anomaly_score', 'status'] + features.columns.tolist()])
+# One page of alerts at a time, straight from the store's indexes.
+status_counts = store.status_counts(model_version)
+filter_col, page_col = st.columns(2)
+status_filter = filter_col.selectbox("Alert status", ["All", PENDING, ACTION_TAKEN],
+                                     format_func=lambda s: f"{s} ({sum(status_counts.values()) if s == 'All' else status_counts.get(s, 0):,})")
+status = None if status_filter == "All" else status_filter
+total_alerts = store.count(model_version, status)
+pages = max(1, math.ceil(total_alerts / PAGE_SIZE))
+page = page_col.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) - 1
+page_alerts = store.page(model_version, status, page=page)
+alerts_table = pd.concat([
+    page_alerts[['username', 'date', 'anomaly_score', 'status', 'top_features', 'attack_techniques']],
+    expand_json(page_alerts, 'features'),
+], axis=1)
+st.dataframe(alerts_table)
+st.caption(f"Alerts {page * PAGE_SIZE + 1 if total_alerts else 0:,}-{min((page + 1) * PAGE_SIZE, total_alerts):,} "
+           f"of {total_alerts:,}.")
+
+# --- Bulk Response ---
+st.subheader("Endpoint Response")
+if dispatcher is None:
+    st.caption(f"Add '{ENDPOINTS_FILE}' (username,host,port) to lock flagged users' endpoints from here.")
+else:
+    users_to_lock = st.multiselect("Flagged users to lock", store.flagged_users(model_version))
+    if st.button("🔒 Send LOCK_NOW to selected users", disabled=not users_to_lock):
+        dispatch_locks(users_to_lock)
+        st.rerun()
+    if st.session_state.get('dispatch_results'):
+        st.caption("Last dispatch (per endpoint):")
+        st.dataframe(pd.DataFrame(st.session_state.dispatch_results)[
+            ['username', 'host', 'port', 'outcome', 'attempts', 'latency_ms', 'reply']])
 
 
 # --- Sidebar for User-Specific Analysis ---
 st.sidebar.header("User Behavior Deep Dive")
-all_users = data['username'].unique()
+all_users = list_users(data_version)
 selected_user = st.sidebar.selectbox("Select a User to Investigate", all_users)
 
 
 # --- Display Data for Selected User ---
 st.header(f"Behavioral Analysis for: {selected_user}")
-user_data = data[data['username'] == selected_user].set_index('date')
+user_data = load_user_data(model_version, data_version, model, selected_user).set_index('date')
 
 # --- NEW: Alerting and Response Section ---
 # Check if the selected user has any anomalies
-user_anomalies = anomalies[anomalies['username'] == selected_user]
+user_anomalies = store.page(model_version, username=selected_user, page_size=1)
 if not user_anomalies.empty:
     st.warning(f"⚠️ This user has been flagged for anomalous activity.")
     
     anomaly_to_action = user_anomalies.iloc[0] # Focus on their most severe anomaly
-    anomaly_index = anomaly_to_action.name
+    anomaly_date = pd.Timestamp(anomaly_to_action['date'])
+    anomaly_features = pd.Series(json.loads(anomaly_to_action['features']))
+
+    # Which features drove the score, relative to a typical user-day.
+    st.subheader(f"Why {anomaly_date.strftime('%Y-%m-%d')} was flagged")
+    st.caption(f"Top contributing features: {anomaly_to_action['top_features'] or 'none stand out'}")
+    if anomaly_to_action['contributions']:
+        st.bar_chart(pd.Series(json.loads(anomaly_to_action['contributions'])).sort_values(ascending=False))
+    if anomaly_to_action['attack_techniques']:
+        st.caption(f"MITRE ATT&CK: {attack_index.describe(anomaly_to_action['attack_techniques'])}")
 
     # Check if action has already been taken for this anomaly
-    if st.session_state.action_log.get(anomaly_index) == "Action Taken":
-        st.success(f"Action was already taken for this user on {anomaly_to_action['date'].strftime('%Y-%m-%d')}. Account is under review.")
+    if anomaly_to_action['status'] == ACTION_TAKEN:
+        st.success(f"Action was already taken for this user on {anomaly_date.strftime('%Y-%m-%d')}. Account is under review.")
     else:
         if st.button(f"🚨 Trigger Alert & Auto-Response for {selected_user}"):
             # 1. Simulate Alert (prints to terminal)
@@ -87,17 +250,32 @@ if not user_anomalies.empty:
             print(f"Timestamp: {datetime.now().isoformat()}")
             print(f"User: {selected_user}")
             print("Anomaly Details:")
-            print(anomaly_to_action[features.columns].to_string())
+            print(anomaly_features.to_string())
+            print(f"Top contributing features: {anomaly_to_action['top_features']}")
+            print(f"MITRE ATT&CK: {attack_index.describe(anomaly_to_action['attack_techniques'] or '') or 'none'}")
             print("="*50 + "\n")
 
-            # 2. Simulate Auto-Response (updates dashboard)
-            st.session_state.action_log[anomaly_index] = "Action Taken"
+            # 2. Auto-Response: lock the user's endpoints when a mapping exists (updates dashboard)
+            if dispatcher is not None:
+                for result in dispatch_locks([selected_user]):
+                    if result['outcome'] == 'unmapped':
+                        print(f"LOCK_NOW -> {selected_user} is unmapped: no endpoint in '{ENDPOINTS_FILE}'")
+                    else:
+                        print(f"LOCK_NOW -> {result['host']}:{result['port']} {result['outcome']} ({result['latency_ms']:.0f} ms)")
+            store.set_status(model_version, [(selected_user, anomaly_date)], ACTION_TAKEN, analyst,
+                             "Trigger Alert & Auto-Response")
             st.success("Action Taken: User account flagged for manual review. Alert sent to Security Team.")
             st.rerun() # Rerun the script to update the main anomalies table status
 
+    user_actions = store.actions(model_version, selected_user)
+    if not user_actions.empty:
+        st.caption("Action history")
+        user_actions['at'] = pd.to_datetime(user_actions['at'], unit='s')
+        st.dataframe(user_actions[['at', 'date', 'status', 'actor', 'detail']])
+
 # Display chart and full log
 st.subheader("Key Activity Timeline")
 features_to_plot = ['after_hours_login_count', 'unusual_dir_access_count', 'usb_connection_count', 'personal_emails_sent_count']
 st.line_chart(user_data[features_to_plot])
 st.subheader("Full Daily Activity Log")
-st.dataframe(user_data)
\ No newline at end of file
+st.dataframe(user_data)
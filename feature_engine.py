@@ -0,0 +1,399 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional: only speeds up recipient domain extraction
+    pa = pc = None
+
+from access_policy import ACCESS_POLICY_FILE, USER_ROLES_FILE, load_access_policy
+from log_schema import (day_numbers, days_to_timestamps, parse_timestamps, read_typed_log, read_typed_range,
+                        split_filepaths)
+from pipeline_profiler import NULL_PROFILER
+
+# --- Feature Definitions ---
+# Every engineered column in daily_user_features.csv, in output order.
+FEATURE_COLUMNS = [
+    'login_count', 'failed_login_count', 'after_hours_login_count',
+    'file_access_count', 'unusual_dir_access_count', 'file_write_count', 'critical_file_access_count',
+    'usb_connection_count', 'emails_sent_count', 'personal_emails_sent_count',
+    'large_attachments_sent_count'
+]
+
+LOG_FILES = {
+    'login': 'login_logs.csv',
+    'file': 'file_access_logs.csv',
+    'usb': 'usb_logs.csv',
+    'email': 'email_logs.csv',
+}
+
+# `date` is an int32 day number (see log_schema.day_numbers) until finalize_features.
+KEYS = ['username', 'date']
+
+# Logs larger than this are split into date ranges for --parallel mode.
+PARALLEL_SPLIT_BYTES = 64 * 2**20
+# How far past a split point to look for the next calendar day before
+# settling for the next line boundary.
+DAY_SEEK_BYTES = 16 * 2**20
+
+# --- Email Helpers ---
+# One domain per line; blank lines and '#' comments are ignored.
+PERSONAL_DOMAINS_FILE = 'personal_domains.txt'
+DEFAULT_PERSONAL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'protonmail.com']
+
+ATTACHMENT_UNITS_MB = {'KB': 1 / 1024, 'MB': 1.0, 'GB': 1024.0}
+ATTACHMENT_PATTERN = r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*(KB|MB|GB)\s*$'
+
+
+def load_personal_domains(path=PERSONAL_DOMAINS_FILE):
+    """Reads the free-mail provider list into a hashed set of lower-case domains."""
+    if not os.path.exists(path):
+        return frozenset(DEFAULT_PERSONAL_DOMAINS)
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip().lower() for line in f)
+        return frozenset(line for line in lines if line)
+
+
+PERSONAL_DOMAINS = load_personal_domains(os.path.join(os.path.dirname(os.path.abspath(__file__)), PERSONAL_DOMAINS_FILE))
+
+
+def configure_personal_domains(path):
+    """Replaces the personal-domain set, e.g. with a larger provider list."""
+    global PERSONAL_DOMAINS
+    PERSONAL_DOMAINS = load_personal_domains(path)
+    return PERSONAL_DOMAINS
+
+
+# --- File Access Helpers ---
+# unusual_dir_access_count counts accesses outside the user's role paths and
+# critical_file_access_count accesses to CRITICAL_FILES (see access_policy.py).
+# The policy ships next to this module; the user roles sit next to the logs.
+ACCESS_POLICY = load_access_policy(os.path.join(os.path.dirname(os.path.abspath(__file__)), ACCESS_POLICY_FILE))
+
+
+def configure_access_policy(policy_path=None, roles_path=USER_ROLES_FILE):
+    """Replaces the access policy, e.g. with a larger policy file or another roles file."""
+    global ACCESS_POLICY
+    if policy_path is None:
+        policy_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ACCESS_POLICY_FILE)
+    ACCESS_POLICY = load_access_policy(policy_path, roles_path)
+    return ACCESS_POLICY
+
+
+def attachment_size_mb(attachments):
+    """Vectorized attachment size in MB ('965KB', '25.6MB', '1.2GB'; else 0).
+
+    Sizes repeat heavily, so only the distinct strings are parsed and the
+    results are broadcast back through the factorized codes.
+    """
+    codes, uniques = pd.factorize(attachments)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.upper().str.extract(ATTACHMENT_PATTERN)
+    sizes = (pd.to_numeric(parts[0]) * parts[1].map(ATTACHMENT_UNITS_MB)).fillna(0).to_numpy(dtype=float)
+    return pd.Series(np.append(sizes, 0.0)[codes], index=attachments.index)
+
+
+def _domain(address):
+    _, at, domain = address.rpartition('@')
+    return domain.strip().rstrip('>').lower() if at else ''
+
+
+def _unique_domains(uniques):
+    """Domains of distinct addresses; Arrow string kernels when pyarrow is installed."""
+    if pc is None:
+        return np.array([_domain(str(address)) for address in uniques], dtype=object)
+    found = pc.extract_regex(pa.array(uniques, type=pa.string()), r'@(?P<domain>[^@]*)$').field('domain')
+    return pc.utf8_lower(pc.utf8_trim(found, characters=' >')).fill_null('').to_numpy(zero_copy_only=False)
+
+
+def recipient_domains(recipients):
+    """Exact, lower-cased domain after the last '@' of each recipient address."""
+    codes, uniques = pd.factorize(recipients)
+    domains = np.append(_unique_domains(uniques), '').astype(object)
+    return pd.Series(domains[codes], index=recipients.index)
+
+
+def is_personal_recipient(recipients, domains=None):
+    """True where the recipient's exact domain is in the personal-domain set.
+
+    Addresses repeat across emails, so each distinct address is split and
+    looked up once and the answers are broadcast back by factorized code.
+    """
+    domains = PERSONAL_DOMAINS if domains is None else domains
+    codes, uniques = pd.factorize(recipients)
+    found = _unique_domains(uniques)
+    if pc is None:
+        hits = np.fromiter((domain in domains for domain in found), dtype=bool, count=len(found))
+    else:
+        hits = pc.is_in(pa.array(found, type=pa.string()), value_set=pa.array(sorted(domains), type=pa.string()))
+        hits = hits.to_numpy(zero_copy_only=False).astype(bool)
+    return pd.Series(np.append(hits, False)[codes], index=recipients.index)
+
+
+# --- Per-Source Indicators ---
+# Each function turns a block of log rows into one 0/1 indicator column per
+# feature. Summing the indicators per (username, date) gives the daily counts,
+# so blocks can be processed independently and their totals simply added.
+# Blocks typed by log_schema.apply_schema are used as-is; raw CSV blocks are
+# parsed on the fly.
+
+def _timestamps(df):
+    timestamp = df['timestamp']
+    return timestamp if pd.api.types.is_datetime64_any_dtype(timestamp) else parse_timestamps(timestamp)
+
+
+def _days(df, timestamp=None):
+    if 'day' in df:
+        return df['day']
+    return day_numbers(_timestamps(df) if timestamp is None else timestamp)
+
+
+def login_indicators(df):
+    timestamp = _timestamps(df)
+    hour = timestamp.dt.hour
+    return pd.DataFrame({
+        'username': df['username'],
+        'date': _days(df, timestamp),
+        'login_count': (df['action'] == 'login').astype(int),
+        'failed_login_count': (df['success'] == False).fillna(False).astype(int),
+        'after_hours_login_count': ((hour < 8) | (hour > 19)).astype(int),
+    })
+
+
+def file_indicators(df):
+    # The typed file log carries the directory prefix and name of each path.
+    if 'filepath_prefix' in df:
+        directories, filenames = df['filepath_prefix'], df.get('filename')
+    else:
+        directories, filenames = split_filepaths(df['filepath'])
+    out_of_role, critical = ACCESS_POLICY.classify(df['username'], directories, filenames)
+    return pd.DataFrame({
+        'username': df['username'],
+        'date': _days(df),
+        'file_access_count': 1,
+        'unusual_dir_access_count': out_of_role.astype(int),
+        'file_write_count': (df['action'] == 'file_write').astype(int),
+        'critical_file_access_count': critical.astype(int),
+    })
+
+
+def usb_indicators(df):
+    return pd.DataFrame({
+        'username': df['username'],
+        'date': _days(df),
+        'usb_connection_count': (df['action'] == 'usb_connect').astype(int),
+    })
+
+
+def email_indicators(df):
+    attachment_mb = attachment_size_mb(df['attachment'])
+    return pd.DataFrame({
+        'username': df['username'],
+        'date': _days(df),
+        'emails_sent_count': 1,
+        'personal_emails_sent_count': is_personal_recipient(df['recipient']).astype(int),
+        'large_attachments_sent_count': (attachment_mb > 5).astype(int),
+    })
+
+
+INDICATORS = {
+    'login': login_indicators,
+    'file': file_indicators,
+    'usb': usb_indicators,
+    'email': email_indicators,
+}
+
+
+# --- Running Counters ---
+class DailyCounters:
+    """Running per-(username, date) sums of indicator columns.
+
+    Chunk totals are buffered and folded into the running base once the buffer
+    outgrows it, so memory tracks the number of user-days, not events.
+    """
+
+    def __init__(self, compact_rows=500_000):
+        self.compact_rows = compact_rows
+        self._base = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def add(self, indicators):
+        self.add_totals(indicators.groupby(KEYS, observed=True, sort=False).sum())
+
+    def add_totals(self, part):
+        """Adds counts already summed per (username, date), e.g. by a worker process."""
+        self._pending.append(part)
+        self._pending_rows += len(part)
+        base_rows = 0 if self._base is None else len(self._base)
+        if self._pending_rows > max(self.compact_rows, base_rows):
+            self._compact()
+
+    def _compact(self):
+        parts = self._pending if self._base is None else [self._base] + self._pending
+        if parts:
+            combined = pd.concat(parts).fillna(0)
+            self._base = combined.groupby(level=KEYS, observed=True, sort=False).sum()
+        self._pending = []
+        self._pending_rows = 0
+
+    def totals(self):
+        self._compact()
+        if self._base is None:
+            index = pd.MultiIndex.from_arrays([[], []], names=KEYS)
+            return pd.DataFrame(columns=FEATURE_COLUMNS, index=index)
+        return self._base
+
+
+def finalize_features(totals):
+    """Turns summed counters into the daily_user_features.csv layout.
+
+    Only user-days with at least one login action are kept, matching the
+    login-anchored left merges of the in-memory pipeline.
+    """
+    totals = totals.reindex(columns=FEATURE_COLUMNS, fill_value=0).fillna(0)
+    daily_features = totals.reset_index()
+    daily_features = daily_features[daily_features['login_count'] > 0]
+    daily_features = daily_features.sort_values(KEYS).reset_index(drop=True)
+    daily_features['date'] = days_to_timestamps(daily_features['date']).date
+    for col in FEATURE_COLUMNS:
+        daily_features[col] = daily_features[col].astype(int)
+    return daily_features[KEYS + FEATURE_COLUMNS]
+
+
+# --- Fused In-Memory Mode ---
+def load_logs(log_files=LOG_FILES, profiler=NULL_PROFILER):
+    """Reads every log fully into memory with its typed schema, keyed by source name."""
+    frames = {}
+    for source, path in log_files.items():
+        with profiler.stage(f'load:{source}') as record:
+            frames[source] = read_typed_log(source, path)
+            record['rows'] = len(frames[source])
+    return frames
+
+
+def username_dtype(frames):
+    """One shared categorical dtype so per-source indexes align on the join."""
+    usernames = set()
+    for df in frames.values():
+        column = df['username']
+        usernames.update(column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else column.dropna().unique())
+    return pd.CategoricalDtype(sorted(usernames))
+
+
+def aggregate_source(source, df, dtype=None, profiler=NULL_PROFILER):
+    """Computes every indicator column of one source in a single grouped pass."""
+    with profiler.stage(f'indicators:{source}', rows=len(df)):
+        indicators = INDICATORS[source](df)
+        if dtype is not None:
+            indicators['username'] = indicators['username'].astype(dtype)
+    with profiler.stage(f'groupby:{source}', rows=len(df)):
+        return indicators.groupby(KEYS, observed=True, sort=False).sum()
+
+
+def fused_daily_features(frames, profiler=NULL_PROFILER):
+    """Builds the daily feature table with one pass per source and one outer join."""
+    dtype = username_dtype(frames)
+    parts = [aggregate_source(source, df, dtype, profiler) for source, df in frames.items()]
+    with profiler.stage('join_and_finalize', rows=sum(len(part) for part in parts)):
+        return finalize_features(pd.concat(parts, axis=1, join='outer'))
+
+
+# --- Streaming Mode ---
+def stream_daily_features(log_files=LOG_FILES, chunksize=1_000_000, profiler=NULL_PROFILER):
+    """Builds the daily feature table by reading each log in bounded chunks."""
+    counters = DailyCounters()
+    for source, path in log_files.items():
+        print(f"Streaming {path} in chunks of {chunksize} rows...")
+        with profiler.stage(f'stream:{source}') as record:
+            record['rows'] = 0
+            for chunk in read_typed_log(source, path, chunksize=chunksize):
+                counters.add(INDICATORS[source](chunk))
+                record['rows'] += len(chunk)
+    with profiler.stage('finalize'):
+        return finalize_features(counters.totals())
+
+
+# --- Parallel Mode ---
+def _next_day_boundary(f, position, end):
+    """Offset of the first line at or after `position` whose date differs from the line before.
+
+    Lines start with the timestamp, so the first 10 bytes are the date. If no
+    day change is found within DAY_SEEK_BYTES, the next line boundary is used;
+    the split is then mid-day, which is still correct because partial
+    aggregates are summed.
+    """
+    f.seek(position)
+    f.readline()  # finish the line the split point landed in
+    boundary = f.tell()
+    previous_date = None
+    while boundary < end and boundary - position < DAY_SEEK_BYTES:
+        line = f.readline()
+        if not line:
+            break
+        if previous_date is not None and line[:10] != previous_date:
+            return boundary
+        previous_date = line[:10]
+        boundary += len(line)
+    f.seek(position)
+    f.readline()
+    return min(f.tell(), end)
+
+
+def split_log(path, split_bytes=PARALLEL_SPLIT_BYTES):
+    """Byte ranges covering every data line of a log, cut at calendar-day boundaries.
+
+    Logs are written in timestamp order, so each range is a contiguous run of
+    days. Small logs come back as a single range.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_end = len(f.readline())
+        parts = max(1, math.ceil((size - header_end) / split_bytes))
+        bounds = [header_end]
+        for i in range(1, parts):
+            target = header_end + (size - header_end) * i // parts
+            boundary = _next_day_boundary(f, max(target, bounds[-1]), size)
+            if bounds[-1] < boundary < size:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _aggregate_range(source, path, start, end, personal_domains, access_policy):
+    """Worker task: per-(username, date) indicator sums for one byte range of a log."""
+    global PERSONAL_DOMAINS, ACCESS_POLICY
+    # Workers started with spawn do not inherit --personal-domains / --access-policy.
+    PERSONAL_DOMAINS, ACCESS_POLICY = personal_domains, access_policy
+    df = read_typed_range(source, path, start, end)
+    indicators = INDICATORS[source](df)
+    indicators['username'] = indicators['username'].astype(str)
+    return indicators.groupby(KEYS, sort=False).sum(), len(df)
+
+
+def parallel_daily_features(log_files=LOG_FILES, workers=None, split_bytes=PARALLEL_SPLIT_BYTES,
+                            profiler=NULL_PROFILER):
+    """Builds the daily feature table with every source, and every date range of large sources, in its own worker.
+
+    Partial aggregates are added up in submission order and the result is
+    sorted by (username, date), so it does not depend on `workers` or on how
+    the logs were split.
+    """
+    tasks = [(source, path, start, end)
+             for source, path in log_files.items() for start, end in split_log(path, split_bytes)]
+    print(f"Extracting features from {len(tasks)} log ranges across {workers or os.cpu_count()} workers...")
+    counters = DailyCounters()
+    with profiler.stage('parallel_extract') as record:
+        record['rows'] = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_aggregate_range, *task, PERSONAL_DOMAINS, ACCESS_POLICY) for task in tasks]
+            for future in futures:
+                part, rows = future.result()
+                counters.add_totals(part)
+                record['rows'] += rows
+    with profiler.stage('combine_and_finalize'):
+        return finalize_features(counters.totals())
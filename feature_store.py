@@ -0,0 +1,239 @@
+import os
+import shutil
+
+import pandas as pd
+
+from feature_engine import FEATURE_COLUMNS, KEYS
+
+# --- Configuration ---
+FEATURES_CSV = 'daily_user_features.csv'
+STORE_DIR = 'feature_store'
+FEATURES_DATASET = 'daily_user_features'
+# Counters of the incremental mode, partitioned the same way as the features.
+STATE_DATASET = 'daily_feature_state'
+LOGS_DATASET = 'raw_logs'
+# Write buffering: without it every input batch slice becomes its own row group.
+ROWS_PER_GROUP = 1_000_000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("The columnar feature store needs pyarrow. Install it with 'pip install pyarrow'.")
+
+
+def _date_partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+
+def _to_table(df):
+    """Arrow table with a dictionary-encoded username and a date32 date."""
+    import pyarrow as pa
+    df = df.copy()
+    df['username'] = df['username'].astype('category')
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _dataset(path):
+    import pyarrow.dataset as ds
+    from pyarrow.fs import LocalFileSystem
+    # Memory-mapped reads: column chunks are paged in straight from the files.
+    return ds.dataset(path, format='parquet', partitioning=_date_partitioning(),
+                      filesystem=LocalFileSystem(use_mmap=True))
+
+
+def _date_filter(start=None, end=None, users=None, dates=None):
+    import pyarrow.dataset as ds
+    clauses = []
+    if dates is not None:
+        clauses.append(ds.field('date').isin(sorted(set(pd.to_datetime(pd.Series(list(dates))).dt.date))))
+    if start is not None:
+        clauses.append(ds.field('date') >= pd.Timestamp(start).date())
+    if end is not None:
+        clauses.append(ds.field('date') <= pd.Timestamp(end).date())
+    if users is not None:
+        clauses.append(ds.field('username').isin(list(users)))
+    expr = None
+    for clause in clauses:
+        expr = clause if expr is None else expr & clause
+    return expr
+
+
+def _write_partitions(df, path, dates=None):
+    """Writes `df` under `path` as Parquet partitioned by date.
+
+    With `dates`, only those partitions are replaced and the rest of the
+    dataset is left untouched; otherwise the whole dataset is rewritten.
+    """
+    import pyarrow.dataset as ds
+    if dates is not None:
+        dates = set(pd.to_datetime(pd.Series(list(dates))).dt.date)
+        df = df[pd.to_datetime(df['date']).dt.date.isin(dates)]
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+    if df.empty:
+        return
+    ds.write_dataset(_to_table(df), path, format='parquet',
+                     partitioning=_date_partitioning(),
+                     min_rows_per_group=ROWS_PER_GROUP, max_rows_per_group=ROWS_PER_GROUP,
+                     existing_data_behavior='delete_matching')
+
+
+# --- Engineered Features ---
+def write_features(daily_features, root=STORE_DIR, dates=None):
+    """Writes the feature table as Parquet partitioned by date.
+
+    Only the partitions for `dates` are replaced when given, which is how the
+    incremental mode upserts the days new events touched. Otherwise every
+    existing partition is rewritten.
+    """
+    _require_pyarrow()
+    _write_partitions(daily_features, os.path.join(root, FEATURES_DATASET), dates)
+
+
+def read_features(columns=None, start=None, end=None, users=None, root=STORE_DIR):
+    """Loads only the requested feature columns and date range from the store.
+
+    The identifier columns are always included. Rows come back in the same
+    (username, date) order as daily_user_features.csv.
+    """
+    _require_pyarrow()
+    columns = KEYS + [c for c in (columns or FEATURE_COLUMNS) if c not in KEYS]
+    dataset = _dataset(os.path.join(root, FEATURES_DATASET))
+    table = dataset.to_table(columns=columns, filter=_date_filter(start, end, users))
+    df = table.to_pandas(date_as_object=False)
+    # Partitions carry their own dictionaries; sort on the merged, ordered one.
+    df['username'] = df['username'].cat.set_categories(sorted(df['username'].cat.categories))
+    df['date'] = df['date'].astype('datetime64[ns]')
+    return df.sort_values(KEYS).reset_index(drop=True)
+
+
+def store_exists(root=STORE_DIR):
+    return os.path.isdir(os.path.join(root, FEATURES_DATASET))
+
+
+def _store_files(root=STORE_DIR):
+    paths = []
+    for dirpath, _, filenames in os.walk(os.path.join(root, FEATURES_DATASET)):
+        paths.extend(os.path.join(dirpath, name) for name in filenames)
+    return paths
+
+
+def store_is_current(root=STORE_DIR, csv_path=FEATURES_CSV):
+    """Whether the store, rather than the CSV, holds the latest features.
+
+    Default, --streaming and --parallel runs rewrite only the CSV and
+    incremental runs only the store, so whichever was written last wins.
+    """
+    if not store_exists(root):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    paths = _store_files(root)
+    return bool(paths) and max(os.stat(path).st_mtime_ns for path in paths) >= os.stat(csv_path).st_mtime_ns
+
+
+def features_version(root=STORE_DIR, csv_path=FEATURES_CSV):
+    """Cheap fingerprint of the feature data that changes whenever it is rewritten.
+
+    Built from file sizes and modification times, so callers can key caches
+    on it without reading the data.
+    """
+    if store_is_current(root, csv_path):
+        paths = _store_files(root)
+    elif os.path.exists(csv_path):
+        paths = [csv_path]
+    else:
+        return None
+    stats = [os.stat(path) for path in sorted(paths)]
+    return (len(stats), sum(st.st_size for st in stats), max(st.st_mtime_ns for st in stats))
+
+
+def load_daily_features(columns=None, start=None, end=None, users=None, root=STORE_DIR, csv_path=FEATURES_CSV):
+    """Reads features from whichever of the columnar store and the CSV export was written last.
+
+    Raises FileNotFoundError when neither exists.
+    """
+    if store_is_current(root, csv_path):
+        return read_features(columns, start, end, users, root)
+    usecols = None if columns is None else KEYS + [c for c in columns if c not in KEYS]
+    data = pd.read_csv(csv_path, usecols=usecols)
+    if start is not None or end is not None or users is not None:
+        dates = pd.to_datetime(data['date'])
+        mask = pd.Series(True, index=data.index)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates <= pd.Timestamp(end)
+        if users is not None:
+            mask &= data['username'].isin(list(users))
+        data = data[mask].reset_index(drop=True)
+    return data
+
+
+def export_csv(path=FEATURES_CSV, root=STORE_DIR):
+    """Writes the store back out in the daily_user_features.csv layout."""
+    daily_features = read_features(root=root)
+    daily_features['username'] = daily_features['username'].astype(str)
+    daily_features['date'] = daily_features['date'].dt.date
+    daily_features.to_csv(path, index=False)
+
+
+# --- Incremental State ---
+def state_exists(root=STORE_DIR):
+    return os.path.isdir(os.path.join(root, STATE_DATASET))
+
+
+def state_columns(root=STORE_DIR):
+    """Column names of the stored counters, read from the Parquet schema only."""
+    _require_pyarrow()
+    return _dataset(os.path.join(root, STATE_DATASET)).schema.names
+
+
+def write_state(state, root=STORE_DIR, dates=None):
+    """Writes the incremental counters, replacing only the partitions for `dates` when given."""
+    _require_pyarrow()
+    _write_partitions(state, os.path.join(root, STATE_DATASET), dates)
+
+
+def read_state(dates=None, root=STORE_DIR):
+    """Loads the incremental counters, only the partitions for `dates` when given."""
+    _require_pyarrow()
+    dataset = _dataset(os.path.join(root, STATE_DATASET))
+    df = dataset.to_table(filter=_date_filter(dates=dates)).to_pandas(date_as_object=False)
+    df['username'] = df['username'].astype(str)
+    df['date'] = df['date'].astype('datetime64[ns]')
+    return df
+
+
+# --- Raw Logs ---
+def write_log(source, path, root=STORE_DIR, chunksize=1_000_000):
+    """Converts one raw log CSV to Parquet partitioned by event date, chunk by chunk."""
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    target = os.path.join(root, LOGS_DATASET, source)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    for i, chunk in enumerate(pd.read_csv(path, chunksize=chunksize)):
+        timestamp = pd.to_datetime(chunk['timestamp'])
+        chunk['timestamp'] = timestamp
+        chunk['date'] = timestamp.dt.date
+        chunk['username'] = chunk['username'].astype('category')
+        ds.write_dataset(pa.Table.from_pandas(chunk, preserve_index=False), target, format='parquet',
+                         partitioning=_date_partitioning(),
+                         basename_template=f'chunk-{i:05d}-{{i}}.parquet',
+                         min_rows_per_group=ROWS_PER_GROUP, max_rows_per_group=ROWS_PER_GROUP,
+                         existing_data_behavior='overwrite_or_ignore')
+
+
+def read_log(source, columns=None, start=None, end=None, users=None, root=STORE_DIR):
+    """Loads a date range of one raw log from the store."""
+    _require_pyarrow()
+    dataset = _dataset(os.path.join(root, LOGS_DATASET, source))
+    table = dataset.to_table(columns=columns, filter=_date_filter(start, end, users))
+    return table.to_pandas(date_as_object=False)
@@ -1,8 +1,16 @@
+import argparse
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from faker import Faker
 from datetime import datetime, timedelta
 
+from access_policy import CRITICAL_FILES, ROLE_PATHS, USER_ROLES_FILE
+
 # Initialize Faker for generating realistic names
 fake = Faker()
 
@@ -67,12 +75,20 @@ def generate_login_logs(employees, start_date, end_date):
 # (Keep all the code from Part 1 above this)
 
 # --- Define File System Structure (for simulation) ---
-FILE_PATHS = {
-    'developer': ['/src/project-phoenix/', '/docs/api-specs/', '/tests/project-phoenix/'],
-    'senior_developer': ['/src/project-phoenix/', '/src/project-valhalla/', '/docs/api-specs/', '/design/database-schemas/'],
-    'sales': ['/sales/client-prospects/', '/marketing/campaigns/']
-}
-CRITICAL_FILES = ['/sales/client-prospects/q3_targets.csv', '/design/database-schemas/main_schema.sql']
+# Role paths and CRITICAL_FILES live in access_policy.py, which the feature
+# pipeline also uses to flag accesses outside a user's role.
+FILE_PATHS = ROLE_PATHS
+# Critical files sit in role folders; a file access in such a folder opens one
+# of them this often, so owners of those folders touch them in normal work.
+CRITICAL_ACCESS_RATE = 0.05
+CRITICAL_NAMES = {}
+for _path in CRITICAL_FILES:
+    _folder, _, _name = _path.rpartition('/')
+    CRITICAL_NAMES.setdefault(_folder + '/', []).append(_name)
+
+def write_user_roles(usernames, roles, path=USER_ROLES_FILE):
+    """Saves each employee's role for the role-aware file access features."""
+    pd.DataFrame({'username': usernames, 'role': roles}).to_csv(path, index=False)
 
 def generate_file_access_logs(employees, start_date, end_date):
     logs = []
@@ -88,6 +104,8 @@ def generate_file_access_logs(employees, start_date, end_date):
                     for _ in range(num_accesses):
                         folder = np.random.choice(FILE_PATHS[role])
                         filename = f"{fake.word()}.{np.random.choice(['py', 'md', 'txt', 'sql'])}"
+                        if folder in CRITICAL_NAMES and np.random.rand() < CRITICAL_ACCESS_RATE:
+                            filename = np.random.choice(CRITICAL_NAMES[folder])
                         access_time = current_date.replace(hour=np.random.randint(9, 18), minute=np.random.randint(0, 59))
                         logs.append({
                             'timestamp': access_time,
@@ -99,6 +117,20 @@ def generate_file_access_logs(employees, start_date, end_date):
         current_date += timedelta(days=1)
 
     # --- Inject Anomalies for the Insider (Alex Doe) ---
+    # Opens the critical files (sales targets, production schema) during each
+    # late-night session of the last week, ahead of the exfiltration below
+    anomaly_start_date = end_date - timedelta(days=7)
+    for day in range(5):
+        session_date = anomaly_start_date + timedelta(days=day)
+        if session_date.weekday() < 5:
+            for i, path in enumerate(CRITICAL_FILES):
+                logs.append({
+                    'timestamp': session_date.replace(hour=4, minute=50 + i*2),
+                    'username': INSIDER_USERNAME,
+                    'action': 'file_read',
+                    'filepath': path
+                })
+
     anomaly_date = end_date - timedelta(days=3)
     anomaly_time_base = anomaly_date.replace(hour=3, minute=15) # Correlate with late-night login
 
@@ -110,7 +142,7 @@ def generate_file_access_logs(employees, start_date, end_date):
             'action': 'file_read',
             'filepath': f"/sales/client-prospects/client_{i}.csv"
         })
-    
+
     # 2. Compressing source code into a single large file (simulated by a file_write)
     logs.append({
         'timestamp': anomaly_time_base + timedelta(minutes=30),
@@ -201,12 +233,254 @@ def generate_email_logs(employees, start_date, end_date):
     
     return pd.DataFrame(logs)
 
+# --- High-Throughput Mode (load testing) ---
+# Each calendar day is generated as a handful of NumPy batches instead of one
+# dict per event. Every day draws from its own RNG seeded by (seed, day), so the
+# output depends only on the seed, never on how days are split across workers.
+# Faker text is pre-sampled once into vocabularies and indexed per event.
+
+FAST_LOG_COLUMNS = {
+    'login': ['timestamp', 'username', 'action', 'success'],
+    'file': ['timestamp', 'username', 'action', 'filepath'],
+    'usb': ['timestamp', 'username', 'action', 'device_id'],
+    'email': ['timestamp', 'username', 'sender', 'recipient', 'subject', 'attachment'],
+}
+FAST_LOG_FILES = {
+    'login': 'login_logs.csv',
+    'file': 'file_access_logs.csv',
+    'usb': 'usb_logs.csv',
+    'email': 'email_logs.csv',
+}
+COMPANY_DOMAIN = "acme-corp.com"
+PARTNER_DOMAINS = ["partner-a.com", "consulting-b.org", "supplier-c.net"]
+FILE_EXTENSIONS = ['py', 'md', 'txt', 'sql']
+VOCABULARY_SIZE = 5000
+
+
+def build_fast_context(num_employees, start_date, end_date, seed):
+    """Employees and pre-sampled Faker vocabularies shared by every worker."""
+    faker = Faker()
+    faker.seed_instance(seed)
+    usernames, seen = [], set()
+    for _ in range(num_employees - 1):
+        username = faker.name().lower().replace(" ", ".")
+        candidate, suffix = username, 1
+        while candidate in seen or candidate == INSIDER_USERNAME:
+            suffix += 1
+            candidate = f"{username}{suffix}"
+        seen.add(candidate)
+        usernames.append(candidate)
+    usernames.append(INSIDER_USERNAME)
+    roles = ['developer'] * (num_employees - 1) + ['senior_developer']
+
+    role_names = list(FILE_PATHS)
+    folder_table = np.array([FILE_PATHS[r] + [''] * (max(map(len, FILE_PATHS.values())) - len(FILE_PATHS[r]))
+                             for r in role_names], dtype=object)
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'usernames': np.array(usernames, dtype=object),
+        'role_index': np.array([role_names.index(r) for r in roles]),
+        'folder_table': folder_table,
+        'folder_counts': np.array([len(FILE_PATHS[r]) for r in role_names]),
+        'words': np.array([faker.word() for _ in range(VOCABULARY_SIZE)], dtype=object),
+        'external_users': np.array([faker.user_name() for _ in range(VOCABULARY_SIZE)], dtype=object),
+        'subjects': np.array([faker.sentence(nb_words=4) for _ in range(VOCABULARY_SIZE)], dtype=object),
+        'attachment_sizes': np.array([f"{kb}KB" for kb in range(1024)], dtype=object),
+    }
+
+
+def _minutes(day, minutes):
+    return np.datetime64(day.date()) + minutes.astype('timedelta64[m]')
+
+
+def generate_day_batches(day, ctx, seed):
+    """All four logs for one calendar day, as DataFrames sorted by timestamp."""
+    rng = np.random.default_rng([seed, day.toordinal()])
+    usernames = ctx['usernames']
+    n = len(usernames)
+    batches = {source: [] for source in FAST_LOG_COLUMNS}
+    end_date = ctx['end_date']
+
+    if day.weekday() < 5:
+        # Logins: 90% of employees, 08:00-10:58, logout 8-9h later.
+        present = np.flatnonzero(rng.random(n) > 0.1)
+        login_at = rng.integers(8, 11, len(present)) * 60 + rng.integers(0, 59, len(present))
+        logout_at = login_at + rng.integers(8, 10, len(present)) * 60 + rng.integers(0, 59, len(present))
+        failed = np.flatnonzero(rng.random(n) > 0.95)
+        failed_at = rng.integers(0, 23, len(failed)) * 60 + rng.integers(0, 59, len(failed))
+        batches['login'].append(pd.DataFrame({
+            'timestamp': _minutes(day, np.concatenate([login_at, logout_at, failed_at])),
+            'username': usernames[np.concatenate([present, present, failed])],
+            'action': np.repeat(['login', 'logout', 'login'], [len(present), len(present), len(failed)]),
+            'success': np.repeat([True, True, False], [len(present), len(present), len(failed)]),
+        }))
+
+        # File reads: 70% of employees, 5-19 reads each inside their role's folders.
+        counts = np.where(rng.random(n) > 0.3, rng.integers(5, 20, n), 0)
+        who = np.repeat(np.arange(n), counts)
+        roles = ctx['role_index'][who]
+        folders = ctx['folder_table'][roles, rng.integers(0, ctx['folder_counts'][roles])]
+        names = ctx['words'][rng.integers(0, VOCABULARY_SIZE, len(who))]
+        extensions = np.array(FILE_EXTENSIONS, dtype=object)[rng.integers(0, len(FILE_EXTENSIONS), len(who))]
+        filepaths = folders + names + '.' + extensions
+        # Critical files get their own stream, so every other event is the same as without them.
+        critical_rng = np.random.default_rng([seed, day.toordinal(), 1])
+        opened = np.flatnonzero(np.isin(folders, list(CRITICAL_NAMES))
+                                & (critical_rng.random(len(who)) < CRITICAL_ACCESS_RATE))
+        filepaths[opened] = [folder + CRITICAL_NAMES[folder][critical_rng.integers(len(CRITICAL_NAMES[folder]))]
+                             for folder in folders[opened]]
+        batches['file'].append(pd.DataFrame({
+            'timestamp': _minutes(day, rng.integers(9, 18, len(who)) * 60 + rng.integers(0, 59, len(who))),
+            'username': usernames[who],
+            'action': 'file_read',
+            'filepath': filepaths,
+        }))
+
+        # Emails: 60% of employees send 1-9, 80% internal, 30% with a KB attachment.
+        counts = np.where(rng.random(n) > 0.4, rng.integers(1, 10, n), 0)
+        who = np.repeat(np.arange(n), counts)
+        m = len(who)
+        internal = rng.random(m) > 0.2
+        recipients = np.where(
+            internal,
+            usernames[rng.integers(0, n, m)] + f"@{COMPANY_DOMAIN}",
+            ctx['external_users'][rng.integers(0, VOCABULARY_SIZE, m)] + '@'
+            + np.array(PARTNER_DOMAINS, dtype=object)[rng.integers(0, len(PARTNER_DOMAINS), m)],
+        )
+        attachments = np.where(rng.random(m) > 0.7, ctx['attachment_sizes'][rng.integers(10, 1024, m)], None)
+        batches['email'].append(pd.DataFrame({
+            'timestamp': _minutes(day, rng.integers(9, 18, m) * 60 + rng.integers(0, 59, m)),
+            'username': usernames[who],
+            'sender': usernames[who] + f"@{COMPANY_DOMAIN}",
+            'recipient': recipients,
+            'subject': ctx['subjects'][rng.integers(0, VOCABULARY_SIZE, m)],
+            'attachment': attachments,
+        }))
+
+    # --- Inject Anomalies for the Insider (same scenario as the default mode) ---
+    anomaly_start_date = end_date - timedelta(days=7)
+    if anomaly_start_date <= day < anomaly_start_date + timedelta(days=5) and day.weekday() < 5:
+        login_time = day.replace(hour=int(rng.integers(2, 5)), minute=int(rng.integers(0, 59)))
+        logout_time = login_time + timedelta(hours=int(rng.integers(1, 3)))
+        batches['login'].append(pd.DataFrame({
+            'timestamp': [login_time, logout_time], 'username': INSIDER_USERNAME,
+            'action': ['login', 'logout'], 'success': True,
+        }))
+        batches['file'].append(pd.DataFrame({
+            'timestamp': [login_time + timedelta(minutes=10 + i * 2) for i in range(len(CRITICAL_FILES))],
+            'username': INSIDER_USERNAME, 'action': 'file_read', 'filepath': list(CRITICAL_FILES),
+        }))
+    if day.date() == (end_date - timedelta(days=3)).date():
+        base = day.replace(hour=3, minute=15)
+        batches['file'].append(pd.DataFrame({
+            'timestamp': [base + timedelta(minutes=i * 2) for i in range(10)] + [base + timedelta(minutes=30)],
+            'username': INSIDER_USERNAME,
+            'action': ['file_read'] * 10 + ['file_write'],
+            'filepath': [f"/sales/client-prospects/client_{i}.csv" for i in range(10)]
+                        + [f'/home/{INSIDER_USERNAME}/documents/all_source.zip'],
+        }))
+        usb_time = day.replace(hour=3, minute=45)
+        batches['usb'].append(pd.DataFrame({
+            'timestamp': [usb_time, usb_time + timedelta(minutes=int(rng.integers(15, 45)))],
+            'username': INSIDER_USERNAME,
+            'action': ['usb_connect', 'usb_disconnect'],
+            'device_id': 'Personal_USB_0A5B',
+        }))
+        batches['email'].append(pd.DataFrame({
+            'timestamp': [day.replace(hour=4, minute=30)], 'username': INSIDER_USERNAME,
+            'sender': f"{INSIDER_USERNAME}@{COMPANY_DOMAIN}", 'recipient': "alex.doe.private@gmail.com",
+            'subject': "Vacation Photos", 'attachment': "25.6MB",
+        }))
+
+    return {
+        source: pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable')
+        for source, frames in batches.items() if frames
+    }
+
+
+def _generate_shard(shard, days, ctx, seed, parts_dir):
+    """Worker task: generates a contiguous run of days into per-shard part files."""
+    counts = dict.fromkeys(FAST_LOG_COLUMNS, 0)
+    paths = {source: os.path.join(parts_dir, f"{source}-{shard:05d}.csv") for source in FAST_LOG_COLUMNS}
+    handles = {source: open(path, 'w', newline='') for source, path in paths.items()}
+    try:
+        for day in days:
+            for source, frame in generate_day_batches(day, ctx, seed).items():
+                frame.to_csv(handles[source], header=False, index=False,
+                             columns=FAST_LOG_COLUMNS[source], date_format='%Y-%m-%d %H:%M:%S')
+                counts[source] += len(frame)
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return counts
+
+
+def generate_logs_fast(num_employees, start_date, end_date, out_dir='.', seed=42, workers=None, days_per_shard=7):
+    """Generates all four logs with vectorized day batches across a process pool.
+
+    Days are sharded into contiguous ranges; each worker streams its shard to
+    part files, which are concatenated in order, so the outputs stay sorted
+    by timestamp and identical for a given seed regardless of `workers`.
+    """
+    ctx = build_fast_context(num_employees, start_date, end_date, seed)
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    shards = [days[i:i + days_per_shard] for i in range(0, len(days), days_per_shard)]
+    os.makedirs(out_dir, exist_ok=True)
+    parts_dir = tempfile.mkdtemp(prefix='.log-parts-', dir=out_dir)
+    totals = dict.fromkeys(FAST_LOG_COLUMNS, 0)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_generate_shard, i, shard, ctx, seed, parts_dir) for i, shard in enumerate(shards)]
+            for future in futures:
+                for source, count in future.result().items():
+                    totals[source] += count
+
+        for source, name in FAST_LOG_FILES.items():
+            with open(os.path.join(out_dir, name), 'w', newline='') as out:
+                out.write(','.join(FAST_LOG_COLUMNS[source]) + '\n')
+                for i in range(len(shards)):
+                    with open(os.path.join(parts_dir, f"{source}-{i:05d}.csv")) as part:
+                        shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    role_names = list(FILE_PATHS)
+    write_user_roles(ctx['usernames'], [role_names[i] for i in ctx['role_index']], os.path.join(out_dir, USER_ROLES_FILE))
+    return totals
+
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic login, file, USB and email logs.")
+    parser.add_argument('--fast', action='store_true',
+                        help="High-throughput mode: vectorized day batches sharded across a process pool.")
+    parser.add_argument('--employees', type=int, default=NUM_EMPLOYEES, help="Employees for --fast mode.")
+    parser.add_argument('--start', type=datetime.fromisoformat, default=START_DATE, help="First day, YYYY-MM-DD.")
+    parser.add_argument('--end', type=datetime.fromisoformat, default=END_DATE, help="Last day, YYYY-MM-DD.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for either mode; same seed, same logs (default: 42 with --fast, unseeded otherwise).")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for --fast mode (default: all cores).")
+    parser.add_argument('--out-dir', default='.', help="Output directory for --fast mode.")
+    args = parser.parse_args()
+
+    if args.fast:
+        print(f"Generating synthetic logs for {args.employees} employees, {args.start.date()} to {args.end.date()}...")
+        seed = 42 if args.seed is None else args.seed
+        totals = generate_logs_fast(args.employees, args.start, args.end, args.out_dir, seed, args.workers)
+        for source, name in FAST_LOG_FILES.items():
+            print(f"Generated {totals[source]} {source} records. Saved to {os.path.join(args.out_dir, name)}.")
+        print(f"Employee roles saved to {os.path.join(args.out_dir, USER_ROLES_FILE)}.")
+        exit()
+
+    if args.seed is not None:
+        np.random.seed(args.seed)
+        fake.seed_instance(args.seed)
     employees = generate_employees(NUM_EMPLOYEES)
     employee_usernames = [e['username'] for e in employees] # Make sure this is defined for the email function
 
     print("Generating synthetic logs...")
+    write_user_roles([e['username'] for e in employees], [e['role'] for e in employees])
+    print(f"Saved {len(employees)} employee roles to {USER_ROLES_FILE}.")
 
     # Generate Login Logs
     login_df = generate_login_logs(employees, START_DATE, END_DATE)
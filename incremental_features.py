@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from feature_engine import FEATURE_COLUMNS, INDICATORS, KEYS, LOG_FILES, DailyCounters, finalize_features
+from feature_store import STORE_DIR, read_state, state_columns, state_exists, store_exists, write_features, write_state
+from log_schema import apply_schema, days_to_timestamps, read_csv_kwargs, timestamps_to_days
+from pipeline_profiler import NULL_PROFILER
+
+# --- Configuration ---
+WATERMARK_FILE = 'feature_watermarks.json'
+# Counters for every user-day seen so far, including days without a login,
+# are kept in the feature store's daily_feature_state dataset, partitioned by
+# date like the login-anchored daily_user_features view of them.
+# Bytes hashed at the head of each log to detect files that were regenerated.
+HEAD_BYTES = 4096
+# Under the store root: the new counters of one run's dates plus its new
+# watermarks, renamed into place as the run's single commit point.
+JOURNAL_DIR = 'daily_feature_state.journal'
+
+
+def _parse_lines(header, lines, source=None):
+    if source is None:
+        return pd.read_csv(io.BytesIO(header + b''.join(lines)))
+    return apply_schema(source, pd.read_csv(io.BytesIO(header + b''.join(lines)), **read_csv_kwargs(source)))
+
+
+def read_log_range(path, start=0, end=None, chunksize=1_000_000, source=None):
+    """Yields (chunk, end_offset) for the complete CSV lines in [start, end).
+
+    Offsets are byte positions in the file, so a later run can seek straight
+    past rows it has already seen. A trailing line without a newline is still
+    being written and is left for the next run. With `source`, chunks are
+    typed with that log's schema.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        offset = max(start, f.tell())
+        f.seek(offset)
+        lines = []
+        for line in f:
+            if not line.endswith(b'\n') or (end is not None and offset >= end):
+                break
+            lines.append(line)
+            offset += len(line)
+            if len(lines) >= chunksize:
+                yield _parse_lines(header, lines, source), offset
+                lines = []
+        if lines:
+            yield _parse_lines(header, lines, source), offset
+
+
+def head_digest(path, length):
+    """Hash of the first `length` bytes, used to tell appends from rewrites."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+def load_watermarks(path=WATERMARK_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(watermarks, path=WATERMARK_FILE):
+    with open(path, 'w') as f:
+        json.dump(watermarks, f, indent=2)
+
+
+def watermark_is_valid(mark, path):
+    """A watermark still applies if the file has only been appended to since."""
+    if not mark or not os.path.exists(path):
+        return False
+    offset = mark['offset']
+    if os.path.getsize(path) < offset:
+        return False
+    return head_digest(path, offset) == mark['head_sha1']
+
+
+def state_is_current(root=STORE_DIR):
+    """False if there is no stored state, or it was written before a feature was added."""
+    if not state_exists(root) or not store_exists(root):
+        return False
+    return set(state_columns(root)) == set(KEYS + FEATURE_COLUMNS)
+
+
+def load_state(dates=None, root=STORE_DIR):
+    """Stored counters indexed by (username, day number), only for `dates` when given."""
+    state = read_state(dates, root)
+    state['date'] = timestamps_to_days(state['date'])
+    return state.set_index(KEYS)[FEATURE_COLUMNS]
+
+
+def save_state(state, root=STORE_DIR, dates=None):
+    state = state.astype(int).reset_index().sort_values(KEYS)
+    state['date'] = days_to_timestamps(state['date'])
+    write_state(state, root, dates)
+
+
+def _journal_path(root):
+    return os.path.join(root, JOURNAL_DIR)
+
+
+def write_journal(state, dates, watermarks, root=STORE_DIR):
+    """Commits a run: stages its counters and watermarks, then renames them into place at once."""
+    staging = _journal_path(root) + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    frame = state.astype(int).reset_index()
+    frame['username'] = frame['username'].astype(str)
+    frame['date'] = days_to_timestamps(frame['date'])
+    frame.to_parquet(os.path.join(staging, 'state.parquet'), index=False)
+    with open(os.path.join(staging, 'commit.json'), 'w') as f:
+        json.dump({'dates': None if dates is None else [str(d.date()) for d in dates],
+                   'watermarks': watermarks}, f, indent=2)
+    os.replace(staging, _journal_path(root))
+
+
+def apply_journal(state, dates, watermarks, root=STORE_DIR, watermark_path=WATERMARK_FILE, profiler=NULL_PROFILER):
+    """Writes committed counters, their features and the watermarks; returns the features.
+
+    The counters are absolute values for whole date partitions, so applying
+    the same journal twice leaves the same result.
+    """
+    with profiler.stage('write_state', rows=len(state)):
+        save_state(state, root, dates)
+    with profiler.stage('finalize', rows=len(state)):
+        daily_features = finalize_features(state)
+    with profiler.stage('write_store', rows=len(daily_features)):
+        write_features(daily_features, root, dates)
+    save_watermarks(watermarks, watermark_path)
+    shutil.rmtree(_journal_path(root))
+    return daily_features
+
+
+def replay_journal(root=STORE_DIR, watermark_path=WATERMARK_FILE):
+    """Finishes a run that died after its commit point; True if there was one."""
+    path = _journal_path(root)
+    if not os.path.isdir(path):
+        return False
+    state = pd.read_parquet(os.path.join(path, 'state.parquet'))
+    state['date'] = timestamps_to_days(state['date'])
+    with open(os.path.join(path, 'commit.json')) as f:
+        commit = json.load(f)
+    dates = None if commit['dates'] is None else pd.to_datetime(commit['dates'])
+    apply_journal(state.set_index(KEYS)[FEATURE_COLUMNS], dates, commit['watermarks'], root, watermark_path)
+    return True
+
+
+def incremental_daily_features(log_files=LOG_FILES, watermark_path=WATERMARK_FILE,
+                               root=STORE_DIR, chunksize=1_000_000, profiler=NULL_PROFILER):
+    """Folds only the log rows past each source's watermark into the stored counters.
+
+    Only the date partitions the new events touched are read back, updated and
+    rewritten, both in the counter state and in the feature store, so a run's
+    I/O scales with the new events rather than with the history. Returns the
+    refreshed feature rows of those dates and the (username, date) index of the
+    user-days the new events touched. If any log was truncated or regenerated
+    since the last run, the watermarks are discarded, every source is re-read
+    from the top and both datasets are rewritten in full.
+
+    The updated counters and the new watermarks are committed together
+    through a journal before any dataset is touched, so a run that dies
+    part-way either left nothing behind or is finished by the next run;
+    no event is ever counted twice.
+    """
+    if replay_journal(root, watermark_path):
+        print("Finished writing the update of an interrupted run.")
+    watermarks = load_watermarks(watermark_path)
+    rebuild = not state_is_current(root)
+    if rebuild or not all(watermark_is_valid(watermarks.get(s), p) for s, p in log_files.items()):
+        print("No valid watermarks found; rebuilding feature state from the full logs.")
+        watermarks, rebuild = {}, True
+
+    counters = DailyCounters()
+    for source, path in log_files.items():
+        mark = watermarks.get(source, {'offset': 0, 'timestamp': None})
+        offset, last_timestamp = mark['offset'], mark['timestamp']
+        new_rows = 0
+        with profiler.stage(f'tail:{source}') as record:
+            for chunk, offset in read_log_range(path, start=offset, chunksize=chunksize, source=source):
+                counters.add(INDICATORS[source](chunk))
+                new_rows += len(chunk)
+                last_timestamp = str(chunk['timestamp'].max())
+            record['rows'] = new_rows
+        print(f"{path}: {new_rows} new rows past watermark {mark['timestamp']}.")
+        watermarks[source] = {
+            'offset': offset,
+            'timestamp': last_timestamp,
+            'head_sha1': head_digest(path, offset),
+            'updated_at': datetime.now().isoformat(),
+        }
+
+    with profiler.stage('upsert_state') as record:
+        delta = counters.totals().reindex(columns=FEATURE_COLUMNS, fill_value=0).fillna(0)
+        dates = None if rebuild else days_to_timestamps(delta.index.get_level_values('date').unique())
+        if rebuild:
+            state = delta
+        else:
+            state = load_state(dates, root).add(delta, fill_value=0)
+        record['rows'] = len(delta)
+        os.makedirs(root, exist_ok=True)
+        write_journal(state, dates, watermarks, root)
+    return apply_journal(state, dates, watermarks, root, watermark_path, profiler), delta.index
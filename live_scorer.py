@@ -0,0 +1,219 @@
+import argparse
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+from compact_forest import CompactForest
+from feature_engine import FEATURE_COLUMNS, INDICATORS, LOG_FILES
+from log_schema import apply_schema, days_to_timestamps, read_csv_kwargs
+from model_registry import load_model
+
+# --- Configuration ---
+MODEL_FILE = 'insider_threat_model.pkl'
+ALERTS_FILE = 'live_alerts.jsonl'
+POLL_INTERVAL = 0.05  # seconds between tail reads
+MAX_READ_BYTES = 16 * 2**20  # cap per tail read so a large backlog is consumed in steps
+
+
+class LogTail:
+    """Follows one CSV log as it is appended to, like `tail -f`.
+
+    Each returned row carries `_offset`, the byte position just past its line,
+    so an alert can be traced back to the exact event that triggered it.
+    A file that was truncated or replaced (rotated) since the last read, seen
+    as a size below the saved offset or a new inode, is read again from the
+    top; `reopened` counts how often that happened.
+    """
+
+    def __init__(self, path, from_start=False, source=None):
+        self.path = path
+        self.source = source
+        self.header = None
+        self.inode = None
+        self.offset = None
+        self.reopened = 0
+        if not from_start and os.path.exists(self.path):
+            stat = os.stat(self.path)
+            self.inode, self.offset = stat.st_ino, stat.st_size
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if self.inode is not None and (stat.st_ino != self.inode or stat.st_size < (self.offset or 0)):
+                print(f"↻ '{self.path}' was truncated or replaced; reading it again from the start.")
+                self.header, self.offset = None, None
+                self.reopened += 1
+            self.inode = stat.st_ino
+            if self.header is None:
+                header = f.readline()
+                if not header.endswith(b'\n'):
+                    return None
+                self.header = header
+                if self.offset is None or self.offset < len(header):
+                    self.offset = len(header)
+            f.seek(self.offset)
+            data = f.read(MAX_READ_BYTES)
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return None
+        lines = data[:end].splitlines(keepends=True)
+        offsets, position = [], self.offset
+        for line in lines:
+            position += len(line)
+            offsets.append(position)
+        self.offset = position
+        if self.source is None:
+            chunk = pd.read_csv(io.BytesIO(self.header + data[:end]))
+        else:
+            chunk = apply_schema(self.source, pd.read_csv(io.BytesIO(self.header + data[:end]),
+                                                          **read_csv_kwargs(self.source)))
+        chunk['_offset'] = offsets
+        return chunk
+
+
+class LiveScorer:
+    """Keeps today's per-user feature vectors and re-scores only users that changed.
+
+    Vectors are the same daily counts as daily_user_features.csv, so the batch
+    IsolationForest applies unchanged. As in the batch table, a user-day is
+    only scored once it has at least one login. Events dated before the
+    current day arrive too late to change anything scored and are only
+    counted, in `late_events`.
+    """
+
+    def __init__(self, model, log_files=LOG_FILES, from_start=False):
+        self.model = model
+        # Models trained before a feature was added keep scoring the columns they were fit on.
+        self.feature_columns = list(getattr(model, 'feature_names_in_', FEATURE_COLUMNS))
+        # A sharded model also needs the username to pick each row's shard.
+        self.routing_columns = list(getattr(model, 'routing_columns', []))
+        self.tails = {source: LogTail(path, from_start, source) for source, path in log_files.items()}
+        self.current_date = None
+        self.vectors = pd.DataFrame(columns=FEATURE_COLUMNS, dtype='int64')
+        self.alerted = {}
+        self.events_seen = 0
+        self.late_events = 0
+
+    def _roll_over(self, date):
+        self.current_date = date
+        self.vectors = pd.DataFrame(columns=FEATURE_COLUMNS, dtype='int64')
+        self.alerted = {}
+
+    def poll(self):
+        """Reads every tail once and returns the alerts raised by the new events."""
+        read_at = time.time()
+        parts = []
+        for source, tail in self.tails.items():
+            chunk = tail.poll()
+            if chunk is None or chunk.empty:
+                continue
+            self.events_seen += len(chunk)
+            indicators = INDICATORS[source](chunk)
+            indicators['_source'] = source
+            indicators['_offset'] = chunk['_offset']
+            indicators['_timestamp'] = chunk['timestamp']
+            parts.append(indicators)
+        if not parts:
+            return []
+
+        events = pd.concat(parts, ignore_index=True)
+        events['username'] = events['username'].astype(str)
+        alerts = []
+        # Indicator dates are int day numbers, so days compare as plain integers.
+        for date, day_events in events.groupby('date', sort=True):
+            if self.current_date is not None and date < self.current_date:
+                self.late_events += len(day_events)  # that day has already rolled over
+                continue
+            if date != self.current_date:
+                self._roll_over(date)
+            alerts.extend(self._apply(day_events, read_at))
+        return alerts
+
+    def _apply(self, day_events, read_at):
+        delta = day_events.groupby('username')[[c for c in FEATURE_COLUMNS if c in day_events]].sum()
+        self.vectors = self.vectors.add(delta.reindex(columns=FEATURE_COLUMNS), fill_value=0)
+        changed = self.vectors.loc[delta.index]
+        changed = changed[changed['login_count'] > 0].fillna(0).astype('int64')
+        if changed.empty:
+            return []
+
+        vectors = changed[self.feature_columns]
+        if self.routing_columns:
+            vectors = vectors.assign(username=changed.index)[self.feature_columns + self.routing_columns]
+        if len(vectors) == 1 and hasattr(self.model, 'score_row'):
+            scores = [self.model.score_row(vectors.to_numpy()[0])]  # the common case: one user's event
+        else:
+            scores = self.model.decision_function(vectors)
+        detected_at = time.time()
+        # The triggering event is each user's latest by timestamp. Offsets only
+        # order events within one file, so they just break ties.
+        last_event = day_events.sort_values(['_timestamp', '_offset'], kind='stable').groupby('username').tail(1)
+        last_event = last_event.set_index('username')[['_source', '_offset']]
+
+        alerts = []
+        for username, score, row in zip(changed.index, scores, changed.itertuples(index=False)):
+            # Alert once per user-day, and again only if the score gets worse.
+            if score >= 0 or score >= self.alerted.get(username, 0):
+                continue
+            self.alerted[username] = score
+            alerts.append({
+                'detected_at': detected_at,
+                'processing_latency_ms': (detected_at - read_at) * 1000,
+                'username': username,
+                'date': days_to_timestamps([self.current_date])[0].strftime('%Y-%m-%d'),
+                'anomaly_score': float(score),
+                'features': dict(zip(FEATURE_COLUMNS, map(int, row))),
+                'source': last_event.at[username, '_source'],
+                'offset': int(last_event.at[username, '_offset']),
+            })
+        return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score live log tails with the trained insider threat model.")
+    parser.add_argument('--log-dir', default='.', help="Directory holding the four log CSVs.")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--model-version', help="Score with this registered model, e.g. a shard set (default: --model).")
+    parser.add_argument('--alerts', default=ALERTS_FILE, help="JSON-lines file alerts are appended to.")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Seconds between tail reads.")
+    parser.add_argument('--from-start', action='store_true', help="Replay existing log contents instead of only new lines.")
+    args = parser.parse_args()
+
+    try:
+        if args.model_version:
+            model = load_model(args.model_version)
+        else:
+            model = CompactForest.from_model(joblib.load(args.model))
+    except FileNotFoundError as e:
+        missing = f"'{e.filename}' not found" if e.filename else str(e).rstrip('.')
+        print(f"Error: {missing}. Please run train_model.py first.")
+        exit()
+
+    log_files = {source: os.path.join(args.log_dir, name) for source, name in LOG_FILES.items()}
+    scorer = LiveScorer(model, log_files, from_start=args.from_start)
+    print(f"🛰️  Live scorer watching {args.log_dir} every {args.interval * 1000:.0f} ms...")
+
+    with open(args.alerts, 'a') as alerts_file:
+        late_events = 0
+        while True:
+            for alert in scorer.poll():
+                print(f"🚨 {datetime.fromtimestamp(alert['detected_at']).isoformat()} "
+                      f"{alert['username']} ({alert['date']}) score={alert['anomaly_score']:.3f}")
+                alerts_file.write(json.dumps(alert) + '\n')
+                alerts_file.flush()
+            if scorer.late_events > late_events:
+                print(f"⚠️  Dropped {scorer.late_events - late_events} events dated before "
+                      f"{days_to_timestamps([scorer.current_date])[0].date()}, which has already rolled over.")
+                late_events = scorer.late_events
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
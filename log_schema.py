@@ -0,0 +1,144 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = 'pyarrow'
+except ImportError:  # optional: multithreaded CSV parsing for whole-file loads
+    _CSV_ENGINE = 'c'
+
+# --- Log Schemas ---
+# Column types for each raw log as it is read. Low-cardinality strings are
+# dictionary-encoded (pandas categoricals), so a multi-GB log holds one small
+# integer code per row instead of one Python string per row.
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+LOG_SCHEMAS = {
+    'login': {'timestamp': 'str', 'username': 'category', 'action': 'category', 'success': 'boolean'},
+    'file': {'timestamp': 'str', 'username': 'category', 'action': 'category', 'filepath': 'str'},
+    'usb': {'timestamp': 'str', 'username': 'category', 'action': 'category', 'device_id': 'category'},
+    'email': {'timestamp': 'str', 'username': 'category', 'sender': 'str', 'recipient': 'str',
+              'subject': 'str', 'attachment': 'category'},
+}
+
+# The columns the daily features are computed from; everything else is skipped at parse time.
+FEATURE_INPUTS = {
+    'login': ['timestamp', 'username', 'action', 'success'],
+    'file': ['timestamp', 'username', 'action', 'filepath'],
+    'usb': ['timestamp', 'username', 'action'],
+    'email': ['timestamp', 'username', 'recipient', 'attachment'],
+}
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def parse_timestamps(values):
+    """Parses log timestamps with the fixed log format, skipping per-value format inference.
+
+    Falls back to ISO 8601 parsing (fractional seconds, 'T' separator) if any
+    value does not match the fixed format.
+    """
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+    except ValueError:
+        return pd.to_datetime(values, format='ISO8601')
+
+
+def day_numbers(timestamps):
+    """Days since 1970-01-01 as int32: a compact, cheaply grouped calendar day key."""
+    days = np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[D]')
+    return pd.Series((days - _EPOCH).astype(np.int32), index=getattr(timestamps, 'index', None))
+
+
+def days_to_timestamps(days):
+    """Inverse of day_numbers: midnight timestamps for integer day numbers."""
+    return pd.to_datetime(np.asarray(days, dtype=np.int64), unit='D')
+
+
+def timestamps_to_days(dates):
+    """Day numbers of date-like values (dates, strings or timestamps)."""
+    return day_numbers(pd.to_datetime(pd.Series(dates)).to_numpy())
+
+
+def split_filepaths(filepaths):
+    """Directory part of each path (with the trailing '/') and file name, as two categoricals.
+
+    File names cannot contain '/', so any '/dir/' a path contains lies inside
+    its prefix; directory tests can run against the few distinct prefixes.
+    """
+    codes, uniques = pd.factorize(filepaths)
+    parts = [str(path).rpartition('/') for path in uniques]
+    split = []
+    for values in ([head + '/' for head, _, _ in parts], [name for _, _, name in parts]):
+        part_codes, part_uniques = pd.factorize(np.array(values, dtype=object))
+        part_codes = np.where(codes >= 0, part_codes[codes], -1)
+        split.append(pd.Series(pd.Categorical.from_codes(part_codes, pd.Index(part_uniques)), index=filepaths.index))
+    return tuple(split)
+
+
+def apply_schema(source, df):
+    """Types one raw log frame: parsed timestamp, int32 `day`, compact categoricals.
+
+    For the file log the full `filepath` is replaced by its categorical
+    `filepath_prefix` and `filename`, which is all the features need.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df['timestamp'] = parse_timestamps(df['timestamp'])
+    df['day'] = day_numbers(df['timestamp'])
+    if source == 'file' and 'filepath' in df:
+        df['filepath_prefix'], df['filename'] = split_filepaths(df['filepath'])
+        df = df.drop(columns='filepath')
+    return df
+
+
+def read_csv_kwargs(source, columns=None):
+    """read_csv arguments that apply the source's schema at parse time."""
+    columns = FEATURE_INPUTS[source] if columns is None else columns
+    schema = LOG_SCHEMAS[source]
+    return {'usecols': lambda name: name in columns,
+            'dtype': {name: dtype for name, dtype in schema.items() if name in columns}}
+
+
+def _read_typed(source, handle, header, columns=None):
+    kwargs = read_csv_kwargs(source, columns)
+    if _CSV_ENGINE == 'pyarrow':
+        usecols = [name for name in header if kwargs['usecols'](name)]
+        dtype = {name: dtype for name, dtype in kwargs['dtype'].items() if name != 'timestamp'}
+        return apply_schema(source, pd.read_csv(handle, usecols=usecols, dtype=dtype, engine='pyarrow'))
+    return apply_schema(source, pd.read_csv(handle, **kwargs))
+
+
+def _header(path):
+    with open(path, 'rb') as f:
+        return f.readline()
+
+
+def read_typed_log(source, path, columns=None, chunksize=None):
+    """Reads one log with its schema applied (a frame, or an iterator of frames with chunksize).
+
+    Whole-file reads use pyarrow's multithreaded CSV parser when it is
+    installed; it parses the fixed-format timestamps natively.
+    """
+    if chunksize is None:
+        return _read_typed(source, path, _header(path).decode().strip().split(','), columns)
+    kwargs = read_csv_kwargs(source, columns)
+    return (apply_schema(source, chunk) for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs))
+
+
+def read_typed_range(source, path, start, end, columns=None):
+    """Reads the complete lines in bytes [start, end) of a log, with its schema applied.
+
+    `start` and `end` must fall on line boundaries past the header.
+    """
+    header = _header(path)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _read_typed(source, io.BytesIO(header + data), header.decode().strip().split(','), columns)
+
+
+def memory_mb_per_million(df):
+    """Deep in-memory size of a frame, scaled to MB per million rows."""
+    return df.memory_usage(deep=True).sum() / 2**20 / max(len(df), 1) * 1_000_000
@@ -0,0 +1,262 @@
+"""Incremental refresh of the insider threat IsolationForest.
+
+train_model.py refits every tree on the whole feature history, so the
+nightly job grows with it. A refresh instead reads only the user-days of
+the recent window, finds the days that are new or whose rows changed since
+the last run (incremental preprocessing upserts late log lines into days it
+has already written), and folds just those into a fixed-size reservoir
+sample of the window. It then retires the oldest --replace trees and grows
+as many new ones on the reservoir. The ensemble is a sliding window over
+time: each tree was fit on the sample as it stood in the round it was born,
+and after n_estimators / --replace rounds every tree has been replaced. The
+model, the reservoir, a fingerprint of each sampled day and the round each
+tree was born in are kept in --state-dir between runs; the refreshed model
+is saved where train_model.py saves it and registered as a new version.
+
+    python model_refresh.py --replace 20 --reservoir 8192 --window-days 90
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from compact_forest import CompactForest
+from feature_store import load_daily_features
+from model_registry import REGISTRY_DIR, register_model
+from sweep_model import INSIDER_USERNAME, SCENARIO_END, insider_days
+
+# --- Configuration ---
+STATE_DIR = 'refresh_state'
+STATE_FILE = 'state.joblib'
+MODEL_FILE = 'insider_threat_model.pkl'
+# Same settings as train_model.py.
+MODEL_PARAMS = {'n_estimators': 100, 'contamination': 'auto', 'random_state': 42}
+RESERVOIR_SIZE = 8192  # user-days kept as the training sample
+WINDOW_DAYS = 90       # user-days older than this (before the newest date) leave the sample
+REPLACE_TREES = 20     # trees retired and grown per refresh
+TOLERANCE = 1e-12
+
+
+def reservoir_update(reservoir, seen, rows, capacity, rng):
+    """Algorithm R over `rows` in order; returns (reservoir, seen).
+
+    `seen` counts the rows offered to the reservoir so far. Free slots are
+    filled first; after that the i-th row offered replaces a random slot
+    with probability capacity / i. The draws are made for all rows at once
+    and a slot hit several times keeps the last row, as the sequential
+    algorithm would.
+    """
+    if len(reservoir) > capacity:  # the capacity was lowered since the last run
+        reservoir = reservoir.iloc[np.sort(rng.choice(len(reservoir), capacity, replace=False))]
+    take = min(capacity - len(reservoir), len(rows))
+    reservoir = pd.concat([reservoir, rows.iloc[:take]], ignore_index=True)
+    rest = rows.iloc[take:]
+    if len(rest):
+        position = seen + take + np.arange(1, len(rest) + 1)
+        slots = rng.integers(0, position)
+        hit = np.flatnonzero(slots < capacity)
+        # Last write wins: the first occurrence of each slot in the reversed hits.
+        slots, hit = slots[hit][::-1], hit[::-1]
+        slots, first = np.unique(slots, return_index=True)
+        source = np.arange(len(reservoir))
+        source[slots] = len(reservoir) + hit[first]
+        reservoir = pd.concat([reservoir, rest], ignore_index=True).iloc[source].reset_index(drop=True)
+    return reservoir, seen + len(rows)
+
+
+def load_state(directory=STATE_DIR):
+    """The saved refresh state, or None before the first run."""
+    path = os.path.join(directory, STATE_FILE)
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def save_state(state, directory=STATE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, STATE_FILE + '.tmp')
+    joblib.dump(state, staging)
+    os.replace(staging, os.path.join(directory, STATE_FILE))  # a crashed run leaves the previous state intact
+
+
+def _fit(reservoir, feature_columns, n_estimators, max_samples, params, seed):
+    model_params = {**params, 'n_estimators': n_estimators, 'random_state': seed}
+    return IsolationForest(**model_params, max_samples=max_samples, n_jobs=-1).fit(reservoir[feature_columns])
+
+
+def splice_trees(model, grown, retire):
+    """Drops the first `retire` trees of `model` and appends the trees of `grown`, in place.
+
+    Both forests must have been fit with the same max_samples and features,
+    so every tree's path lengths are normalised the same way.
+    """
+    if grown._max_samples != model._max_samples or list(grown.feature_names_in_) != list(model.feature_names_in_):
+        raise ValueError("grown trees were fit with a different sample size or feature set")
+    for attr in ('estimators_', 'estimators_features_', '_average_path_length_per_tree', '_decision_path_lengths'):
+        if hasattr(model, attr):
+            setattr(model, attr, list(getattr(model, attr))[retire:] + list(getattr(grown, attr)))
+    if hasattr(model, '_seeds'):
+        model._seeds = np.concatenate([model._seeds[retire:], grown._seeds])
+    model.n_estimators = len(model.estimators_)
+    return model
+
+
+def day_fingerprints(data):
+    """{'YYYY-MM-DD': fingerprint} of each day's rows, independent of row order."""
+    hashes = pd.util.hash_pandas_object(data.drop(columns='date'), index=False)
+    days = data['date'].dt.strftime('%Y-%m-%d')
+    sums = hashes.groupby(days.to_numpy()).sum()  # wraps around in uint64, which is fine for a fingerprint
+    counts = days.value_counts()
+    return {day: f"{counts[day]}:{int(value):016x}" for day, value in sums.items()}
+
+
+def refresh(data, state=None, reservoir_size=RESERVOIR_SIZE, window_days=WINDOW_DAYS, replace=REPLACE_TREES,
+            params=MODEL_PARAMS, seed=0):
+    """One refresh round; returns the new state, or None when no day in `data` changed.
+
+    `data` holds the user-days from the start of the state's window on (all
+    of them for the first run). Days that are new or whose rows differ from
+    the last run replace their earlier rows in the reservoir. Without a
+    state, or when the reservoir has shrunk below the forest's sample size,
+    the whole forest is fit on the reservoir instead.
+    """
+    feature_columns = [c for c in data.columns if c not in ('username', 'date')]
+    if state is not None and list(state['model'].feature_names_in_) != feature_columns:
+        print("Feature columns changed; rebuilding the model from scratch.")
+        state = None
+    data = data.assign(date=pd.to_datetime(data['date'])).sort_values('date', kind='stable')
+    if state is None:
+        state = {'round': 0, 'reservoir': data.iloc[:0], 'day_counts': {}, 'day_fingerprints': {}, 'model': None,
+                 'born': []}
+    round_number = state['round'] + 1
+    rng = np.random.default_rng([seed, round_number])
+
+    # --- Slide the window and sample the new and changed days ---
+    newest = max([data['date'].max(), *(pd.Timestamp(d) for d in state['day_counts'])])
+    cutoff = newest - pd.Timedelta(days=window_days - 1)
+    data = data[data['date'] >= cutoff]
+    fingerprints = day_fingerprints(data)
+    changed = sorted(day for day, fingerprint in fingerprints.items()
+                     if state.get('day_fingerprints', {}).get(day) != fingerprint)
+    if not changed and state['model'] is not None:
+        return None
+    # A changed day leaves the sample and is offered again as it is now.
+    keep = {day for day in state['day_counts'] if pd.Timestamp(day) >= cutoff and day not in changed}
+    reservoir = state['reservoir']
+    reservoir = reservoir[reservoir['date'].dt.strftime('%Y-%m-%d').isin(keep).to_numpy()].reset_index(drop=True)
+    day_counts = {day: state['day_counts'][day] for day in keep}
+    offered = data[data['date'].dt.strftime('%Y-%m-%d').isin(changed).to_numpy()]
+    seen = sum(day_counts.values())  # rows of the window offered so far
+    reservoir, _ = reservoir_update(reservoir, seen, offered, reservoir_size, rng)
+    for day in changed:
+        day_counts[day] = int(fingerprints[day].split(':')[0])
+
+    # --- Retire the oldest trees and grow new ones ---
+    model, born = state['model'], list(state['born'])
+    n_estimators = params['n_estimators']
+    started = time.perf_counter()
+    if model is None or len(reservoir) < model._max_samples:
+        model = _fit(reservoir, feature_columns, n_estimators, min(256, len(reservoir)), params, int(rng.integers(2**31)))
+        born, grown = [round_number] * n_estimators, n_estimators
+    else:
+        grown = min(replace, n_estimators)
+        new_trees = _fit(reservoir, feature_columns, grown, model._max_samples, params, int(rng.integers(2**31)))
+        splice_trees(model, new_trees, grown)
+        born = born[grown:] + [round_number] * grown
+        if params.get('contamination', 'auto') != 'auto':
+            model.offset_ = np.percentile(model.score_samples(reservoir[feature_columns]),
+                                          100.0 * params['contamination'])
+    fit_seconds = time.perf_counter() - started
+
+    return {'round': round_number, 'reservoir': reservoir, 'day_counts': day_counts, 'model': model, 'born': born,
+            'day_fingerprints': {day: fingerprints[day] for day in day_counts}, 'changed_days': changed,
+            'offered': len(offered), 'trees_grown': grown, 'fit_seconds': fit_seconds,
+            'window': [str(cutoff.date()), str(newest.date())], 'updated_at': datetime.now().isoformat()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replace', type=int, default=REPLACE_TREES, help="Trees retired and grown per refresh.")
+    parser.add_argument('--reservoir', type=int, default=RESERVOIR_SIZE, help="User-days in the training sample.")
+    parser.add_argument('--window-days', type=int, default=WINDOW_DAYS,
+                        help="Only user-days this recent (counted back from the newest date) are sampled.")
+    parser.add_argument('--seed', type=int, default=MODEL_PARAMS['random_state'])
+    parser.add_argument('--state-dir', default=STATE_DIR, help="Where the model, reservoir and tree ages are kept.")
+    parser.add_argument('--scenario-end', default=SCENARIO_END,
+                        help="Last day of the generated logs (generate_logs.py --end), for the insider check.")
+    parser.add_argument('--no-register', action='store_true', help=f"Do not add the model to '{REGISTRY_DIR}/'.")
+    args = parser.parse_args()
+
+    state = load_state(args.state_dir)
+    # Days before the last window cannot be in the next one; everything after is
+    # re-read, so rows upserted into already-sampled days are picked up too.
+    start = None if state is None else state['window'][0]
+    try:
+        data = load_daily_features(start=start)
+    except FileNotFoundError:
+        print("Error: 'daily_user_features.csv' not found. Please run preprocess_data.py first.")
+        exit()
+    if data.empty:
+        print("No user-days to sample; the model is unchanged.")
+        return
+
+    print(f"Checking {len(data)} user-days" + (f" from {start} on" if start else "") + " for new and changed days...")
+    refreshed = refresh(data, state, args.reservoir, args.window_days, args.replace, seed=args.seed)
+    if refreshed is None:
+        print(f"No user-days changed since round {state['round']}; the model is unchanged.")
+        return
+    state = refreshed
+    save_state(state, args.state_dir)
+    print(f"Sampled {state['offered']} user-days of {len(state['changed_days'])} new or changed days "
+          f"({state['changed_days'][0]} .. {state['changed_days'][-1]}).")
+    model = state['model']
+    print(f"Round {state['round']}: grew {state['trees_grown']} of {model.n_estimators} trees in "
+          f"{state['fit_seconds']:.2f}s on a {len(state['reservoir'])}-row reservoir of "
+          f"{state['window'][0]} .. {state['window'][1]}.")
+    print(f"Tree ages (refresh round born): {dict(sorted(pd.Series(state['born']).value_counts().items()))}")
+
+    # --- Score the new and changed user-days ---
+    window = data
+    data = data[pd.to_datetime(data['date']).dt.strftime('%Y-%m-%d').isin(state['changed_days']).to_numpy()].copy()
+    features = data[list(model.feature_names_in_)]
+    compact = CompactForest.from_model(model, n_jobs=-1)
+    data['anomaly_score'] = compact.decision_function(features)
+    diff = np.abs(data['anomaly_score'].to_numpy() - model.decision_function(features)).max()
+    if diff > TOLERANCE:
+        raise AssertionError(f"refreshed forest's flat arrays differ from sklearn by {diff}")
+    anomalies = data[data['anomaly_score'] < 0]
+    print(f"Anomalies among the new and changed user-days: {len(anomalies)}")
+
+    # --- Insider check, once the window holds every day of the planted scenario ---
+    scenario_end = pd.Timestamp(args.scenario_end)
+    first, last = (pd.Timestamp(day) for day in state['window'])
+    if first <= scenario_end - pd.Timedelta(days=7) and last >= scenario_end - pd.Timedelta(days=3):
+        scenario = window[insider_days(window, INSIDER_USERNAME, scenario_end)]
+        flagged = int((compact.decision_function(scenario[list(model.feature_names_in_)]) < 0).sum()) if len(scenario) else 0
+        if flagged:
+            print(f"\n✅ SUCCESS: {flagged} of {len(scenario)} insider days of '{INSIDER_USERNAME}' flagged by the "
+                  f"refreshed model.")
+        else:
+            print(f"\n⚠️ NOTE: Malicious activity for '{INSIDER_USERNAME}' was NOT flagged by the refreshed model.")
+    else:
+        print(f"\nInsider check skipped: the window {first.date()} .. {last.date()} does not hold the scenario days "
+              f"before {scenario_end.date()}.")
+
+    joblib.dump(model, MODEL_FILE)
+    print(f"\nRefreshed model saved to '{MODEL_FILE}'.")
+    if not args.no_register:
+        reservoir = state['reservoir']
+        metrics = {'refresh_round': state['round'], 'trees_grown': state['trees_grown'],
+                   'fit_seconds': round(state['fit_seconds'], 3), 'changed_days': len(state['changed_days']),
+                   'sampled_user_days': state['offered'], 'anomalies': len(anomalies)}
+        params = {**model.get_params(), 'refresh': {'reservoir': args.reservoir, 'window_days': args.window_days,
+                                                    'replace': args.replace}}
+        version = register_model(model, reservoir, model.feature_names_in_, metrics, params)
+        print(f"Registered as model version {version} in '{REGISTRY_DIR}/'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import joblib
+import pandas as pd
+import sklearn
+
+from compact_forest import CompactForest
+
+# --- Configuration ---
+REGISTRY_DIR = 'model_registry'
+LATEST_FILE = 'LATEST'
+METADATA_FILE = 'metadata.json'
+MODEL_FILE = 'model.joblib'  # the full sklearn estimator, for refits and sklearn-only tooling
+FOREST_DIR = 'forest'  # CompactForest arrays, memory-mapped at load time
+SHARDS_DIR = 'shards'  # a shard_models.py manifest and its shard forests
+SHARDED = 'sharded'  # metadata 'kind' of shard set versions; single forests have 'forest'
+
+
+def data_fingerprint(data, feature_columns):
+    """Content hash of the training rows, identical for identical (username, date, features) tables."""
+    columns = [c for c in ['username', 'date'] if c in data] + list(feature_columns)
+    frame = data[columns].copy()
+    if 'username' in frame:
+        frame['username'] = frame['username'].astype(str)
+    if 'date' in frame:
+        # One resolution whatever the source: dates parse to [s], CSV strings to [us], the store reads [ns].
+        frame['date'] = pd.to_datetime(frame['date']).astype('datetime64[ns]')
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def _version_dir(version, registry=REGISTRY_DIR):
+    return os.path.join(registry, version)
+
+
+def list_versions(registry=REGISTRY_DIR):
+    """Metadata of every registered model, oldest first."""
+    if not os.path.isdir(registry):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry)):
+        path = os.path.join(registry, name, METADATA_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+def latest_version(registry=REGISTRY_DIR):
+    path = os.path.join(registry, LATEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def resolve_version(version=None, registry=REGISTRY_DIR):
+    """Turns None or 'latest' into the latest version; raises FileNotFoundError if there is none."""
+    if version in (None, 'latest'):
+        version = latest_version(registry)
+    if version is None or not os.path.exists(os.path.join(_version_dir(version, registry), METADATA_FILE)):
+        raise FileNotFoundError(f"No model version '{version or 'latest'}' in '{registry}/'.")
+    return version
+
+
+def _stage_version(registry):
+    """Next free version name and an empty staging directory to build it in."""
+    os.makedirs(registry, exist_ok=True)
+    existing = [v['version'] for v in list_versions(registry)]
+    number = 1 + max((int(v[1:]) for v in existing if v[1:].isdigit()), default=0)
+    version = f"v{number:04d}"
+    staging = os.path.join(registry, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    return version, staging
+
+
+def _publish_version(version, staging, metadata, registry):
+    """Writes the metadata, moves the staged version into place and marks it latest."""
+    with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(staging, _version_dir(version, registry))
+
+    latest_tmp = os.path.join(registry, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(registry, LATEST_FILE))
+
+
+def _training_data(data, feature_columns):
+    dates = pd.to_datetime(data['date']) if 'date' in data else None
+    return {
+        'fingerprint': data_fingerprint(data, feature_columns),
+        'rows': len(data),
+        'users': int(data['username'].nunique()) if 'username' in data else None,
+        'start': None if dates is None else str(dates.min().date()),
+        'end': None if dates is None else str(dates.max().date()),
+    }
+
+
+def register_model(model, data, feature_columns, metrics=None, params=None, registry=REGISTRY_DIR):
+    """Stores a fitted IsolationForest as the next version and marks it latest; returns the version."""
+    version, staging = _stage_version(registry)
+    # Uncompressed so joblib.load(..., mmap_mode='r') can map its arrays.
+    joblib.dump(model, os.path.join(staging, MODEL_FILE))
+    CompactForest.from_model(model).save(os.path.join(staging, FOREST_DIR))
+    metadata = {
+        'version': version,
+        'kind': 'forest',
+        'created_at': datetime.now().isoformat(),
+        'feature_columns': list(feature_columns),
+        'params': params if params is not None else model.get_params(),
+        'training_data': _training_data(data, feature_columns),
+        'metrics': metrics or {},
+        'sklearn_version': sklearn.__version__,
+    }
+    _publish_version(version, staging, metadata, registry)
+    return version
+
+
+def register_shards(directory, data, metrics=None, registry=REGISTRY_DIR):
+    """Stores a shard_models.py shard set as the next version and marks it latest; returns the version.
+
+    The manifest and every shard forest are copied, so later shard_models.py
+    runs do not change a registered version.
+    """
+    from shard_models import load_manifest  # shard_models imports this module
+    version, staging = _stage_version(registry)
+    shutil.copytree(directory, os.path.join(staging, SHARDS_DIR))
+    manifest = load_manifest(os.path.join(staging, SHARDS_DIR))
+    metadata = {
+        'version': version,
+        'kind': SHARDED,
+        'created_at': datetime.now().isoformat(),
+        'feature_columns': manifest['feature_columns'],
+        'params': manifest['params'],
+        'group_by': manifest['group_by'],
+        'shards': {key: shard['rows'] for key, shard in manifest['shards'].items()},
+        'training_data': _training_data(data, manifest['feature_columns']),
+        'metrics': metrics or {},
+        'sklearn_version': sklearn.__version__,
+    }
+    _publish_version(version, staging, metadata, registry)
+    return version
+
+
+def load_metadata(version=None, registry=REGISTRY_DIR):
+    version = resolve_version(version, registry)
+    with open(os.path.join(_version_dir(version, registry), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def load_model(version=None, registry=REGISTRY_DIR, compact=True, n_jobs=1):
+    """Loads a registered model (the latest by default).
+
+    compact=True returns a CompactForest whose node arrays are memory-mapped,
+    so every process scoring with the same version shares one copy through
+    the page cache; it scores on `n_jobs` threads. compact=False returns the
+    sklearn estimator itself. A shard set version loads as a ShardedModel of
+    memory-mapped shard forests either way; it needs the model's
+    `routing_columns` next to the features when scoring.
+    """
+    metadata = load_metadata(version, registry)
+    path = _version_dir(metadata['version'], registry)
+    if metadata.get('kind') == SHARDED:
+        from shard_models import ShardedModel  # shard_models imports this module
+        return ShardedModel.load(os.path.join(path, SHARDS_DIR), n_jobs=n_jobs)
+    if compact:
+        return CompactForest.load(os.path.join(path, FOREST_DIR), n_jobs=n_jobs)
+    return joblib.load(os.path.join(path, MODEL_FILE), mmap_mode='r')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the model registry.")
+    parser.add_argument('version', nargs='?', help="Show one version in full (or 'latest').")
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    if args.version:
+        try:
+            print(json.dumps(load_metadata(args.version, args.registry), indent=2))
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+        return
+    versions = list_versions(args.registry)
+    if not versions:
+        print(f"No models registered in '{args.registry}/'. Run train_model.py first.")
+        return
+    latest = latest_version(args.registry)
+    print(f"{'version':<9} {'created':<20} {'rows':>8} {'features':>8} {'anomalies':>9}  data")
+    for meta in versions:
+        marker = '*' if meta['version'] == latest else ' '
+        data = meta['training_data']
+        sharded = f" ({len(meta['shards'])} {meta['group_by']} shards)" if meta.get('kind') == SHARDED else ''
+        print(f"{meta['version']:<8}{marker} {meta['created_at'][:19]:<20} {data['rows']:>8,} "
+              f"{len(meta['feature_columns']):>8} {meta['metrics'].get('anomalies', ''):>9}  "
+              f"{data['start']}..{data['end']} {data['fingerprint'][:12]}{sharded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import cProfile
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuration ---
+PROFILE_DIR = 'profiles'
+RSS_SAMPLE_INTERVAL = 0.005  # seconds between RSS samples while a stage runs
+PROFILE_ENV = 'INSIDER_PROFILE'  # set to 1 to profile the dashboard scoring step
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb():
+    """Resident set size right now, from /proc on Linux (else the lifetime peak)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2**20
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+class _RssSampler(threading.Thread):
+    """Background thread tracking the highest RSS seen while a stage runs."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_mb())
+        return self.peak
+
+
+class PipelineProfiler:
+    """Records wall time, CPU time, peak RSS and row counts per named stage.
+
+    Use `with profiler.stage('fit', rows=len(X)):` around each step, then
+    `profiler.write()` for a JSON report. A disabled profiler keeps the same
+    interface but records nothing, so call sites need no branching.
+    """
+
+    def __init__(self, run_name, enabled=True, cprofile_path=None):
+        self.run_name = run_name
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path
+        self.started_at = datetime.now()
+        self.stages = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._cprofile = None
+        if enabled and cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Times one stage. Set `record['rows']` inside the block if the count is only known later."""
+        record = {'stage': name, 'rows': rows}
+        if not self.enabled:
+            yield record
+            return
+        sampler = _RssSampler()
+        sampler.start()
+        rss_start = sampler.peak
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall, 6)
+            record['cpu_s'] = round(time.process_time() - cpu, 6)
+            record['peak_rss_mb'] = round(sampler.stop(), 2)
+            record['rss_start_mb'] = round(rss_start, 2)
+            record['rss_end_mb'] = round(current_rss_mb(), 2)
+            if record['rows'] and record['wall_s'] > 0:
+                record['rows_per_s'] = round(record['rows'] / record['wall_s'], 1)
+            self.stages.append(record)
+
+    def report(self):
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(),
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'total_wall_s': round(time.perf_counter() - self._wall_start, 6),
+            'total_cpu_s': round(time.process_time() - self._cpu_start, 6),
+            'peak_rss_mb': round(peak_rss_mb(), 2),
+            'stages': self.stages,
+        }
+
+    def write(self, path=None):
+        """Writes the JSON report (and the cProfile dump, if enabled); returns the report path."""
+        if not self.enabled:
+            return None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+        if path is None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{self.run_name}-{self.started_at:%Y%m%dT%H%M%S}.json")
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def summary(self):
+        lines = [f"{'stage':<28} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'rows':>12}"]
+        for record in self.stages:
+            rows = '' if record['rows'] is None else f"{record['rows']:,}"
+            lines.append(f"{record['stage']:<28} {record['wall_s']:>9.3f} {record['cpu_s']:>9.3f} "
+                         f"{record['peak_rss_mb']:>9.1f} {rows:>12}")
+        return '\n'.join(lines)
+
+
+NULL_PROFILER = PipelineProfiler('disabled', enabled=False)
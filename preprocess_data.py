@@ -1,148 +1,155 @@
-import pandas as pd
-import numpy as np
-
-print("Starting data preprocessing and feature engineering...")
-
-# --- 1. Load the Datasets ---
-try:
-    login_df = pd.read_csv('login_logs.csv')
-    file_df = pd.read_csv('file_access_logs.csv')
-    usb_df = pd.read_csv('usb_logs.csv')
-    email_df = pd.read_csv('email_logs.csv')
-    print("All log files loaded successfully.")
-except FileNotFoundError as e:
-    print(f"Error loading files: {e}. Make sure all log CSV files are in the same directory.")
-    exit()
-
-# --- 2. Convert Timestamps ---
-# Convert the 'timestamp' column in each dataframe to datetime objects
-login_df['timestamp'] = pd.to_datetime(login_df['timestamp'])
-file_df['timestamp'] = pd.to_datetime(file_df['timestamp'])
-usb_df['timestamp'] = pd.to_datetime(usb_df['timestamp'])
-email_df['timestamp'] = pd.to_datetime(email_df['timestamp'])
-print("Timestamp columns converted to datetime objects.")
-
-# --- 3. Feature Engineering from Login Data ---
-print("Engineering features from login data...")
-
-# Extract date from timestamp for daily aggregation
-login_df['date'] = login_df['timestamp'].dt.date
-
-# Feature 1: Count of logins per day
-daily_logins = login_df[login_df['action'] == 'login'].groupby(['username', 'date']).size().reset_index(name='login_count')
-
-# Feature 2: Count of failed logins per day
-failed_logins = login_df[login_df['success'] == False].groupby(['username', 'date']).size().reset_index(name='failed_login_count')
-
-# Feature 3: Count of after-hours logins (e.g., before 8 AM or after 7 PM)
-login_df['hour'] = login_df['timestamp'].dt.hour
-after_hours_logins = login_df[(login_df['hour'] < 8) | (login_df['hour'] > 19)].groupby(['username', 'date']).size().reset_index(name='after_hours_login_count')
-
-# --- 4. Merge Login Features ---
-# Start building our main feature dataframe
-daily_features = pd.merge(daily_logins, failed_logins, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, after_hours_logins, on=['username', 'date'], how='left')
-
-# Fill NaN values with 0 (for days with no failed or after-hours logins)
-daily_features = daily_features.fillna(0)
-
-# (Code from Part 1 should be above this)
-
-# --- 5. Feature Engineering from File Access Data ---
-print("Engineering features from file access data...")
-file_df['date'] = file_df['timestamp'].dt.date
-
-# Feature 4: Count of file accesses per day
-daily_file_access = file_df.groupby(['username', 'date']).size().reset_index(name='file_access_count')
-
-# Feature 5: Count of access to unusual directories (e.g., a developer in sales folder)
-# In our scenario, we'll hardcode this as access to the '/sales/' directory
-unusual_dir_access = file_df[file_df['filepath'].str.contains('/sales/', na=False)].groupby(['username', 'date']).size().reset_index(name='unusual_dir_access_count')
-
-# Feature 6: Count of file write actions (to detect the ZIP creation)
-file_writes = file_df[file_df['action'] == 'file_write'].groupby(['username', 'date']).size().reset_index(name='file_write_count')
-
-# --- 6. Feature Engineering from USB Data ---
-print("Engineering features from USB data...")
-
-# (Code from previous parts should be above this)
-
-# --- 8. Feature Engineering from Email Data ---
-print("Engineering features from email data...")
-email_df['date'] = email_df['timestamp'].dt.date
-
-# Helper function to parse attachment size
-def parse_attachment_size_mb(size):
-    if pd.isna(size):
-        return 0
-    size = str(size).upper()
-    if 'MB' in size:
-        return float(size.replace('MB', ''))
-    elif 'KB' in size:
-        return float(size.replace('KB', '')) / 1024
+import argparse
+
+from access_policy import USER_ROLES_FILE
+from feature_engine import (LOG_FILES, PARALLEL_SPLIT_BYTES, configure_access_policy, configure_personal_domains,
+                            fused_daily_features, load_logs, parallel_daily_features, stream_daily_features)
+from feature_store import LOGS_DATASET, STORE_DIR, export_csv, load_daily_features, write_features, write_log
+from incremental_features import incremental_daily_features
+from pipeline_profiler import NULL_PROFILER, PipelineProfiler
+from rolling_features import ROLLING_FILE, build_rolling_features
+
+
+def build_daily_features(profiler=NULL_PROFILER):
+    """Loads every log fully and aggregates it with the fused engine."""
+    # --- 1. Load the Datasets ---
+    try:
+        frames = load_logs(profiler=profiler)
+        print("All log files loaded successfully.")
+    except FileNotFoundError as e:
+        print(f"Error loading files: {e}. Make sure all log CSV files are in the same directory.")
+        exit()
+
+    # --- 2. Engineer and Join All Features ---
+    # One vectorized pass per source computes every indicator column at once;
+    # the per-source totals are then outer-joined on the (username, date) index.
+    print("Engineering features from login, file access, USB and email data...")
+    return fused_daily_features(frames, profiler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engineer daily per-user features from the raw logs.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Read each log in bounded-size chunks instead of loading it fully.")
+    parser.add_argument('--chunksize', type=int, default=1_000_000,
+                        help="Rows per chunk in streaming/incremental mode (default: 1,000,000).")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Extract each source, and each date range of large sources, in its own worker process.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --parallel (default: all cores).")
+    parser.add_argument('--split-mb', type=int, default=PARALLEL_SPLIT_BYTES // 2**20,
+                        help="With --parallel, split logs larger than this many MB into date ranges (default: 64).")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Only read log rows past the stored watermarks and rewrite the dates they touch in "
+                             f"'{STORE_DIR}/'; daily_user_features.csv is only rewritten with --export-csv.")
+    parser.add_argument('--export-csv', action='store_true',
+                        help="With --incremental, also write the whole store back out to daily_user_features.csv.")
+    parser.add_argument('--parquet', action='store_true',
+                        help=f"Also write the features to the date-partitioned Parquet store in '{STORE_DIR}/'.")
+    parser.add_argument('--convert-logs', action='store_true',
+                        help="Also convert the raw log CSVs into the Parquet store.")
+    parser.add_argument('--rolling', action='store_true',
+                        help=f"Also write per-user 7/30-day baselines and 15/60-minute burst peaks to '{ROLLING_FILE}'.")
+    parser.add_argument('--personal-domains', metavar='FILE',
+                        help="Free-mail provider list (one domain per line) instead of personal_domains.txt.")
+    parser.add_argument('--access-policy', metavar='FILE',
+                        help="JSON file of role path prefixes and critical files instead of the built-in policy.")
+    parser.add_argument('--user-roles', metavar='FILE', default=USER_ROLES_FILE,
+                        help=f"CSV of username,role for the out-of-role file access count (default: {USER_ROLES_FILE}).")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage wall/CPU time, peak RSS and rows to a JSON report in profiles/.")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="Also dump cProfile stats for the whole run to FILE; implies --profile.")
+    args = parser.parse_args()
+
+    profiler = PipelineProfiler('preprocess', enabled=args.profile or bool(args.cprofile),
+                               cprofile_path=args.cprofile)
+    if args.personal_domains:
+        domains = configure_personal_domains(args.personal_domains)
+        print(f"Loaded {len(domains)} personal email domains from '{args.personal_domains}'.")
+    if args.access_policy or args.user_roles != USER_ROLES_FILE:
+        policy = configure_access_policy(args.access_policy, args.user_roles)
+        print(f"Loaded an access policy for {len(policy.roles)} roles and {len(policy.user_roles)} users.")
+
+    print("Starting data preprocessing and feature engineering...")
+
+    if args.incremental:
+        try:
+            daily_features, touched = incremental_daily_features(chunksize=args.chunksize, profiler=profiler)
+        except FileNotFoundError as e:
+            print(f"Error loading files: {e}. Make sure all log CSV files are in the same directory.")
+            exit()
+        print(f"Upserted {len(touched)} user-day rows touched by new events "
+              f"({touched.get_level_values('date').nunique()} date partitions rewritten in '{STORE_DIR}/').")
+    elif args.parallel:
+        try:
+            daily_features = parallel_daily_features(workers=args.workers, split_bytes=args.split_mb * 2**20,
+                                                     profiler=profiler)
+        except FileNotFoundError as e:
+            print(f"Error loading files: {e}. Make sure all log CSV files are in the same directory.")
+            exit()
+    elif args.streaming:
+        try:
+            daily_features = stream_daily_features(chunksize=args.chunksize, profiler=profiler)
+        except FileNotFoundError as e:
+            print(f"Error loading files: {e}. Make sure all log CSV files are in the same directory.")
+            exit()
     else:
-        return 0
-
-email_df['attachment_mb'] = email_df['attachment'].apply(parse_attachment_size_mb)
-
-# Feature 8: Count of emails sent per day
-emails_sent = email_df.groupby(['username', 'date']).size().reset_index(name='emails_sent_count')
-
-# Feature 9: Count of emails to personal domains (a strong indicator)
-personal_domains = ['gmail.com', 'yahoo.com', 'outlook.com', 'protonmail.com']
-personal_emails = email_df[email_df['recipient'].str.contains('|'.join(personal_domains), na=False)]
-personal_emails_sent = personal_emails.groupby(['username', 'date']).size().reset_index(name='personal_emails_sent_count')
-
-# Feature 10: Count of emails with large attachments (e.g., > 5 MB)
-large_attachment_emails = email_df[email_df['attachment_mb'] > 5]
-large_attachments_sent = large_attachment_emails.groupby(['username', 'date']).size().reset_index(name='large_attachments_sent_count')
-usb_df['date'] = usb_df['timestamp'].dt.date
-
-# Feature 7: Count of USB connections per day (a very strong indicator)
-usb_connections = usb_df[usb_df['action'] == 'usb_connect'].groupby(['username', 'date']).size().reset_index(name='usb_connection_count')
-
-# (This replaces the old section 7 and the final "Save and Display" section)
-
-# --- 9. Merge All Features into Final Dataset ---
-print("Merging all engineered features...")
-# Merge File and USB features
-daily_features = pd.merge(daily_features, daily_file_access, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, unusual_dir_access, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, file_writes, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, usb_connections, on=['username', 'date'], how='left')
-
-# Merge Email features
-daily_features = pd.merge(daily_features, emails_sent, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, personal_emails_sent, on=['username', 'date'], how='left')
-daily_features = pd.merge(daily_features, large_attachments_sent, on=['username', 'date'], how='left')
-
-
-# Fill all NaN values that resulted from left merges with 0
-daily_features = daily_features.fillna(0)
-
-# Convert all feature columns to integer types for cleanliness
-feature_columns = [
-    'login_count', 'failed_login_count', 'after_hours_login_count', 
-    'file_access_count', 'unusual_dir_access_count', 'file_write_count', 
-    'usb_connection_count', 'emails_sent_count', 'personal_emails_sent_count', 
-    'large_attachments_sent_count'
-]
-for col in feature_columns:
-    daily_features[col] = daily_features[col].astype(int)
-
-# --- 10. Save Final Dataset ---
-daily_features.to_csv('daily_user_features.csv', index=False)
-
-print("\n--- Preprocessing and Feature Engineering Complete ---")
-print("Final dataset saved to 'daily_user_features.csv'")
-print(f"The dataset contains {len(daily_features)} records and {len(daily_features.columns)} columns.")
-
-print("\nFull anomalous activity profile for insider 'alex.doe':")
-insider_activity = daily_features[daily_features['username'] == 'alex.doe']
-anomaly_day = insider_activity[
-    (insider_activity['after_hours_login_count'] > 0) |
-    (insider_activity['unusual_dir_access_count'] > 0) |
-    (insider_activity['usb_connection_count'] > 0) |
-    (insider_activity['personal_emails_sent_count'] > 0)
-]
-print(anomaly_day)
\ No newline at end of file
+        daily_features = build_daily_features(profiler)
+
+    # --- 10. Save Final Dataset ---
+    if args.incremental:
+        # The store already holds the upserted dates; the CSV export is a
+        # full rewrite, so it only happens on request.
+        if args.export_csv:
+            with profiler.stage('write_csv'):
+                export_csv()
+            print("Feature store exported to 'daily_user_features.csv'.")
+        if args.rolling:
+            daily_features = load_daily_features()
+    else:
+        with profiler.stage('write_csv', rows=len(daily_features)):
+            daily_features.to_csv('daily_user_features.csv', index=False)
+        if args.parquet:
+            with profiler.stage('write_store', rows=len(daily_features)):
+                write_features(daily_features)
+            print(f"Feature store updated in '{STORE_DIR}/' (partitioned by date).")
+    if args.rolling:
+        # Baselines follow from the full daily table and bursts from the event
+        # streams, so this also runs over everything after an incremental upsert.
+        rolling = build_rolling_features(daily_features, profiler=profiler)
+        with profiler.stage('write_rolling', rows=len(rolling)):
+            rolling.to_csv(ROLLING_FILE, index=False)
+        print(f"Rolling baseline and burst features saved to '{ROLLING_FILE}'.")
+    if args.convert_logs:
+        for source, path in LOG_FILES.items():
+            with profiler.stage(f'convert_log:{source}'):
+                write_log(source, path, chunksize=args.chunksize)
+        print(f"Raw logs converted to '{STORE_DIR}/{LOGS_DATASET}/'.")
+
+    print("\n--- Preprocessing and Feature Engineering Complete ---")
+    if args.incremental:
+        print(f"Rewrote {len(daily_features)} records across the touched dates in '{STORE_DIR}/'.")
+        insider_activity = load_daily_features(users=['alex.doe'])
+    else:
+        print("Final dataset saved to 'daily_user_features.csv'")
+        print(f"The dataset contains {len(daily_features)} records and {len(daily_features.columns)} columns.")
+        insider_activity = daily_features[daily_features['username'] == 'alex.doe']
+
+    print("\nFull anomalous activity profile for insider 'alex.doe':")
+    anomaly_day = insider_activity[
+        (insider_activity['after_hours_login_count'] > 0) |
+        (insider_activity['unusual_dir_access_count'] > 0) |
+        (insider_activity['critical_file_access_count'] > 0) |
+        (insider_activity['usb_connection_count'] > 0) |
+        (insider_activity['personal_emails_sent_count'] > 0)
+    ]
+    print(anomaly_day)
+
+    report_path = profiler.write()
+    if report_path:
+        print(f"\nStage profile:\n{profiler.summary()}")
+        print(f"Profile report saved to '{report_path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,100 @@
+import argparse
+import asyncio
 import socket
+import struct
+import threading
+import time
 import tkinter as tk
+from concurrent.futures import Future
 from tkinter import messagebox
-import threading
-import sys
 
 # --- CONFIGURATION ---
 LISTENING_PORT = 5000
 ADMIN_PASSWORD = "admin123"  # <--- The only way to unlock
+READ_TIMEOUT = 5.0  # seconds a client may stay silent before it is disconnected
+LOCK_TIMEOUT = 10.0  # seconds to wait for the lock screen to come up before replying
+MAX_MESSAGE_BYTES = 1024
+
+# --- Wire Format ---
+# Every message, in both directions, is a 4-byte big-endian length followed by
+# that many bytes of UTF-8 text. Commands: LOCK_NOW, STATUS, PING. Replies are
+# "ACK <command> [detail]" or "ERR <reason>".
+HEADER = struct.Struct('!I')
+
+
+def encode_message(text):
+    payload = text.encode()
+    return HEADER.pack(len(payload)) + payload
+
+
+async def read_message(reader, timeout=READ_TIMEOUT):
+    """Reads one framed message; None on a clean EOF between messages."""
+    try:
+        header = await asyncio.wait_for(reader.readexactly(HEADER.size), timeout)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message of {length} bytes exceeds {MAX_MESSAGE_BYTES}")
+    return (await asyncio.wait_for(reader.readexactly(length), timeout)).decode()
+
+
+def send_command(host, command='LOCK_NOW', port=LISTENING_PORT, timeout=LOCK_TIMEOUT + READ_TIMEOUT):
+    """Sends one command to a guard and returns its reply (blocking)."""
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall(encode_message(command))
+        conn.shutdown(socket.SHUT_WR)
+        reply = b''
+        while chunk := conn.recv(4096):
+            reply += chunk
+    if len(reply) < HEADER.size:
+        raise ConnectionError(f"{host}:{port} closed the connection without a reply")
+    (length,) = HEADER.unpack(reply[:HEADER.size])
+    return reply[HEADER.size:HEADER.size + length].decode()
+
 
 class LockScreenApp:
-    def __init__(self):
+    def __init__(self, on_shown=None, on_unlock=None):
+        self.on_unlock = on_unlock
         self.root = tk.Tk()
         self.root.title("SECURITY ALERT")
-        
+
         # 1. Fullscreen & Topmost (Covers everything)
         self.root.attributes('-fullscreen', True)
         self.root.attributes('-topmost', True)
         self.root.configure(bg='#1a0505') # Dark Red/Black
-        
+
         # 2. Disable Closing
         self.root.protocol("WM_DELETE_WINDOW", self.disable_event)
 
         # --- UI ELEMENTS ---
-        tk.Label(self.root, text="⚠ SECURITY LOCKDOWN ⚠", 
+        tk.Label(self.root, text="⚠ SECURITY LOCKDOWN ⚠",
                  font=("Arial", 50, "bold"), fg="red", bg='#1a0505').pack(pady=(100, 20))
-        
-        tk.Label(self.root, text="MALICIOUS ACTIVITY DETECTED ON THIS ENDPOINT", 
+
+        tk.Label(self.root, text="MALICIOUS ACTIVITY DETECTED ON THIS ENDPOINT",
                  font=("Courier", 20, "bold"), fg="white", bg='#1a0505').pack(pady=10)
 
-        tk.Label(self.root, text="System isolated by SOC.\nContact Administrator to unlock.", 
+        tk.Label(self.root, text="System isolated by SOC.\nContact Administrator to unlock.",
                  font=("Arial", 14), fg="#cccccc", bg='#1a0505').pack(pady=20)
 
         # Password Entry
-        tk.Label(self.root, text="Enter Admin Override Password:", 
+        tk.Label(self.root, text="Enter Admin Override Password:",
                  font=("Arial", 12), fg="white", bg='#1a0505').pack(pady=(50, 5))
-        
+
         self.password_entry = tk.Entry(self.root, font=("Arial", 20), show="*", width=20)
         self.password_entry.pack(pady=10)
         self.password_entry.bind('<Return>', self.check_password)
 
         # Unlock Button
-        tk.Button(self.root, text="UNLOCK SYSTEM", command=self.check_password, 
+        tk.Button(self.root, text="UNLOCK SYSTEM", command=self.check_password,
                   font=("Arial", 15, "bold"), bg="red", fg="white", width=20).pack(pady=20)
 
+        if on_shown is not None:
+            # Runs once the event loop has drawn the window.
+            self.root.after_idle(on_shown)
+
     def disable_event(self):
         pass
 
@@ -56,31 +108,126 @@ class LockScreenApp:
             self.password_entry.delete(0, 'end')
 
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.on_unlock is not None:
+                self.on_unlock()
+
+
+class LockController:
+    """Owns the lock screen so that at most one is ever open.
 
-def start_listener():
-    """Listens for the 'LOCK' signal from Admin"""
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind(('0.0.0.0', LISTENING_PORT))
-    server_socket.listen(5)
-    
-    print(f"🛡️  GUARD ACTIVE. Listening on Port {LISTENING_PORT}...")
+    Tk runs on a dedicated GUI thread per lock and never on the network event
+    loop; the loop only asks for a lock and waits on the returned future,
+    which resolves once the screen is up. headless=True engages the lock
+    without a window (load tests, machines without a display).
+    """
 
-    while True:
+    def __init__(self, headless=False):
+        self.headless = headless
+        self._mutex = threading.Lock()
+        self._shown = None  # Future of the current lock; None while unlocked
+        self.locked_at = None
+
+    @property
+    def locked(self):
+        return self._shown is not None
+
+    def request_lock(self):
+        """Returns (future resolving when the screen is up, True if this call engaged the lock)."""
+        with self._mutex:
+            if self._shown is not None:
+                return self._shown, False
+            shown = self._shown = Future()
+        if self.headless:
+            self._mark_shown(shown)
+        else:
+            threading.Thread(target=self._run_gui, args=(shown,), daemon=True, name='lock-screen').start()
+        return shown, True
+
+    def _mark_shown(self, shown):
+        self.locked_at = time.time()
+        if not shown.done():
+            shown.set_result(self.locked_at)
+
+    def _run_gui(self, shown):
         try:
-            client, addr = server_socket.accept()
-            print(f"⚠️ Signal received from: {addr}")
-            data = client.recv(1024).decode()
-            
-            if data == "LOCK_NOW":
-                print("🔒 LOCKING SCREEN...")
-                # Use threading to ensure the GUI opens without freezing the network listener
-                gui_thread = threading.Thread(target=lambda: LockScreenApp().run())
-                gui_thread.start()
-                
-            client.close()
-        except Exception as e:
-            print(f"Error: {e}")
+            LockScreenApp(on_shown=lambda: self._mark_shown(shown), on_unlock=self.unlock).run()
+        except Exception as e:  # no display, Tk failure: report it instead of hanging the sender
+            if not shown.done():
+                shown.set_exception(e)
+            self.unlock()
+
+    def unlock(self):
+        with self._mutex:
+            self._shown = None
+            self.locked_at = None
+
+
+async def handle_client(reader, writer, controller):
+    """Serves one connection: any number of framed commands, each acknowledged."""
+    peer = writer.get_extra_info('peername')
+    try:
+        while True:
+            try:
+                command = await read_message(reader)
+            except asyncio.TimeoutError:
+                return  # idle; senders that pool connections keep them open between commands
+            except (asyncio.IncompleteReadError, ValueError, UnicodeDecodeError) as e:
+                print(f"⚠️ Dropping {peer}: {type(e).__name__} {e}")
+                return
+            if command is None:
+                return
+            if command == "LOCK_NOW":
+                shown, engaged = controller.request_lock()
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(shown), LOCK_TIMEOUT)
+                    reply = f"ACK LOCK_NOW {'locked' if engaged else 'already_locked'}"
+                    if engaged:
+                        print(f"🔒 Screen locked on signal from {peer}")
+                except Exception as e:
+                    reply = f"ERR lock failed: {type(e).__name__}"
+            elif command == "STATUS":
+                reply = f"ACK STATUS {'locked' if controller.locked else 'unlocked'}"
+            elif command == "PING":
+                reply = "ACK PING"
+            else:
+                reply = "ERR unknown command"
+            writer.write(encode_message(reply))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(controller, host='0.0.0.0', port=LISTENING_PORT, ready=None):
+    """Runs the listener until cancelled; `ready` (a threading.Event) is set once it is bound."""
+    server = await asyncio.start_server(lambda r, w: handle_client(r, w, controller), host, port, backlog=1024)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def start_listener(port=LISTENING_PORT, headless=False):
+    """Listens for the 'LOCK_NOW' signal from Admin"""
+    print(f"🛡️  GUARD ACTIVE. Listening on Port {port}...")
+    try:
+        asyncio.run(serve(LockController(headless=headless), port=port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint guard: locks the screen on a LOCK_NOW signal.")
+    parser.add_argument('--port', type=int, default=LISTENING_PORT)
+    parser.add_argument('--headless', action='store_true',
+                        help="Engage the lock without opening a window (testing).")
+    args = parser.parse_args()
+    start_listener(args.port, args.headless)
+
 
 if __name__ == "__main__":
-    start_listener()
+    main()
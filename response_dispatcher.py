@@ -0,0 +1,211 @@
+"""Pushes LOCK_NOW to the endpoints of flagged users, concurrently.
+
+Usernames are resolved to endpoints through a mapping file and every
+endpoint is contacted at the same time, up to a concurrency limit. Each
+endpoint gets a timeout and a number of retries. Connections to the
+remote_guide.py listeners stay pooled between batches, so a second batch
+for the same machines skips the TCP handshake. The outcome and latency of
+every delivery are appended to a JSON-lines log.
+
+    python response_dispatcher.py alex.doe jerry.tyler --endpoints endpoints.csv
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import pandas as pd
+
+from remote_guide import LISTENING_PORT, READ_TIMEOUT, encode_message, read_message
+
+# --- Configuration ---
+# One row per (username, endpoint); a user may have several machines.
+#   username,host,port
+#   alex.doe,10.0.4.17,5000
+ENDPOINTS_FILE = 'endpoints.csv'
+DISPATCH_LOG = 'dispatch_log.jsonl'
+CONNECT_TIMEOUT = 2.0  # seconds to open a connection
+REPLY_TIMEOUT = 15.0  # seconds to wait for the ack; the listener acks only once the screen is up
+RETRIES = 2  # extra attempts after a connection error or timeout
+RETRY_BACKOFF = 0.2  # seconds before the first retry, doubling after each
+CONCURRENCY = 256  # endpoints contacted at once
+IDLE_SECONDS = READ_TIMEOUT * 0.8  # pooled connections are dropped before the listener times them out
+
+
+def load_endpoints(path=ENDPOINTS_FILE):
+    """{username: [(host, port), ...]} from the mapping file."""
+    mapping = pd.read_csv(path, dtype={'username': str, 'host': str})
+    if 'port' not in mapping:
+        mapping['port'] = LISTENING_PORT
+    mapping['port'] = mapping['port'].fillna(LISTENING_PORT).astype(int)
+    endpoints = {}
+    for username, host, port in mapping[['username', 'host', 'port']].itertuples(index=False):
+        endpoints.setdefault(username, []).append((host, port))
+    return endpoints
+
+
+class ResponseDispatcher:
+    """Sends commands to remote_guide.py listeners from a background event loop.
+
+    The loop runs on its own thread, so callers (the dashboard, a CLI) stay
+    synchronous while the idle connection pool survives between calls.
+    """
+
+    def __init__(self, endpoints, retries=RETRIES, reply_timeout=REPLY_TIMEOUT, concurrency=CONCURRENCY,
+                 log_path=DISPATCH_LOG):
+        self.endpoints = endpoints
+        self.retries = retries
+        self.reply_timeout = reply_timeout
+        self.concurrency = concurrency
+        self.log_path = log_path
+        self._idle = {}  # (host, port) -> [(reader, writer, idle since)]
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name='response-dispatcher')
+        self._thread.start()
+
+    def dispatch(self, usernames, command='LOCK_NOW'):
+        """Sends `command` to every endpoint of every user; returns one result dict per delivery."""
+        future = asyncio.run_coroutine_threadsafe(self._dispatch(list(dict.fromkeys(usernames)), command), self._loop)
+        results = future.result()
+        if self.log_path:
+            with open(self.log_path, 'a') as log:
+                for result in results:
+                    log.write(json.dumps(result) + '\n')
+        return results
+
+    def close(self):
+        """Closes the pooled connections and stops the background loop."""
+        asyncio.run_coroutine_threadsafe(self._close_idle(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _dispatch(self, usernames, command):
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks, results = [], []
+        for username in usernames:
+            targets = self.endpoints.get(username)
+            if not targets:
+                results.append(_result(username, None, command, 'unmapped', None, 0, 0.0))
+            for endpoint in targets or []:
+                tasks.append(self._deliver(limit, username, endpoint, command))
+        return results + list(await asyncio.gather(*tasks))
+
+    async def _deliver(self, limit, username, endpoint, command):
+        async with limit:
+            started = time.perf_counter()
+            delay, reply, error = RETRY_BACKOFF, None, None
+            for attempt in range(1, self.retries + 2):
+                try:
+                    reply = await self._send(endpoint, command)
+                    break
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}".rstrip(': ')
+                    if attempt <= self.retries:
+                        await asyncio.sleep(delay)
+                        delay *= 2
+            latency_ms = (time.perf_counter() - started) * 1e3
+            if reply is None:
+                return _result(username, endpoint, command, 'failed', error, attempt, latency_ms)
+            # 'ACK LOCK_NOW locked' -> 'locked'; errors reported by the listener keep their text.
+            outcome = reply.split()[-1] if reply.startswith('ACK') else 'rejected'
+            return _result(username, endpoint, command, outcome, reply, attempt, latency_ms)
+
+    async def _send(self, endpoint, command):
+        conn = self._checkout(endpoint)
+        if conn is not None:
+            try:
+                return await self._exchange(endpoint, conn, command)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass  # the listener closed the pooled connection; not counted as an attempt
+        conn = await asyncio.wait_for(asyncio.open_connection(*endpoint), CONNECT_TIMEOUT)
+        return await self._exchange(endpoint, conn, command)
+
+    async def _exchange(self, endpoint, conn, command):
+        reader, writer = conn
+        try:
+            writer.write(encode_message(command))
+            await writer.drain()
+            reply = await read_message(reader, timeout=self.reply_timeout)
+            if reply is None:
+                raise ConnectionResetError("connection closed before the reply")
+        except BaseException:
+            writer.close()
+            raise
+        self._idle.setdefault(endpoint, []).append((reader, writer, time.monotonic()))
+        return reply
+
+    def _checkout(self, endpoint):
+        pool = self._idle.get(endpoint, [])
+        while pool:
+            reader, writer, since = pool.pop()
+            if time.monotonic() - since < IDLE_SECONDS and not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _close_idle(self):
+        writers = [writer for pool in self._idle.values() for _, writer, _ in pool]
+        self._idle.clear()
+        for writer in writers:
+            writer.close()
+        # Let the transports finish closing before the loop stops.
+        await asyncio.gather(*(writer.wait_closed() for writer in writers), return_exceptions=True)
+
+
+def _result(username, endpoint, command, outcome, reply, attempts, latency_ms):
+    return {
+        'sent_at': time.time(),
+        'username': username,
+        'host': None if endpoint is None else endpoint[0],
+        'port': None if endpoint is None else endpoint[1],
+        'command': command,
+        'outcome': outcome,
+        'reply': reply,
+        'attempts': attempts,
+        'latency_ms': round(latency_ms, 3),
+    }
+
+
+def summarize(results):
+    """Outcome counts and latency percentiles of a batch, as a printable string."""
+    frame = pd.DataFrame(results)
+    counts = frame['outcome'].value_counts().to_dict()
+    delivered = frame.loc[frame['outcome'].isin(['locked', 'already_locked']), 'latency_ms']
+    lines = [f"{len(frame)} deliveries: " + ', '.join(f"{k}={v}" for k, v in counts.items())]
+    if len(delivered):
+        p50, p95, p99 = delivered.quantile([0.5, 0.95, 0.99])
+        lines.append(f"delivery latency ms: p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} max={delivered.max():.1f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('usernames', nargs='+', help="Flagged users whose endpoints should be locked.")
+    parser.add_argument('--endpoints', default=ENDPOINTS_FILE, help="CSV mapping username to host and port.")
+    parser.add_argument('--log', default=DISPATCH_LOG, help="JSON-lines file delivery results are appended to.")
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    parser.add_argument('--timeout', type=float, default=REPLY_TIMEOUT, help="Seconds to wait for each ack.")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    args = parser.parse_args()
+
+    try:
+        endpoints = load_endpoints(args.endpoints)
+    except FileNotFoundError:
+        print(f"Error: '{args.endpoints}' not found. Create it with username,host,port rows.")
+        exit()
+
+    dispatcher = ResponseDispatcher(endpoints, args.retries, args.timeout, args.concurrency, args.log)
+    print(f"🚨 Sending LOCK_NOW to the endpoints of {len(args.usernames)} users...")
+    results = dispatcher.dispatch(args.usernames)
+    dispatcher.close()
+    for result in results:
+        print(f"  {result['username']:<24} {result['host'] or '-'}:{result['port'] or '-'} "
+              f"{result['outcome']:<15} {result['latency_ms']:>9.1f} ms  (attempts: {result['attempts']})")
+    print(summarize(results))
+    print(f"Results appended to '{args.log}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import FEATURE_COLUMNS, KEYS, LOG_FILES, username_dtype
+from log_schema import read_typed_log, timestamps_to_days
+from pipeline_profiler import NULL_PROFILER
+
+# --- Configuration ---
+ROLLING_FILE = 'rolling_user_features.csv'
+BASELINE_WINDOWS = (7, 30)  # calendar days of history behind each user-day
+BURST_WINDOWS = (15, 60)  # minutes; peak events per user inside any such window of the day
+
+BASELINE_COLUMNS = [f'{col}_{stat}_{days}d' for days in BASELINE_WINDOWS
+                    for col in FEATURE_COLUMNS for stat in ('mean', 'std', 'z')]
+BURST_COLUMNS = [f'max_events_{minutes}min' for minutes in BURST_WINDOWS]
+ROLLING_COLUMNS = BASELINE_COLUMNS + BURST_COLUMNS
+
+
+# --- Incremental Window Engines ---
+class _UserCodes:
+    """Stable integer code per username, growing as new users appear."""
+
+    def __init__(self):
+        self._codes = {}
+
+    def __len__(self):
+        return len(self._codes)
+
+    def encode(self, usernames):
+        local, uniques = pd.factorize(np.asarray(usernames, dtype=object))
+        codes = self._codes
+        known = np.fromiter((codes.setdefault(u, len(codes)) for u in uniques), dtype=np.int64, count=len(uniques))
+        return known[local]
+
+
+class RollingBaseline:
+    """Per-user mean and standard deviation of the daily counts over the previous `days` days.
+
+    Holds a running count, sum and sum of squares per user. Each call adds one
+    calendar day for all users at once and subtracts the day that fell out of
+    the window, so the work per user-day is constant however long the window.
+    The baseline for a day covers only earlier days, so a spike is compared
+    against the user's own history rather than diluting it.
+    """
+
+    def __init__(self, days, width=len(FEATURE_COLUMNS)):
+        self.days = days
+        self.width = width
+        self.users = _UserCodes()
+        self._count = np.zeros(0)
+        self._total = np.zeros((0, width))
+        self._squares = np.zeros((0, width))
+        self._history = deque()  # (day, user codes, values) per added day
+
+    def _grow(self):
+        extra = len(self.users) - len(self._count)
+        if extra > 0:
+            extra = max(extra, len(self._count))
+            self._count = np.concatenate([self._count, np.zeros(extra)])
+            self._total = np.vstack([self._total, np.zeros((extra, self.width))])
+            self._squares = np.vstack([self._squares, np.zeros((extra, self.width))])
+
+    def update(self, day, usernames, values):
+        """Returns (mean, std, z) of one day's rows against each user's baseline, then adds the day.
+
+        Days must arrive in increasing order, each username at most once per day.
+        """
+        codes = self.users.encode(usernames)
+        self._grow()
+        while self._history and self._history[0][0] < day - self.days:
+            _, old_codes, old_values = self._history.popleft()
+            self._count[old_codes] -= 1
+            self._total[old_codes] -= old_values
+            self._squares[old_codes] -= old_values * old_values
+
+        n = self._count[codes][:, None]
+        seen = n > 0
+        mean = np.divide(self._total[codes], n, out=np.zeros(values.shape), where=seen)
+        variance = np.divide(self._squares[codes], n, out=np.zeros(values.shape), where=seen) - mean * mean
+        std = np.sqrt(np.maximum(variance, 0))
+        z = np.divide(values - mean, std, out=np.zeros(values.shape), where=std > 1e-9)
+
+        self._history.append((day, codes, values))
+        self._count[codes] += 1
+        self._total[codes] += values
+        self._squares[codes] += values * values
+        return mean, std, z
+
+
+class BurstCounter:
+    """Events per user inside a sliding window of `minutes`, fed the event stream in time order.
+
+    For each event, the count is how many of the same user's events fall in
+    (minute - window, minute], including itself, exactly as a per-user queue
+    that evicts expired events would report. Events still inside the window
+    at the end of a batch are carried into the next one, so a stream can be
+    fed in chunks of any size.
+    """
+
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self._carry_codes = np.zeros(0, dtype=np.int32)
+        self._carry_minutes = np.zeros(0, dtype=np.int64)
+
+    def add(self, user_codes, minutes):
+        """Window counts for a time-ordered batch of events, users given as stable integer codes."""
+        minutes = np.asarray(minutes, dtype=np.int64)
+        if len(minutes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        codes = np.concatenate([self._carry_codes, np.asarray(user_codes, dtype=np.int32)])
+        times = np.concatenate([self._carry_minutes, minutes])
+        order = np.argsort(codes, kind='stable')  # per user, still in time order
+        span = times.max() - min(times.min(), times.max() - self.minutes) + self.minutes + 1
+        keys = codes[order].astype(np.int64) * span + (times[order] - times.min())
+        left = np.searchsorted(keys, keys - self.minutes + 1, side='left')
+        counts = np.empty(len(times), dtype=np.int64)
+        counts[order] = np.arange(len(times)) - left + 1
+
+        keep = times > times.max() - self.minutes
+        self._carry_codes, self._carry_minutes = codes[keep], times[keep]
+        return counts[len(codes) - len(minutes):]
+
+
+# --- Feature Builders ---
+def baseline_features(daily_features):
+    """Rolling 7/30-day mean, std and z-score of every feature column, per user-day."""
+    data = daily_features[KEYS + FEATURE_COLUMNS].copy()
+    data['_day'] = timestamps_to_days(data['date']).to_numpy()
+    data = data.sort_values('_day', kind='stable')
+    baselines = [RollingBaseline(days) for days in BASELINE_WINDOWS]
+    values = data[FEATURE_COLUMNS].to_numpy(dtype=float)
+    usernames = data['username'].astype(str).to_numpy()
+    days = data['_day'].to_numpy()
+    out = np.empty((len(data), len(BASELINE_COLUMNS)))
+    bounds = np.flatnonzero(np.diff(days)) + 1
+    for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(data)]])):
+        stats = [np.stack(baseline.update(days[start], usernames[start:end], values[start:end]), axis=2)
+                 for baseline in baselines]
+        out[start:end] = np.concatenate([stat.reshape(end - start, -1) for stat in stats], axis=1)
+    result = pd.DataFrame(out.round(6), columns=BASELINE_COLUMNS, index=data.index)
+    return pd.concat([data[KEYS], result], axis=1).sort_index()
+
+
+def event_stream(log_files=LOG_FILES, profiler=NULL_PROFILER):
+    """(username, minute, day) of every event in every log, merged in time order.
+
+    username is a categorical shared by all sources, so its codes are stable
+    user ids for the whole stream.
+    """
+    parts = {}
+    for source, path in log_files.items():
+        with profiler.stage(f'events:{source}') as record:
+            df = read_typed_log(source, path, columns=['timestamp', 'username'])
+            parts[source] = pd.DataFrame({
+                'username': df['username'],
+                'minute': df['timestamp'].to_numpy().astype('datetime64[m]').astype(np.int64),
+                'day': df['day'].to_numpy(),
+            })
+            record['rows'] = len(df)
+    dtype = username_dtype(parts)
+    for part in parts.values():
+        part['username'] = part['username'].astype(dtype)
+    events = pd.concat(parts.values(), ignore_index=True)
+    return events.sort_values('minute', kind='stable').reset_index(drop=True)
+
+
+def burst_features(events, chunksize=1_000_000):
+    """Peak events per user-day inside each sliding burst window."""
+    counters = [BurstCounter(minutes) for minutes in BURST_WINDOWS]
+    peaks = []
+    for start in range(0, len(events), chunksize):
+        chunk = events.iloc[start:start + chunksize]
+        codes, minutes = chunk['username'].cat.codes.to_numpy(), chunk['minute'].to_numpy()
+        counts = pd.DataFrame({column: counter.add(codes, minutes)
+                               for column, counter in zip(BURST_COLUMNS, counters)})
+        counts['username'] = chunk['username'].to_numpy()
+        counts['_day'] = chunk['day'].to_numpy()
+        peaks.append(counts.groupby(['username', '_day'], observed=True, sort=False).max())
+    if not peaks:
+        return pd.DataFrame(columns=['username', '_day'] + BURST_COLUMNS)
+    bursts = pd.concat(peaks).groupby(level=['username', '_day'], observed=True, sort=False).max().reset_index()
+    bursts['username'] = bursts['username'].astype(str)
+    return bursts
+
+
+def build_rolling_features(daily_features, log_files=LOG_FILES, profiler=NULL_PROFILER):
+    """Rolling baselines and burst peaks for every row of the daily feature table."""
+    with profiler.stage('rolling_baselines', rows=len(daily_features)):
+        rolling = baseline_features(daily_features)
+    events = event_stream(log_files, profiler)
+    with profiler.stage('burst_windows', rows=len(events)):
+        bursts = burst_features(events)
+    rolling['username'] = rolling['username'].astype(str)
+    rolling['_day'] = timestamps_to_days(rolling['date']).to_numpy()
+    rolling = rolling.merge(bursts, on=['username', '_day'], how='left').drop(columns='_day')
+    rolling[BURST_COLUMNS] = rolling[BURST_COLUMNS].fillna(0).astype(int)
+    return rolling[KEYS + ROLLING_COLUMNS]
+
+
+def load_rolling_features(path=ROLLING_FILE):
+    rolling = pd.read_csv(path)
+    rolling['date'] = pd.to_datetime(rolling['date'])
+    return rolling
+
+
+def with_rolling_features(data, path=ROLLING_FILE):
+    """Adds the rolling columns to a daily feature frame, matched on (username, date)."""
+    rolling = load_rolling_features(path)
+    dates = pd.to_datetime(data['date'])
+    keys = pd.DataFrame({'username': data['username'].astype(str).to_numpy(), 'date': dates.to_numpy()})
+    rolling = keys.merge(rolling, on=KEYS, how='left')[ROLLING_COLUMNS].fillna(0)
+    return pd.concat([data.reset_index(drop=True), rolling], axis=1).set_axis(data.index)
+
+
+def rolling_version(path=ROLLING_FILE):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,292 @@
+"""Peer-group and per-user IsolationForest shards, trained in parallel.
+
+One global forest judges everybody against the whole company, so what is
+normal for one role hides outliers in another, and any change to anyone's
+data means refitting all of it. Here every user is routed to a shard: the
+model of their peer group (their role from user_roles.csv, or a k-means
+cluster of per-user activity profiles) or, with --per-user-min-days, a
+model of their own history. Shards are fit across a process pool and saved
+as CompactForest arrays next to a manifest holding the routes and a
+fingerprint of each shard's training rows; a rerun only refits the shards
+whose rows changed. With --register the shard set becomes the next
+model_registry version, which the dashboard, live_scorer.py and
+siem_export.py load like any other version.
+
+    python shard_models.py --group-by role --per-user-min-days 40 --workers 4 --register
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.ensemble import IsolationForest
+
+from access_policy import USER_ROLES_FILE, load_access_policy
+from compact_forest import CompactForest, export_forest
+from feature_engine import FEATURE_COLUMNS
+from feature_store import load_daily_features
+from model_registry import data_fingerprint, register_shards
+from sweep_model import INSIDER_USERNAME, SCENARIO_END, insider_days
+
+# --- Configuration ---
+SHARD_DIR = 'shard_models'
+MANIFEST_FILE = 'manifest.json'
+# Same settings as train_model.py; each shard is fit on one core of the pool.
+MODEL_PARAMS = {'n_estimators': 100, 'contamination': 'auto', 'random_state': 42}
+DEFAULT_CLUSTERS = 4
+MIN_SHARD_ROWS = 30  # smaller groups are folded into the largest shard
+
+
+def _shard_dir_name(key):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', key.replace(':', '-'))
+
+
+def user_profiles(data, feature_columns):
+    """One row per user: the mean of log1p daily counts, the input of cluster grouping."""
+    values = np.log1p(data[feature_columns].astype(float).clip(lower=0))
+    return values.groupby(data['username'].astype(str)).mean()
+
+
+class ShardedModel:
+    """Routes each user-day to its shard's forest and scores it there.
+
+    Mirrors the scoring API of IsolationForest, but the frame must carry the
+    `routing_columns` as well as the features. Users not seen at training
+    time are routed by their role or their nearest cluster centroid, else to
+    the fallback shard.
+    """
+    routing_columns = ['username']
+
+    def __init__(self, manifest, forests, policy=None):
+        self.manifest = manifest
+        self.forests = forests
+        self.feature_names_in_ = np.array(manifest['feature_columns'], dtype=object)
+        self.policy = policy or load_access_policy(roles_path=USER_ROLES_FILE)
+
+    @classmethod
+    def load(cls, directory=SHARD_DIR, n_jobs=1):
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        forests = {key: CompactForest.load(os.path.join(directory, shard['dir']), n_jobs=n_jobs)
+                   for key, shard in manifest['shards'].items()}
+        return cls(manifest, forests)
+
+    def route(self, data):
+        """Shard key of every row."""
+        usernames = data['username'].astype(str)
+        routes = usernames.map(self.manifest['routes'])
+        unseen = routes.isna()
+        if unseen.any():
+            routes[unseen] = usernames[unseen].map(self._route_unseen(data[unseen]))
+        return routes.fillna(self.manifest['fallback'])
+
+    def _route_unseen(self, data):
+        manifest = self.manifest
+        users = data['username'].astype(str).unique()
+        if manifest['group_by'] == 'role':
+            return {u: f"role:{self.policy.role_of(u)}" for u in users
+                    if f"role:{self.policy.role_of(u)}" in manifest['shards']}
+        profiles = user_profiles(data, manifest['feature_columns'])
+        scaled = (profiles.to_numpy() - manifest['profile_mean']) / manifest['profile_scale']
+        nearest = np.argmin(((scaled[:, None, :] - np.array(manifest['centroids'])[None]) ** 2).sum(axis=2), axis=1)
+        return {u: f"cluster:{c}" for u, c in zip(profiles.index, nearest) if f"cluster:{c}" in manifest['shards']}
+
+    def decision_function(self, data):
+        routes = self.route(data).to_numpy()
+        scores = np.empty(len(data))
+        features = data[self.manifest['feature_columns']]
+        for key in np.unique(routes):
+            rows = np.flatnonzero(routes == key)
+            scores[rows] = self.forests[key].decision_function(features.iloc[rows])
+        return scores
+
+    def predict(self, data):
+        return np.where(self.decision_function(data) < 0, -1, 1)
+
+
+def load_manifest(directory=SHARD_DIR):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def assign_groups(data, feature_columns, group_by, clusters, previous=None, regroup=False):
+    """{username: group shard key}, plus the clustering state to persist.
+
+    With cluster grouping, users keep the cluster they were given by an
+    earlier run (unless `regroup`), and new users join their nearest
+    centroid, so one user's new data does not reshuffle every shard.
+    """
+    users = sorted(data['username'].astype(str).unique())
+    if group_by == 'role':
+        policy = load_access_policy(roles_path=USER_ROLES_FILE)
+        return {u: f"role:{policy.role_of(u)}" for u in users}, {}
+
+    profiles = user_profiles(data, feature_columns)
+    if previous and not regroup and previous.get('group_by') == 'cluster':
+        state = {k: previous[k] for k in ('centroids', 'profile_mean', 'profile_scale')}
+        groups = {u: key for u, key in previous['groups'].items() if u in profiles.index}
+        new = profiles.loc[[u for u in users if u not in groups]]
+        if len(new):
+            scaled = (new.to_numpy() - state['profile_mean']) / state['profile_scale']
+            nearest = np.argmin(((scaled[:, None, :] - np.array(state['centroids'])[None]) ** 2).sum(axis=2), axis=1)
+            groups.update({u: f"cluster:{c}" for u, c in zip(new.index, nearest)})
+        return groups, state
+
+    mean = profiles.mean().to_numpy()
+    scale = profiles.std(ddof=0).replace(0, 1).to_numpy()
+    kmeans = KMeans(n_clusters=min(clusters, len(profiles)), n_init=10, random_state=42)
+    labels = kmeans.fit_predict((profiles.to_numpy() - mean) / scale)
+    state = {'centroids': kmeans.cluster_centers_.tolist(), 'profile_mean': mean.tolist(),
+             'profile_scale': scale.tolist()}
+    return {u: f"cluster:{label}" for u, label in zip(profiles.index, labels)}, state
+
+
+def _fit_shard(key, matrix, params):
+    """Worker task: fits one shard and returns its flattened forest."""
+    started = time.perf_counter()
+    model = IsolationForest(**params, n_jobs=1).fit(matrix)
+    return key, export_forest(model), time.perf_counter() - started
+
+
+def train_shards(data, directory=SHARD_DIR, group_by='role', clusters=DEFAULT_CLUSTERS, per_user_min_days=None,
+                 workers=None, regroup=False, feature_columns=FEATURE_COLUMNS, params=MODEL_PARAMS):
+    """Fits every shard whose training rows changed since the last run; returns (manifest, report).
+
+    `report` has one row per shard: its users, rows and whether it was
+    retrained, reused or is new.
+    """
+    feature_columns = list(feature_columns)
+    previous = load_manifest(directory)
+    settings = {'group_by': group_by, 'clusters': clusters, 'per_user_min_days': per_user_min_days,
+                'feature_columns': feature_columns, 'params': params}
+    if previous is not None and any(previous.get(k) != v for k, v in settings.items()):
+        print("Shard settings changed; every shard will be retrained.")
+        previous = None
+
+    usernames = data['username'].astype(str)
+    groups, cluster_state = assign_groups(data, feature_columns, group_by, clusters, previous, regroup)
+    members = usernames.map(groups)
+    sizes = members.value_counts()
+    fallback = sizes.index[0]
+    members = members.where(members.map(sizes) >= MIN_SHARD_ROWS, fallback)
+    routes = dict(zip(usernames, members))
+
+    shard_rows = {key: np.flatnonzero(members.to_numpy() == key) for key in members.unique()}
+    if per_user_min_days:
+        days = usernames.value_counts()
+        for username in days.index[days >= per_user_min_days]:
+            key = f"user:{username}"
+            shard_rows[key] = np.flatnonzero(usernames.to_numpy() == username)
+            routes[username] = key
+
+    shards, tasks, report = {}, [], []
+    old_shards = (previous or {}).get('shards', {})
+    for key, rows in sorted(shard_rows.items()):
+        frame = data.iloc[rows]
+        fingerprint = data_fingerprint(frame, feature_columns)
+        old = old_shards.get(key)
+        shards[key] = {'dir': _shard_dir_name(key), 'fingerprint': fingerprint, 'rows': len(rows),
+                       'users': int(frame['username'].nunique())}
+        if old is not None and old['fingerprint'] == fingerprint and os.path.isdir(os.path.join(directory, old['dir'])):
+            shards[key]['trained_at'] = old['trained_at']
+            report.append({'shard': key, 'users': shards[key]['users'], 'rows': len(rows), 'status': 'unchanged'})
+        else:
+            tasks.append((key, frame[feature_columns].to_numpy(dtype=np.float32)))
+            report.append({'shard': key, 'users': shards[key]['users'], 'rows': len(rows),
+                           'status': 'retrained' if old is not None else 'new'})
+
+    os.makedirs(directory, exist_ok=True)
+    fit_seconds = {}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_fit_shard, key, matrix, params) for key, matrix in tasks]
+            for future in futures:
+                key, (arrays, meta), seconds = future.result()
+                meta['feature_names'] = feature_columns
+                path = os.path.join(directory, shards[key]['dir'])
+                shutil.rmtree(path, ignore_errors=True)
+                CompactForest(arrays, meta).save(path)
+                shards[key]['trained_at'] = datetime.now().isoformat()
+                fit_seconds[key] = seconds
+    for key, old in old_shards.items():
+        if key not in shards:
+            shutil.rmtree(os.path.join(directory, old['dir']), ignore_errors=True)
+
+    manifest = {**settings, 'shards': shards, 'routes': routes, 'fallback': fallback,
+                'groups': groups, **cluster_state, 'updated_at': datetime.now().isoformat()}
+    staging = os.path.join(directory, MANIFEST_FILE + '.tmp')
+    with open(staging, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staging, os.path.join(directory, MANIFEST_FILE))  # readers never see a half-written manifest
+
+    report = pd.DataFrame(report)
+    report['fit_seconds'] = report['shard'].map(fit_seconds).round(3)
+    return manifest, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--group-by', choices=['role', 'cluster'], default='role',
+                        help="Peer groups: roles from user_roles.csv, or k-means clusters of user profiles.")
+    parser.add_argument('--clusters', type=int, default=DEFAULT_CLUSTERS, help="Clusters for --group-by cluster.")
+    parser.add_argument('--per-user-min-days', type=int, default=None,
+                        help="Give every user with at least this many user-days a model of their own.")
+    parser.add_argument('--regroup', action='store_true',
+                        help="Recluster every user instead of keeping earlier cluster assignments.")
+    parser.add_argument('--workers', type=int, default=None, help="Processes fitting shards (default: all cores).")
+    parser.add_argument('--dir', default=SHARD_DIR, help="Where shard forests and the manifest are kept.")
+    parser.add_argument('--register', action='store_true',
+                        help="Register the shard set as the next model_registry version, marked latest.")
+    parser.add_argument('--scenario-end', default=SCENARIO_END,
+                        help="Last day of the generated logs (generate_logs.py --end), for the insider check.")
+    args = parser.parse_args()
+
+    try:
+        data = load_daily_features()
+    except FileNotFoundError:
+        print("Error: 'daily_user_features.csv' not found. Please run preprocess_data.py first.")
+        exit()
+
+    print(f"Training {args.group_by} shards on {len(data)} user-days...")
+    started = time.perf_counter()
+    manifest, report = train_shards(data, args.dir, args.group_by, args.clusters, args.per_user_min_days,
+                                    args.workers, args.regroup)
+    elapsed = time.perf_counter() - started
+    print(report.to_string(index=False))
+    retrained = (report['status'] != 'unchanged').sum()
+    print(f"\n{retrained} of {len(report)} shards trained in {elapsed:.1f}s; manifest saved to "
+          f"'{os.path.join(args.dir, MANIFEST_FILE)}'.")
+
+    # --- Score every user-day with its own shard ---
+    model = ShardedModel.load(args.dir)
+    data['shard'] = model.route(data)
+    data['anomaly_score'] = model.decision_function(data)
+    anomalies = data[data['anomaly_score'] < 0]
+    print(f"\nTotal anomalies detected: {len(anomalies)}")
+    print(anomalies.groupby('shard').size().rename('anomalies').to_string())
+    # The scenario is planted relative to the generator's last day, not the newest row on hand.
+    caught = anomalies[insider_days(anomalies, INSIDER_USERNAME, args.scenario_end)]
+    if len(caught):
+        print(f"\n✅ SUCCESS: {len(caught)} insider days of '{INSIDER_USERNAME}' flagged by shard "
+              f"'{caught['shard'].iloc[0]}'.")
+    else:
+        print(f"\n⚠️ NOTE: Malicious activity for '{INSIDER_USERNAME}' was NOT flagged by its shard.")
+
+    if args.register:
+        metrics = {'anomalies': len(anomalies), 'insider_days_flagged': len(caught), 'shards': len(report)}
+        version = register_shards(args.dir, data, metrics)
+        print(f"Shard set registered as model version '{version}'.")
+
+
+if __name__ == "__main__":
+    main()
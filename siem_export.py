@@ -0,0 +1,469 @@
+"""Ships raw log events, daily feature rows and scored anomalies to a SIEM as _bulk NDJSON.
+
+Documents are encoded a chunk at a time into Elasticsearch _bulk lines
+(an action line and a source line per document) and cut into batches when
+a batch reaches --batch-events documents or --batch-bytes bytes, or has
+been open for --flush-seconds. Batches go through a bounded queue to
+--in-flight sender threads, each holding one keep-alive HTTP connection;
+when every sender is busy and the queue is full, the producer blocks
+instead of buffering without limit. Documents the cluster rejects with a
+retryable status (429, 5xx) are resent with backoff, the rest are counted
+as failed. Every document has a stable _id, so a resent document
+overwrites its earlier copy instead of duplicating it.
+
+With --output the same NDJSON is appended to a local file instead, and
+--stub runs the export against an in-process stand-in for the _bulk
+endpoint.
+
+    python siem_export.py --url http://localhost:9200 --sources events features alerts
+"""
+import argparse
+import base64
+import http.client
+import json
+import queue
+import random
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from attack_enrichment import AttackRuleIndex, load_rules
+from compact_forest import CompactForest
+from feature_engine import LOG_FILES
+from feature_store import load_daily_features
+from model_registry import load_model
+
+# --- Configuration ---
+SIEM_URL = 'http://localhost:9200'
+INDEX_PREFIX = 'insider-threat'  # indices: <prefix>-events-<source>, <prefix>-features, <prefix>-alerts
+MODEL_FILE = 'insider_threat_model.pkl'
+BATCH_EVENTS = 5_000  # documents per _bulk request, at most
+BATCH_BYTES = 5 * 2**20  # body bytes per _bulk request, at most
+FLUSH_SECONDS = 1.0  # a batch is sent once it has been open this long, however small
+IN_FLIGHT = 4  # concurrent _bulk requests, one keep-alive connection each
+RETRIES = 3  # resends of a rejected document or a failed request
+RETRY_BACKOFF = 0.2  # seconds before the first resend, doubling after each
+REQUEST_TIMEOUT = 30.0
+RETRYABLE = {429, 500, 502, 503, 504}
+CHUNKSIZE = 100_000  # rows read and encoded at a time
+MAX_ERRORS = 20  # per-document errors kept for the summary
+
+
+def bulk_lines(frame, index, ids):
+    """One `_bulk` action line plus source line, as bytes, per row of `frame`."""
+    sources = frame.to_json(orient='records', lines=True, date_format='iso').splitlines()
+    action = '{"index":{"_index":' + json.dumps(index) + ',"_id":'
+    return [f'{action}{json.dumps(i)}}}}}\n{source}\n'.encode() for i, source in zip(ids, sources)]
+
+
+def event_documents(log_files=LOG_FILES, chunksize=CHUNKSIZE, prefix=INDEX_PREFIX):
+    """(lines) for every raw log event, a chunk at a time; the _id is '<source>-<row number>'."""
+    for source, path in log_files.items():
+        offset = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            chunk.insert(0, '@timestamp', chunk['timestamp'].str.replace(' ', 'T', n=1))
+            ids = source + '-' + pd.Series(np.arange(offset, offset + len(chunk))).astype(str)
+            offset += len(chunk)
+            yield bulk_lines(chunk, f"{prefix}-events-{source}", ids)
+
+
+def _user_day_ids(frame):
+    return frame['username'].astype(str) + '-' + pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d')
+
+
+def _user_day_documents(data, index, chunksize):
+    for start in range(0, len(data), chunksize):
+        chunk = data.iloc[start:start + chunksize].copy()
+        chunk.insert(0, '@timestamp', pd.to_datetime(chunk['date']).dt.strftime('%Y-%m-%d'))
+        yield bulk_lines(chunk, index, _user_day_ids(chunk))
+
+
+def feature_documents(data, chunksize=CHUNKSIZE, prefix=INDEX_PREFIX):
+    """(lines) for every user-day of the feature table; the _id is '<username>-<date>'."""
+    return _user_day_documents(data, f"{prefix}-features", chunksize)
+
+
+def alert_documents(model, data, attack_index, chunksize=CHUNKSIZE, prefix=INDEX_PREFIX):
+    """((lines) for every user-day `model` scores as anomalous, with its score and ATT&CK techniques; their count)."""
+    scored = data.copy()
+    columns = list(model.feature_names_in_) + list(getattr(model, 'routing_columns', []))
+    scored['anomaly_score'] = model.decision_function(scored[columns])
+    anomalies = attack_index.enrich(scored[scored['anomaly_score'] < 0]).drop(columns=attack_index.flag_columns)
+    return _user_day_documents(anomalies, f"{prefix}-alerts", chunksize), len(anomalies)
+
+
+class HttpTransport:
+    """One keep-alive connection to the _bulk endpoint, reopened after an error."""
+
+    def __init__(self, url, timeout=REQUEST_TIMEOUT):
+        parts = urlsplit(url)
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._address = (parts.hostname, parts.port)
+        self._path = parts.path.rstrip('/') + '/_bulk'
+        self._headers = {'Content-Type': 'application/x-ndjson'}
+        if parts.username:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}".encode()
+            self._headers['Authorization'] = 'Basic ' + base64.b64encode(credentials).decode()
+        self._timeout = timeout
+        self._connection = None
+
+    def post(self, body):
+        """(HTTP status, parsed JSON reply) for one _bulk request."""
+        if self._connection is None:
+            self._connection = self._connection_class(*self._address, timeout=self._timeout)
+        try:
+            self._connection.request('POST', self._path, body, self._headers)
+            response = self._connection.getresponse()
+            reply = response.read()  # read to the end, or the connection cannot be reused
+        except BaseException:
+            self.close()
+            raise
+        try:
+            return response.status, json.loads(reply) if reply else {}
+        except ValueError:
+            return response.status, {'error': reply[:200].decode(errors='replace')}
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class FileTransport:
+    """Appends each batch to a local NDJSON file; every document counts as accepted."""
+
+    def __init__(self, path):
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+
+    def post(self, body):
+        with self._lock:
+            self._file.write(body)
+        return 200, {'errors': False}
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class BulkSink:
+    """Batches _bulk lines and ships them from background sender threads.
+
+    add() cuts batches by document count and size, a timer thread sends
+    batches that have been open for `flush_seconds`, and close() sends the
+    rest and waits for every reply. `url` is an http(s):// endpoint, or a
+    file path to append the NDJSON to.
+    """
+
+    def __init__(self, url=SIEM_URL, batch_events=BATCH_EVENTS, batch_bytes=BATCH_BYTES,
+                 flush_seconds=FLUSH_SECONDS, in_flight=IN_FLIGHT, retries=RETRIES, timeout=REQUEST_TIMEOUT):
+        self.batch_events = batch_events
+        self.batch_bytes = batch_bytes
+        self.flush_seconds = flush_seconds
+        self.retries = retries
+        if urlsplit(url).scheme in ('http', 'https'):
+            self._transports = [HttpTransport(url, timeout) for _ in range(in_flight)]
+        else:
+            self._transports = [FileTransport(url)]  # one writer keeps batches whole and in order
+        # Room for one waiting batch per sender; past that, add() blocks until a sender frees up.
+        self._queue = queue.Queue(maxsize=len(self._transports))
+        self._lock = threading.Lock()
+        self._batch, self._batch_size, self._batch_opened = [], 0, None
+        self.stats = Counter()  # documents, accepted, failed, resent, batches, requests, bytes
+        self.latencies = []  # seconds from a batch's first document to the reply for its last one
+        self.errors = []
+        self.blocked_seconds = 0.0  # time add() waited on full senders
+        self._started = time.perf_counter()
+        self._closed = threading.Event()
+        self._senders = [threading.Thread(target=self._send_loop, args=(transport,), daemon=True, name='bulk-sender')
+                         for transport in self._transports]
+        self._timer = threading.Thread(target=self._flush_loop, daemon=True, name='bulk-flush')
+        for thread in [*self._senders, self._timer]:
+            thread.start()
+
+    def add(self, lines):
+        """Queues the documents of a bulk_lines() list."""
+        for line in lines:
+            full = None
+            with self._lock:
+                if self._batch_opened is None:
+                    self._batch_opened = time.perf_counter()
+                self._batch.append(line)
+                self._batch_size += len(line)
+                self.stats['documents'] += 1
+                if len(self._batch) >= self.batch_events or self._batch_size >= self.batch_bytes:
+                    full = self._cut()
+            if full is not None:
+                self._put(full)
+
+    def flush(self):
+        with self._lock:
+            batch = self._cut()
+        if batch is not None:
+            self._put(batch)
+
+    def close(self):
+        """Sends what is left, waits for every reply and stops the threads; returns self.stats."""
+        self._closed.set()
+        self._timer.join()
+        self.flush()
+        for _ in self._senders:
+            self._queue.put(None)
+        for thread in self._senders:
+            thread.join()
+        for transport in self._transports:
+            transport.close()
+        self.stats['seconds'] = time.perf_counter() - self._started
+        return self.stats
+
+    def _cut(self):
+        if not self._batch:
+            return None
+        batch = (self._batch, self._batch_opened)
+        self._batch, self._batch_size, self._batch_opened = [], 0, None
+        return batch
+
+    def _put(self, batch):
+        started = time.perf_counter()
+        self._queue.put(batch)
+        with self._lock:  # add() and the flush thread both get here
+            self.blocked_seconds += time.perf_counter() - started
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_seconds / 4):
+            with self._lock:
+                stale = self._batch_opened is not None and time.perf_counter() - self._batch_opened >= self.flush_seconds
+                batch = self._cut() if stale else None
+            if batch is not None:
+                self._put(batch)
+
+    def _send_loop(self, transport):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            lines, opened = batch
+            accepted, failed, resent = self._deliver(transport, lines)
+            with self._lock:
+                self.stats.update({'batches': 1, 'accepted': accepted, 'failed': failed, 'resent': resent})
+                self.latencies.append(time.perf_counter() - opened)
+
+    def _deliver(self, transport, lines):
+        """Sends a batch, resending what comes back with a retryable status; returns (accepted, failed, resent)."""
+        pending, accepted, failed, resent, delay = lines, 0, 0, 0, RETRY_BACKOFF
+        for attempt in range(self.retries + 1):
+            if attempt:
+                resent += len(pending)
+                time.sleep(delay)
+                delay *= 2
+            body = b''.join(pending)
+            with self._lock:
+                self.stats.update({'requests': 1, 'bytes': len(body)})
+            try:
+                status, reply = transport.post(body)
+            except (OSError, http.client.HTTPException) as e:
+                self._error(f"{type(e).__name__}: {e}".rstrip(': '))
+                continue
+            if status in RETRYABLE:
+                self._error(f"HTTP {status}")
+                continue
+            if status >= 300:
+                self._error(f"HTTP {status}: {reply.get('error', reply)}")
+                return accepted, failed + len(pending), resent
+            retry, rejected = self._partition(pending, reply)
+            accepted += len(pending) - len(retry) - rejected
+            failed += rejected
+            pending = retry
+            if not pending:
+                break
+        return accepted, failed + len(pending), resent
+
+    def _partition(self, lines, reply):
+        """(documents to resend, count rejected for good) from a _bulk reply's per-item statuses."""
+        if not reply.get('errors'):
+            return [], 0
+        items = reply.get('items') or []
+        if len(items) != len(lines):
+            self._error(f"reply has {len(items)} item statuses for {len(lines)} documents")
+        retry, rejected = [], 0
+        for i, line in enumerate(lines):
+            # A document without a status of its own was not confirmed, so it is resent.
+            result = next(iter(items[i].values()), None) if i < len(items) and isinstance(items[i], dict) else None
+            status = result.get('status') if isinstance(result, dict) else None
+            if status is None or status in RETRYABLE:
+                retry.append(line)
+            elif status >= 300:
+                rejected += 1
+                self._error(f"{status}: {result.get('error')}")
+        return retry, rejected
+
+    def _error(self, message):
+        with self._lock:
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append(message)
+
+    def summary(self):
+        """Throughput, batch latency percentiles and outcome counts, as a printable string."""
+        seconds = self.stats['seconds'] or time.perf_counter() - self._started
+        lines = [f"{self.stats['documents']} documents in {self.stats['batches']} batches "
+                 f"({self.stats['requests']} requests, {self.stats['bytes'] / 2**20:.1f} MiB) in {seconds:.2f}s: "
+                 f"{self.stats['accepted'] / seconds:,.0f} events/s",
+                 f"accepted={self.stats['accepted']} failed={self.stats['failed']} resent={self.stats['resent']}; "
+                 f"producer blocked {self.blocked_seconds:.2f}s on busy senders"]
+        if self.latencies:
+            p50, p95, p99 = np.percentile(self.latencies, [50, 95, 99]) * 1e3
+            lines.append(f"batch latency ms: p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} "
+                         f"max={max(self.latencies) * 1e3:.1f}")
+        return '\n'.join(lines)
+
+
+class StubBulkServer:
+    """In-process stand-in for a cluster's _bulk endpoint, for tests and benchmarks.
+
+    Speaks keep-alive HTTP/1.1, answers every request with per-document
+    statuses and rejects a `reject_rate` share of the documents with 429,
+    as a busy cluster does. `documents` counts accepted documents per
+    index, `connections` the TCP connections opened to it, and `delay`
+    adds a fixed service time to every request.
+    """
+
+    def __init__(self, port=0, reject_rate=0.0, delay=0.0, seed=0):
+        self.reject_rate = reject_rate
+        self.delay = delay
+        self.documents = Counter()
+        self.ids = set()
+        self.requests = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='stub-bulk-server').start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _bulk(self, body):
+        lines = body.splitlines()
+        items, errors = [], False
+        with self._lock:
+            self.requests += 1
+            if len(lines) % 2:
+                raise ValueError("an action line without its document")
+            for action in lines[0::2]:
+                meta = json.loads(action)['index']
+                if self._random.random() < self.reject_rate:
+                    items.append({'index': {'_index': meta['_index'], '_id': meta['_id'], 'status': 429,
+                                            'error': {'type': 'es_rejected_execution_exception'}}})
+                    errors = True
+                else:
+                    self.documents[meta['_index']] += 1
+                    self.ids.add((meta['_index'], meta['_id']))
+                    items.append({'index': {'_index': meta['_index'], '_id': meta['_id'], 'status': 201}})
+        return {'took': 0, 'errors': errors, 'items': items}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in two writes; without this, Nagle holds the body back
+                # until the client's delayed ACK, about 40 ms per request.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                try:
+                    status, reply = 200, stub._bulk(body)
+                except (ValueError, KeyError) as e:
+                    status, reply = 400, {'error': f"malformed bulk body: {e}"}
+                payload = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=SIEM_URL, help="Cluster URL; the _bulk path is appended.")
+    parser.add_argument('--output', help="Append the NDJSON to this file instead of sending it.")
+    parser.add_argument('--stub', action='store_true', help="Send to an in-process stub _bulk endpoint.")
+    parser.add_argument('--stub-reject-rate', type=float, default=0.0,
+                        help="Share of documents the stub rejects with 429, to exercise resends.")
+    parser.add_argument('--sources', nargs='+', choices=['events', 'features', 'alerts'],
+                        default=['events', 'features', 'alerts'])
+    parser.add_argument('--index-prefix', default=INDEX_PREFIX)
+    parser.add_argument('--model-version', help="Score alerts with this registered model (default: the saved pickle).")
+    parser.add_argument('--batch-events', type=int, default=BATCH_EVENTS)
+    parser.add_argument('--batch-bytes', type=int, default=BATCH_BYTES)
+    parser.add_argument('--flush-seconds', type=float, default=FLUSH_SECONDS)
+    parser.add_argument('--in-flight', type=int, default=IN_FLIGHT, help="Concurrent _bulk requests.")
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    args = parser.parse_args()
+
+    stub = StubBulkServer(reject_rate=args.stub_reject_rate).start() if args.stub else None
+    target = args.output or (stub.url if stub else args.url)
+    documents = []
+    try:
+        if 'events' in args.sources:
+            documents.append(('raw events', event_documents(prefix=args.index_prefix)))
+        if 'features' in args.sources or 'alerts' in args.sources:
+            data = load_daily_features()
+        if 'features' in args.sources:
+            documents.append(('feature rows', feature_documents(data, prefix=args.index_prefix)))
+        if 'alerts' in args.sources:
+            if args.model_version:
+                model = load_model(args.model_version, n_jobs=-1)
+            else:
+                model = CompactForest.from_model(joblib.load(MODEL_FILE), n_jobs=-1)
+            alerts, count = alert_documents(model, data, AttackRuleIndex(load_rules()), prefix=args.index_prefix)
+            print(f"Scored {len(data)} user-days: {count} anomalies to ship.")
+            documents.append(('alerts', alerts))
+    except FileNotFoundError as e:
+        print(f"Error: '{e.filename}' not found. Run generate_logs.py, preprocess_data.py and train_model.py first.")
+        exit()
+
+    sink = BulkSink(target, args.batch_events, args.batch_bytes, args.flush_seconds, args.in_flight, args.retries)
+    print(f"📤 Shipping {', '.join(label for label, _ in documents)} to {target}...")
+    for label, chunks in documents:
+        for lines in chunks:
+            sink.add(lines)
+    sink.close()
+    print(sink.summary())
+    for error in sink.errors:
+        print(f"  ⚠️ {error}")
+    if stub is not None:
+        stub.stop()
+        print(f"Stub received {sum(stub.documents.values())} documents over {stub.connections} connections: "
+              f"{dict(stub.documents)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Hyperparameter sweep for the insider threat IsolationForest.
+
+Loads the feature matrix once, fits every combination of n_estimators,
+max_samples and max_features across a process pool, and evaluates each
+contamination setting on the same fit (contamination only moves the score
+threshold). Every configuration is scored on how many of the injected
+insider days it flags and on its false-positive rate over all other
+user-days, next to its training and scoring cost.
+
+    python sweep_model.py --workers 4
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from feature_store import load_daily_features
+
+# --- Configuration ---
+SWEEP_FILE = 'sweep_results.csv'
+INSIDER_USERNAME = 'alex.doe'
+SCENARIO_END = '2025-09-30'  # generate_logs.py's END_DATE; the insider scenario is planted relative to it
+GRID = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_samples': [64, 128, 256, 512],
+    'max_features': [0.5, 0.8, 1.0],
+    'contamination': ['auto', 0.005, 0.01, 0.02],
+}
+
+_matrix = None  # the feature matrix, sent to each worker once
+
+
+def insider_days(data, username=INSIDER_USERNAME, end=None):
+    """Row mask of the user-days generate_logs.py injected the insider scenario into.
+
+    The generator plants late-night logins on the weekdays from end-7 to end-3
+    and the exfiltration on end-3, where end is the last day of the logs.
+    """
+    dates = pd.to_datetime(data['date'])
+    end = dates.max() if end is None else pd.Timestamp(end)
+    window = (dates >= end - timedelta(days=7)) & (dates <= end - timedelta(days=3)) & (dates.dt.weekday < 5)
+    return (data['username'].astype(str) == username).to_numpy() & window.to_numpy()
+
+
+def _init_worker(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+def _fit_and_score(params, seed):
+    """Worker task: fits one configuration and returns its raw scores and timings."""
+    model = IsolationForest(**params, contamination='auto', random_state=seed, n_jobs=1)
+    started = time.perf_counter()
+    model.fit(_matrix)
+    fit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    scores = model.score_samples(_matrix)
+    score_seconds = time.perf_counter() - started
+    nodes = sum(estimator.tree_.node_count for estimator in model.estimators_)
+    return scores, fit_seconds, score_seconds, nodes
+
+
+def evaluate(scores, contamination, labels):
+    """Detection metrics for one contamination setting applied to raw score_samples output."""
+    offset = -0.5 if contamination == 'auto' else np.percentile(scores, 100.0 * contamination)
+    flagged = scores - offset < 0
+    negatives = max(int((~labels).sum()), 1)
+    # Rank of the insider's most anomalous day among all user-days (1 = top alert).
+    best_rank = int((scores < scores[labels].min()).sum()) + 1 if labels.any() else None
+    return {
+        'insider_days_flagged': int((flagged & labels).sum()),
+        'insider_recall': round(float((flagged & labels).sum() / max(int(labels.sum()), 1)), 4),
+        'false_positive_rate': round(float((flagged & ~labels).sum() / negatives), 6),
+        'alerts': int(flagged.sum()),
+        'insider_best_rank': best_rank,
+    }
+
+
+def run_sweep(data, feature_columns, grid=None, workers=None, seed=42, labels=None):
+    """One row per configuration: parameters, detection metrics and cost. `grid` defaults to GRID."""
+    grid = GRID if grid is None else grid
+    matrix = data[feature_columns].to_numpy(dtype=np.float32)
+    labels = insider_days(data) if labels is None else labels
+    fits = [dict(zip(('n_estimators', 'max_samples', 'max_features'), values))
+            for values in itertools.product(grid['n_estimators'], grid['max_samples'], grid['max_features'])]
+    for params in fits:
+        params['max_samples'] = min(params['max_samples'], len(matrix))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+        futures = [pool.submit(_fit_and_score, params, seed) for params in fits]
+        for params, future in zip(fits, futures):
+            scores, fit_seconds, score_seconds, nodes = future.result()
+            for contamination in grid['contamination']:
+                results.append({
+                    **params,
+                    'contamination': contamination,
+                    **evaluate(scores, contamination, labels),
+                    'fit_seconds': round(fit_seconds, 4),
+                    'score_us_per_row': round(score_seconds * 1e6 / len(matrix), 3),
+                    'tree_nodes': nodes,
+                })
+    return pd.DataFrame(results)
+
+
+def cheapest_catching(results, min_recall=1.0, max_fpr=0.02):
+    """Lowest-cost configuration that flags at least `min_recall` of the insider days within `max_fpr`."""
+    catching = results[(results['insider_recall'] >= min_recall) & (results['false_positive_rate'] <= max_fpr)]
+    if catching.empty:
+        return None
+    # Seconds to fit once plus seconds to score a million user-days (us/row == s per 1M rows).
+    cost = catching['fit_seconds'] + catching['score_us_per_row']
+    return catching.assign(cost=cost).sort_values(['cost', 'false_positive_rate']).iloc[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-recall', type=float, default=1.0,
+                        help="Share of insider days a configuration must flag to be recommended.")
+    parser.add_argument('--max-fpr', type=float, default=0.02,
+                        help="Highest false-positive rate a recommended configuration may have.")
+    parser.add_argument('--out', default=SWEEP_FILE, help="CSV file for the full results table.")
+    args = parser.parse_args()
+
+    try:
+        data = load_daily_features()
+    except FileNotFoundError:
+        print("Error: 'daily_user_features.csv' not found. Please run preprocess_data.py first.")
+        exit()
+    feature_columns = [c for c in data.columns if c not in ('username', 'date')]
+    labels = insider_days(data)
+    n_fits = np.prod([len(GRID[k]) for k in ('n_estimators', 'max_samples', 'max_features')])
+    print(f"Sweeping {n_fits} fits x {len(GRID['contamination'])} contamination settings over {len(data):,} "
+          f"user-days ({int(labels.sum())} injected insider days) on {args.workers or os.cpu_count()} workers...")
+
+    started = time.perf_counter()
+    results = run_sweep(data, feature_columns, workers=args.workers, seed=args.seed, labels=labels)
+    print(f"Sweep finished in {time.perf_counter() - started:.1f}s.")
+    results.to_csv(args.out, index=False)
+    print(f"Full results saved to '{args.out}'.\n")
+
+    columns = ['n_estimators', 'max_samples', 'max_features', 'contamination', 'insider_recall',
+               'false_positive_rate', 'alerts', 'insider_best_rank', 'fit_seconds', 'score_us_per_row']
+    print("Best detection (highest insider recall, then fewest false positives):")
+    print(results.sort_values(['insider_recall', 'false_positive_rate', 'fit_seconds'],
+                              ascending=[False, True, True]).head(10)[columns].to_string(index=False))
+
+    best = cheapest_catching(results, args.min_recall, args.max_fpr)
+    if best is None:
+        print(f"\n⚠️ No configuration flagged {args.min_recall:.0%} of the insider days "
+              f"with a false-positive rate under {args.max_fpr:.2%}.")
+    else:
+        print(f"\n✅ Cheapest configuration catching {args.min_recall:.0%} of the insider days "
+              f"under {args.max_fpr:.2%} false positives: "
+              f"n_estimators={best['n_estimators']}, max_samples={best['max_samples']}, "
+              f"max_features={best['max_features']}, contamination={best['contamination']!r} "
+              f"(FPR {best['false_positive_rate']:.2%}, fit {best['fit_seconds']:.2f}s, "
+              f"{best['score_us_per_row']:.1f} us/row)")
+
+
+if __name__ == "__main__":
+    main()
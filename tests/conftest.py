@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from feature_engine import LOG_FILES, fused_daily_features, load_logs  # noqa: E402
+
+# The last three weeks of the shipped logs: small, and still holding the insider scenario.
+FIXTURE_START = '2025-09-08'
+
+
+@pytest.fixture(scope='session')
+def log_files(tmp_path_factory):
+    """{source: path} of the fixture logs, written exactly as the shipped CSVs are."""
+    directory = tmp_path_factory.mktemp('logs')
+    files = {}
+    for source, name in LOG_FILES.items():
+        logs = pd.read_csv(os.path.join(ROOT, name), dtype=str, keep_default_na=False)
+        files[source] = str(directory / name)
+        logs[logs['timestamp'] >= FIXTURE_START].to_csv(files[source], index=False)
+    return files
+
+
+@pytest.fixture(scope='session')
+def batch_features(log_files):
+    """The in-memory batch output every other mode must reproduce."""
+    return fused_daily_features(load_logs(log_files))
+
+
+def normalized(daily_features):
+    """Feature table with plain string usernames and Timestamp dates, for comparisons across modes."""
+    daily_features = daily_features.copy()
+    daily_features['username'] = daily_features['username'].astype(str)
+    daily_features['date'] = pd.to_datetime(daily_features['date']).astype('datetime64[ns]')
+    return daily_features.sort_values(['username', 'date']).reset_index(drop=True)
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from access_policy import CRITICAL_FILES, HOME_DIR, ROLE_PATHS, AccessPolicy, load_user_roles
+from log_schema import split_filepaths
+
+USER_ROLES = {'ann': 'developer', 'sam': 'sales', 'sid': 'senior_developer'}
+
+
+def classify(policy, rows):
+    """(out-of-role, critical) per (username, filepath) row, through the same split the features use."""
+    frame = pd.DataFrame(rows, columns=['username', 'filepath'])
+    directories, filenames = split_filepaths(frame['filepath'])
+    out_of_role, critical = policy.classify(frame['username'], directories, filenames)
+    return out_of_role.tolist(), critical.tolist()
+
+
+def reference(username, filepath, user_roles):
+    """One row classified straight from the policy lists, with no trie, table or codes."""
+    role = user_roles.get(username, 'developer')
+    directory = filepath.rpartition('/')[0] + '/'
+    in_role = (any(directory.startswith(prefix) for prefix in ROLE_PATHS[role])
+               or directory.startswith(f'{HOME_DIR}{username}/'))
+    return not in_role, filepath in CRITICAL_FILES
+
+
+def test_out_of_role_prefixes():
+    policy = AccessPolicy(user_roles=USER_ROLES)
+    out_of_role, _ = classify(policy, [
+        ('ann', '/src/project-phoenix/main.py'),
+        ('ann', '/src/project-phoenix/core/deep/util.py'),
+        ('ann', '/src/project-valhalla/main.py'),
+        ('sid', '/src/project-valhalla/main.py'),
+        ('sam', '/marketing/campaigns/fall.txt'),
+        ('sam', '/src/project-phoenix/main.py'),
+        # A shared spelling is not a shared directory.
+        ('ann', '/src/project-phoenix-old/main.py'),
+    ])
+    assert out_of_role == [False, False, True, False, False, True, True]
+
+
+def test_home_directory_is_in_role_for_its_owner_only():
+    policy = AccessPolicy(user_roles=USER_ROLES)
+    out_of_role, _ = classify(policy, [
+        ('ann', '/home/ann/notes.txt'),
+        ('ann', '/home/ann/drafts/plan.md'),
+        ('ann', '/home/sam/notes.txt'),
+        ('sam', '/home/sam/notes.txt'),
+        ('ann', '/home/annabel/notes.txt'),
+    ])
+    assert out_of_role == [False, False, True, False, True]
+
+
+def test_critical_files():
+    policy = AccessPolicy(user_roles=USER_ROLES)
+    _, critical = classify(policy, [
+        ('sam', '/sales/client-prospects/q3_targets.csv'),
+        ('ann', '/sales/client-prospects/q3_targets.csv'),
+        ('sam', '/sales/client-prospects/q4_targets.csv'),
+        ('sid', '/design/database-schemas/main_schema.sql'),
+        ('sid', '/design/main_schema.sql'),
+    ])
+    assert critical == [True, True, False, True, False]
+
+
+def test_users_missing_from_the_roles_file_get_the_default_role(tmp_path):
+    path = tmp_path / 'user_roles.csv'
+    pd.DataFrame({'username': list(USER_ROLES), 'role': list(USER_ROLES.values())}).to_csv(path, index=False)
+    user_roles = load_user_roles(str(path))
+    assert user_roles == USER_ROLES
+    assert load_user_roles(str(tmp_path / 'missing.csv')) == {}
+
+    policy = AccessPolicy(user_roles=user_roles)
+    assert policy.role_of('newcomer') == 'developer'
+    out_of_role, _ = classify(policy, [('newcomer', '/src/project-phoenix/main.py'),
+                                       ('newcomer', '/sales/client-prospects/leads.csv')])
+    assert out_of_role == [False, True]
+
+
+def test_memoized_table_agrees_with_uncached_classification(log_files):
+    logs = pd.read_csv(log_files['file'], dtype=str, keep_default_na=False)
+    user_roles = {username: ('sales' if i % 3 == 0 else 'senior_developer' if i % 3 == 1 else 'developer')
+                  for i, username in enumerate(sorted(logs['username'].unique()))}
+    # Mix in paths the generator never draws: other homes, own home, critical files.
+    usernames = logs['username'].to_numpy()
+    extra = [(u, f'{HOME_DIR}{u}/a.txt') for u in usernames[:50]] + \
+            [(u, f'{HOME_DIR}{v}/a.txt') for u, v in zip(usernames[:50], usernames[50:100])] + \
+            [(u, path) for u in usernames[:20] for path in CRITICAL_FILES]
+    rows = list(zip(logs['username'], logs['filepath'])) + extra
+    del user_roles[usernames[0]]
+
+    policy = AccessPolicy(user_roles=user_roles)
+    expected = np.array([reference(u, path, user_roles) for u, path in rows])
+    # Twice through the same policy: the second call is served from the memoized table.
+    for _ in range(2):
+        out_of_role, critical = classify(policy, rows)
+        np.testing.assert_array_equal(out_of_role, expected[:, 0])
+        np.testing.assert_array_equal(critical, expected[:, 1])
+    # Smaller frames reuse rows of the table built for the large one, in another order.
+    for start in range(0, len(rows), 4999):
+        chunk = rows[start:start + 4999][::-1]
+        out_of_role, critical = classify(policy, chunk)
+        np.testing.assert_array_equal(out_of_role, expected[start:start + 4999][::-1, 0])
+        np.testing.assert_array_equal(critical, expected[start:start + 4999][::-1, 1])
@@ -0,0 +1,66 @@
+import threading
+
+import pandas as pd
+
+from alert_store import ACTION_TAKEN, PENDING, AlertStore, expand_json
+
+COLUMNS = ['login_count', 'usb_connection_count']
+
+
+def alerts(rows):
+    """rows of (username, date, score, usb_connection_count)."""
+    return pd.DataFrame([{'username': u, 'date': d, 'anomaly_score': s, 'login_count': 1, 'usb_connection_count': usb}
+                         for u, d, s, usb in rows])
+
+
+def test_upsert_keeps_actioned_status(tmp_path):
+    store = AlertStore(str(tmp_path / 'alerts.db'))
+    store.sync('v1', 'd1', alerts([('ann', '2025-09-08', -0.2, 1), ('bob', '2025-09-08', -0.1, 0),
+                                   ('cy', '2025-09-09', -0.05, 0)]), COLUMNS)
+    assert store.set_status('v1', [('ann', '2025-09-08')], ACTION_TAKEN, 'analyst', 'LOCK_NOW') == 1
+
+    # Rescored: ann is no longer flagged and bob's score changed; cy is gone, dan is new.
+    store.sync('v1', 'd2', alerts([('bob', '2025-09-08', -0.3, 2), ('dan', '2025-09-10', -0.01, 0)]), COLUMNS)
+    page = store.page('v1').set_index('username')
+
+    assert set(page.index) == {'ann', 'bob', 'dan'}
+    assert page.at['ann', 'status'] == ACTION_TAKEN and page.at['ann', 'updated_by'] == 'analyst'
+    assert page.at['bob', 'status'] == PENDING and page.at['bob', 'anomaly_score'] == -0.3
+    assert expand_json(page.loc[['bob']], 'features').at['bob', 'usb_connection_count'] == 2
+    assert store.status_counts('v1') == {ACTION_TAKEN: 1, PENDING: 2}
+    assert store.synced_data_version('v1') == 'd2'
+    assert store.actions('v1')[['username', 'status', 'detail']].values.tolist() == [['ann', ACTION_TAKEN, 'LOCK_NOW']]
+
+
+def test_versions_are_independent_and_pages_are_ordered(tmp_path):
+    store = AlertStore(str(tmp_path / 'alerts.db'))
+    rows = [(f'user{i:02d}', '2025-09-08', -i / 100, 0) for i in range(1, 8)]
+    store.sync('v1', 'd1', alerts(rows), COLUMNS)
+    store.sync('v2', 'd1', alerts(rows[:2]), COLUMNS)
+
+    pages = [store.page('v1', page=i, page_size=3)['username'].tolist() for i in range(3)]
+    assert pages == [['user07', 'user06', 'user05'], ['user04', 'user03', 'user02'], ['user01']]
+    assert store.count('v2') == 2 and store.flagged_users('v2') == ['user02', 'user01']
+
+
+def test_concurrent_writers_queue_instead_of_failing(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    store = AlertStore(path)
+    rows = [(f'user{i:02d}', '2025-09-08', -0.1, 0) for i in range(40)]
+    store.sync('v1', 'd1', alerts(rows), COLUMNS)
+    errors = []
+
+    def act(i):
+        try:
+            AlertStore(path).set_status('v1', [(f'user{i:02d}', '2025-09-08')], ACTION_TAKEN, f'analyst{i}')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=act, args=(i,)) for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.status_counts('v1') == {ACTION_TAKEN: 40}
+    assert len(store.actions('v1', limit=100)) == 40
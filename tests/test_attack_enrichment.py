@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from attack_enrichment import DEFAULT_ATTACK_RULES, OPERATORS, TECHNIQUES_COLUMN, AttackRuleIndex, load_rules
+
+RULES = DEFAULT_ATTACK_RULES + [
+    # A second rule for an existing technique, and every operator at least once.
+    {'technique': 'T1052', 'name': 'Exfiltration Over Physical Medium', 'all': [['a', '>=', 3], ['b', '<', 2]]},
+    {'technique': 'T9001', 'all': [['a', '==', 1], ['b', '!=', 1]]},
+    {'technique': 'T9002', 'all': [['a', '<=', 0]]},
+]
+
+
+def reference_tags(rules, frame):
+    """Technique -> row mask, evaluated rule by rule and row by row."""
+    tags = {}
+    for rule in rules:
+        hits = [all(OPERATORS[op](row[column], value) for column, op, value in rule['all'])
+                for _, row in frame.iterrows()]
+        tags[rule['technique']] = np.logical_or(tags.get(rule['technique'], False), hits)
+    return tags
+
+
+@pytest.fixture
+def frame(batch_features):
+    rng = np.random.default_rng(0)
+    frame = batch_features.sample(400, random_state=0).reset_index(drop=True)
+    # Personal mail with a large attachment is rare in a sample; plant some, alone and together.
+    frame.loc[::7, 'personal_emails_sent_count'] += 1
+    frame.loc[::3, 'large_attachments_sent_count'] += 1
+    return frame.assign(a=rng.integers(0, 5, len(frame)), b=rng.integers(0, 3, len(frame)))
+
+
+def test_masks_match_rule_by_rule_evaluation(frame):
+    index = AttackRuleIndex(RULES)
+    assert index.techniques == ['T1052', 'T1048', 'T1083', 'T1005', 'T1078', 'T9001', 'T9002']
+    # Shared conditions are compiled once.
+    assert len(index.conditions) == 10
+    masks = index.masks(frame)
+    for technique, expected in reference_tags(RULES, frame).items():
+        np.testing.assert_array_equal(masks[:, index.techniques.index(technique)], expected, err_msg=technique)
+    assert masks.any(axis=0).all() and not masks.all(axis=0).any()
+
+
+def test_tags_label_each_row_with_its_techniques(frame):
+    index = AttackRuleIndex(RULES)
+    tags = index.tag(frame)
+    assert list(tags.columns) == index.flag_columns + [TECHNIQUES_COLUMN]
+    assert tags.index.equals(frame.index)
+    masks = index.masks(frame)
+    for row, label in zip(masks, tags[TECHNIQUES_COLUMN]):
+        assert label == ', '.join(t for t, hit in zip(index.techniques, row) if hit)
+    enriched = index.enrich(frame)
+    pd.testing.assert_frame_equal(enriched[frame.columns], frame)
+
+
+def test_insider_days_carry_the_planted_techniques(batch_features):
+    tags = AttackRuleIndex().enrich(batch_features)
+    dates = pd.to_datetime(tags['date'])
+    insider = tags[(tags['username'] == 'alex.doe') & dates.between('2025-09-23', '2025-09-26')]
+    assert len(insider) == 4
+    assert insider[TECHNIQUES_COLUMN].str.contains('T1078').all()
+
+
+def test_rule_validation():
+    with pytest.raises(ValueError, match='Unknown operator'):
+        AttackRuleIndex([{'technique': 'T1', 'all': [['a', '=>', 1]]}])
+    with pytest.raises(ValueError, match='62'):
+        AttackRuleIndex([{'technique': f'T{i}', 'all': [['a', '>', i]]} for i in range(63)])
+
+
+def test_load_rules_and_describe(tmp_path):
+    assert load_rules(str(tmp_path / 'missing.json')) is DEFAULT_ATTACK_RULES
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(RULES[-2:]))
+    index = AttackRuleIndex(load_rules(str(path)))
+    assert index.techniques == ['T9001', 'T9002']
+    assert AttackRuleIndex().describe('T1052, T1078') == 'T1052 Exfiltration Over Physical Medium; T1078 Valid Accounts'
+    assert index.describe('T9001, T9002') == 'T9001; T9002' and index.describe('') == ''
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from anomaly_explainer import feature_contributions
+from compact_forest import ROW_BLOCK, CompactForest
+from feature_engine import FEATURE_COLUMNS
+
+
+@pytest.fixture(scope='module')
+def features(batch_features):
+    return batch_features[FEATURE_COLUMNS]
+
+
+@pytest.mark.parametrize('params', [
+    {'n_estimators': 50, 'random_state': 42},
+    {'n_estimators': 7, 'max_samples': 64, 'contamination': 0.05, 'random_state': 1},
+    {'n_estimators': 20, 'max_samples': 1.0, 'max_features': 0.5, 'bootstrap': True, 'random_state': 3},
+])
+def test_scores_match_sklearn(features, params):
+    model = IsolationForest(**params).fit(features)
+    compact = CompactForest.from_model(model)
+    np.testing.assert_allclose(compact.score_samples(features), model.score_samples(features), rtol=1e-12)
+    np.testing.assert_allclose(compact.decision_function(features), model.decision_function(features), atol=1e-12)
+    np.testing.assert_array_equal(compact.predict(features), model.predict(features))
+
+
+def test_large_batches_threads_and_repeated_rows_match_sklearn(features):
+    model = IsolationForest(n_estimators=30, random_state=0).fit(features)
+    rng = np.random.default_rng(0)
+    # Past one row block, with many repeated rows and some fractional values near thresholds.
+    rows = features.iloc[rng.integers(0, len(features), ROW_BLOCK * 2 + 17)].reset_index(drop=True).astype(float)
+    rows.iloc[::5] = rows.iloc[::5] + rng.normal(0, 0.5, size=rows.iloc[::5].shape)
+    expected = model.decision_function(rows)
+    for n_jobs in (1, 2):
+        compact = CompactForest.from_model(model, n_jobs=n_jobs)
+        np.testing.assert_allclose(compact.decision_function(rows), expected, atol=1e-12)
+
+
+def test_score_row_and_column_order(features):
+    model = IsolationForest(n_estimators=25, random_state=7).fit(features)
+    compact = CompactForest.from_model(model)
+    expected = model.decision_function(features.iloc[:50])
+    for i in range(50):
+        row = features.iloc[i]
+        assert compact.score_row(row.to_numpy()) == pytest.approx(expected[i], abs=1e-12)
+        assert compact.score_row(row.to_dict()) == pytest.approx(expected[i], abs=1e-12)
+    shuffled = features.iloc[:50][list(reversed(FEATURE_COLUMNS))]
+    np.testing.assert_allclose(compact.decision_function(shuffled), expected, atol=1e-12)
+
+
+def test_save_and_memory_mapped_load(features, tmp_path):
+    model = IsolationForest(n_estimators=10, random_state=0).fit(features)
+    CompactForest.from_model(model).save(str(tmp_path))
+    loaded = CompactForest.load(str(tmp_path))
+    assert list(loaded.feature_names_in_) == FEATURE_COLUMNS
+    np.testing.assert_allclose(loaded.decision_function(features), model.decision_function(features), atol=1e-12)
+
+
+def test_path_attributions_credit_the_isolating_feature():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000, 3)), columns=['a', 'b', 'c'])
+    compact = CompactForest.from_model(IsolationForest(n_estimators=100, random_state=0).fit(X))
+    outliers = pd.DataFrame([[0.0, 8.0, 0.0], [0.0, 0.0, -8.0]], columns=['a', 'b', 'c'])
+    attributions = compact.path_attributions(pd.concat([outliers, X.iloc[:10]], ignore_index=True)).to_numpy()
+    assert attributions.shape == (12, 3)
+    assert (attributions >= 0).all()
+    assert attributions[:2].argmax(axis=1).tolist() == [1, 2]
+    # Outliers are isolated after fewer splits, so on average their splits carry more weight.
+    assert attributions[:2].sum(axis=1).min() > attributions[2:].sum(axis=1).mean()
+
+
+def test_path_attributions_are_labelled_with_the_model_features():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000, 3)), columns=['a', 'b', 'c'])
+    compact = CompactForest.from_model(IsolationForest(n_estimators=100, random_state=0).fit(X))
+    outliers = pd.DataFrame([[0.0, 8.0, 0.0], [0.0, 0.0, -8.0]], columns=['a', 'b', 'c'], index=[7, 9])
+    # Columns in another order than the model's: the labels must still name the isolating feature.
+    attributions = compact.path_attributions(outliers[['c', 'b', 'a']])
+    assert list(attributions.columns) == ['a', 'b', 'c']
+    assert list(attributions.index) == [7, 9]
+    assert attributions.idxmax(axis=1).tolist() == ['b', 'c']
+    # And the explainer, which reorders nothing itself, names the same features.
+    contributions = feature_contributions(compact, outliers[['c', 'b', 'a']], X[['c', 'b', 'a']])
+    assert contributions.idxmax(axis=1).tolist() == ['b', 'c']
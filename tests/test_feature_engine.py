@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+
+from conftest import normalized
+from feature_engine import (FEATURE_COLUMNS, INDICATORS, KEYS, PARALLEL_SPLIT_BYTES, DailyCounters,
+                            fused_daily_features, load_logs, login_indicators, parallel_daily_features, split_log,
+                            stream_daily_features)
+from log_schema import days_to_timestamps
+
+
+@pytest.mark.parametrize('chunksize', [97, 1_000_000])
+def test_streaming_matches_batch(log_files, batch_features, chunksize):
+    streamed = stream_daily_features(log_files, chunksize=chunksize)
+    pd.testing.assert_frame_equal(normalized(streamed), normalized(batch_features))
+
+
+def test_daily_counters_compaction_keeps_sums():
+    logins = pd.DataFrame({
+        'timestamp': ['2025-09-08 07:00:00', '2025-09-08 09:00:00', '2025-09-09 21:00:00'] * 4,
+        'username': ['a', 'b', 'a'] * 4,
+        'action': 'login',
+        'success': [True, False, True] * 4,
+    })
+    counters = DailyCounters(compact_rows=1)
+    for start in range(0, len(logins), 2):
+        counters.add(login_indicators(logins.iloc[start:start + 2]))
+    totals = counters.totals().sort_index()
+    assert totals['login_count'].tolist() == [4, 4, 4]
+    assert totals['failed_login_count'].tolist() == [0, 0, 4]
+    assert totals['after_hours_login_count'].tolist() == [4, 4, 0]
+
+
+def test_batch_fixture_covers_the_insider(batch_features):
+    insider = batch_features[batch_features['username'].astype(str) == 'alex.doe']
+    assert list(batch_features.columns) == KEYS + FEATURE_COLUMNS
+    assert insider['critical_file_access_count'].sum() > 0
+    assert insider['after_hours_login_count'].sum() > 0
+
+
+def write_logs(directory, rows):
+    files = {}
+    for source, records in rows.items():
+        files[source] = str(directory / f'{source}.csv')
+        pd.DataFrame(records).to_csv(files[source], index=False)
+    return files
+
+
+def test_fused_counts_every_feature(tmp_path):
+    files = write_logs(tmp_path, {
+        'login': [
+            {'timestamp': '2025-09-08 07:30:00', 'username': 'ann', 'action': 'login', 'success': True},
+            {'timestamp': '2025-09-08 10:00:00', 'username': 'ann', 'action': 'login', 'success': False},
+            {'timestamp': '2025-09-08 09:00:00', 'username': 'bob', 'action': 'login', 'success': True},
+            {'timestamp': '2025-09-09 21:00:00', 'username': 'ann', 'action': 'login', 'success': True},
+        ],
+        'file': [
+            {'timestamp': '2025-09-08 10:05:00', 'username': 'ann', 'action': 'file_read',
+             'filepath': '/src/project-phoenix/main.py'},
+            {'timestamp': '2025-09-08 10:06:00', 'username': 'ann', 'action': 'file_write',
+             'filepath': '/sales/client-prospects/q3_targets.csv'},
+            {'timestamp': '2025-09-08 10:07:00', 'username': 'bob', 'action': 'file_read',
+             'filepath': '/home/bob/notes.txt'},
+        ],
+        'usb': [
+            {'timestamp': '2025-09-08 11:00:00', 'username': 'ann', 'action': 'usb_connect', 'device_id': 'USB_1'},
+            {'timestamp': '2025-09-08 11:05:00', 'username': 'ann', 'action': 'usb_disconnect', 'device_id': 'USB_1'},
+        ],
+        'email': [
+            {'timestamp': '2025-09-08 12:00:00', 'username': 'ann', 'sender': 'ann@acme-corp.com',
+             'recipient': 'ann.home@gmail.com', 'subject': 'a', 'attachment': '1.2GB'},
+            {'timestamp': '2025-09-08 12:01:00', 'username': 'ann', 'sender': 'ann@acme-corp.com',
+             'recipient': 'x@gmail.com.evil.org', 'subject': 'b', 'attachment': '3MB'},
+            {'timestamp': '2025-09-08 12:02:00', 'username': 'bob', 'sender': 'bob@acme-corp.com',
+             'recipient': 'carl@acme-corp.com', 'subject': 'c', 'attachment': '6.5MB'},
+            # No login that day, so the user-day is not part of the table.
+            {'timestamp': '2025-09-09 12:00:00', 'username': 'bob', 'sender': 'bob@acme-corp.com',
+             'recipient': 'bob@yahoo.com', 'subject': 'd', 'attachment': None},
+        ],
+    })
+    expected = pd.DataFrame({
+        'username': ['ann', 'ann', 'bob'],
+        'date': pd.to_datetime(['2025-09-08', '2025-09-09', '2025-09-08']).astype('datetime64[ns]'),
+        'login_count': [2, 1, 1],
+        'failed_login_count': [1, 0, 0],
+        'after_hours_login_count': [1, 1, 0],
+        'file_access_count': [2, 0, 1],
+        'unusual_dir_access_count': [1, 0, 0],
+        'file_write_count': [1, 0, 0],
+        'critical_file_access_count': [1, 0, 0],
+        'usb_connection_count': [1, 0, 0],
+        'emails_sent_count': [2, 0, 1],
+        'personal_emails_sent_count': [1, 0, 0],
+        'large_attachments_sent_count': [1, 0, 1],
+    })[KEYS + FEATURE_COLUMNS]
+    fused = fused_daily_features(load_logs(files))
+    pd.testing.assert_frame_equal(normalized(fused), expected)
+
+
+def test_fused_matches_per_feature_groupby(batch_features, log_files):
+    """Each fused column equals a plain filter + groupby count of its indicator, left-joined on the logins."""
+    expected = normalized(batch_features)
+    for source, df in load_logs(log_files).items():
+        indicators = INDICATORS[source](df)
+        indicators['username'] = indicators['username'].astype(str)
+        indicators['date'] = days_to_timestamps(indicators['date']).astype('datetime64[ns]')
+        for column in indicators.columns.drop(KEYS):
+            counts = indicators[indicators[column] > 0].groupby(KEYS).size().rename(column).reset_index()
+            merged = expected[KEYS].merge(counts, on=KEYS, how='left').fillna(0)
+            pd.testing.assert_series_equal(merged[column].astype(int), expected[column].astype(int))
+
+
+@pytest.mark.parametrize('split_bytes', [16 * 1024, PARALLEL_SPLIT_BYTES])
+def test_parallel_matches_batch(log_files, batch_features, split_bytes):
+    parallel = parallel_daily_features(log_files, workers=2, split_bytes=split_bytes)
+    pd.testing.assert_frame_equal(normalized(parallel), normalized(batch_features))
+
+
+def test_split_log_covers_the_file_in_line_aligned_ranges(log_files):
+    path = log_files['file']
+    ranges = split_log(path, 16 * 1024)
+    assert len(ranges) > 1
+    with open(path, 'rb') as f:
+        header = len(f.readline())
+        f.seek(0)
+        data = f.read()
+    assert ranges[0][0] == header and ranges[-1][1] == len(data)
+    days = []
+    for (start, end), (next_start, _) in zip(ranges, ranges[1:] + [(len(data), None)]):
+        assert end == next_start and data[start - 1:start] == b'\n'
+        lines = data[start:end].splitlines()
+        days.append((lines[0][:10], lines[-1][:10]))
+    # Logs are in timestamp order, so ranges are runs of days (a long day may be cut mid-day).
+    for (_, last), (first, _) in zip(days, days[1:]):
+        assert last <= first
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from conftest import normalized
+from feature_store import (export_csv, features_version, load_daily_features, read_features, read_log, write_features,
+                           write_log)
+
+
+def test_round_trip(batch_features, tmp_path):
+    write_features(batch_features, root=str(tmp_path))
+    pd.testing.assert_frame_equal(normalized(read_features(root=str(tmp_path))), normalized(batch_features))
+
+
+def test_projection_and_filters(batch_features, tmp_path):
+    write_features(batch_features, root=str(tmp_path))
+    subset = read_features(['usb_connection_count'], start='2025-09-20', end='2025-09-26', users=['alex.doe'],
+                           root=str(tmp_path))
+    expected = normalized(batch_features)
+    expected = expected[(expected['username'] == 'alex.doe') & expected['date'].between('2025-09-20', '2025-09-26')]
+    assert list(subset.columns) == ['username', 'date', 'usb_connection_count']
+    pd.testing.assert_frame_equal(normalized(subset), expected[list(subset.columns)].reset_index(drop=True))
+
+
+def test_upsert_replaces_only_the_given_dates(batch_features, tmp_path):
+    root = str(tmp_path)
+    write_features(batch_features, root=root)
+    version = features_version(root)
+    changed = batch_features.copy()
+    changed['login_count'] += 10
+    write_features(changed, root=root, dates=['2025-09-15'])
+
+    stored = normalized(read_features(root=root))
+    expected = normalized(batch_features)
+    day = expected['date'] == '2025-09-15'
+    expected.loc[day, 'login_count'] += 10
+    assert day.any()
+    pd.testing.assert_frame_equal(stored, expected)
+    assert features_version(root) != version
+
+
+def test_csv_fallback_and_export(batch_features, tmp_path):
+    csv_path = str(tmp_path / 'daily_user_features.csv')
+    batch_features.to_csv(csv_path, index=False)
+    from_csv = load_daily_features(['login_count'], start='2025-09-10', users=['alex.doe'],
+                                   root=str(tmp_path / 'missing'), csv_path=csv_path)
+    write_features(batch_features, root=str(tmp_path / 'store'))
+    from_store = load_daily_features(['login_count'], start='2025-09-10', users=['alex.doe'],
+                                     root=str(tmp_path / 'store'), csv_path=csv_path)
+    pd.testing.assert_frame_equal(normalized(from_csv), normalized(from_store))
+
+    exported = str(tmp_path / 'exported.csv')
+    export_csv(exported, root=str(tmp_path / 'store'))
+    pd.testing.assert_frame_equal(pd.read_csv(exported), pd.read_csv(csv_path))
+
+
+def test_raw_log_round_trip(log_files, tmp_path):
+    write_log('login', log_files['login'], root=str(tmp_path), chunksize=500)
+    stored = read_log('login', start='2025-09-15', end='2025-09-16', root=str(tmp_path))
+    logs = pd.read_csv(log_files['login'], parse_dates=['timestamp'])
+    logs = logs[logs['timestamp'].dt.strftime('%Y-%m-%d').between('2025-09-15', '2025-09-16')]
+    stored = stored.sort_values(['timestamp', 'username']).reset_index(drop=True)
+    logs = logs.sort_values(['timestamp', 'username']).reset_index(drop=True)
+    assert stored['username'].astype(str).tolist() == logs['username'].tolist()
+    assert (stored['timestamp'].to_numpy() == logs['timestamp'].to_numpy()).all()
+
+
+def test_default_run_after_a_parquet_run_is_what_readers_see(log_files, batch_features, tmp_path, monkeypatch):
+    import preprocess_data
+    from feature_engine import LOG_FILES
+    # The --parquet run sees only the first half of each log, the later default run all of it.
+    for source, name in LOG_FILES.items():
+        logs = pd.read_csv(log_files[source], dtype=str, keep_default_na=False)
+        logs.head(len(logs) // 2).to_csv(tmp_path / name, index=False)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('sys.argv', ['preprocess_data.py', '--parquet'])
+    preprocess_data.main()
+    version = features_version()
+    for source, name in LOG_FILES.items():
+        pd.read_csv(log_files[source], dtype=str, keep_default_na=False).to_csv(tmp_path / name, index=False)
+    monkeypatch.setattr('sys.argv', ['preprocess_data.py'])
+    preprocess_data.main()
+
+    pd.testing.assert_frame_equal(normalized(load_daily_features()), normalized(batch_features))
+    assert features_version() != version
@@ -0,0 +1,65 @@
+import filecmp
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from feature_engine import fused_daily_features, load_logs
+from generate_logs import FAST_LOG_COLUMNS, FAST_LOG_FILES, INSIDER_USERNAME, generate_logs_fast
+
+START, END = datetime(2025, 9, 1), datetime(2025, 9, 30)
+OUTPUTS = list(FAST_LOG_FILES.values()) + ['user_roles.csv']
+
+
+@pytest.fixture(scope='module')
+def fast_logs(tmp_path_factory):
+    """--fast output for one month: {source: path}."""
+    directory = tmp_path_factory.mktemp('fast')
+    generate_logs_fast(20, START, END, str(directory), seed=3, workers=1)
+    return {source: str(directory / name) for source, name in FAST_LOG_FILES.items()}
+
+
+@pytest.mark.parametrize('workers, days_per_shard', [(2, 7), (1, 1), (3, 30)])
+def test_output_does_not_depend_on_workers_or_sharding(fast_logs, tmp_path, workers, days_per_shard):
+    generate_logs_fast(20, START, END, str(tmp_path), seed=3, workers=workers, days_per_shard=days_per_shard)
+    reference = os.path.dirname(fast_logs['login'])
+    for name in OUTPUTS:
+        assert filecmp.cmp(os.path.join(reference, name), tmp_path / name, shallow=False), name
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.log-parts-')]
+
+
+def test_seed_changes_the_output(fast_logs, tmp_path):
+    totals = generate_logs_fast(20, START, END, str(tmp_path), seed=4, workers=1)
+    assert not filecmp.cmp(fast_logs['file'], tmp_path / FAST_LOG_FILES['file'], shallow=False)
+    for source, path in fast_logs.items():
+        assert totals[source] == len(pd.read_csv(tmp_path / FAST_LOG_FILES[source]))
+
+
+def test_logs_are_sorted_and_keep_the_schema(fast_logs):
+    for source, path in fast_logs.items():
+        logs = pd.read_csv(path, parse_dates=['timestamp'])
+        assert list(logs.columns) == FAST_LOG_COLUMNS[source]
+        assert logs['timestamp'].is_monotonic_increasing
+        assert logs['timestamp'].between(START, END + pd.Timedelta(days=1)).all()
+    roles = pd.read_csv(os.path.join(os.path.dirname(fast_logs['login']), 'user_roles.csv'))
+    assert len(roles) == 20 and roles['username'].is_unique
+    assert roles.set_index('username').at[INSIDER_USERNAME, 'role'] == 'senior_developer'
+
+
+def test_insider_scenario_is_planted(fast_logs):
+    features = fused_daily_features(load_logs(fast_logs))
+    features['username'] = features['username'].astype(str)
+    features['date'] = pd.to_datetime(features['date'])
+    insider = features[features['username'] == INSIDER_USERNAME].set_index('date')
+    # Late-night logins with critical-file reads on the scenario weekdays, end-7 .. end-3.
+    for day in pd.bdate_range(END - pd.Timedelta(days=7), END - pd.Timedelta(days=3)):
+        assert insider.at[day, 'after_hours_login_count'] > 0
+        assert insider.at[day, 'critical_file_access_count'] >= 2
+    # The exfiltration on end-3 (a Saturday here, so it has no login-anchored feature row): USB and private mail.
+    usb = pd.read_csv(fast_logs['usb'], parse_dates=['timestamp'])
+    assert set(usb['username']) == {INSIDER_USERNAME}
+    assert (usb['timestamp'].dt.normalize() == END - pd.Timedelta(days=3)).all()
+    email = pd.read_csv(fast_logs['email'], parse_dates=['timestamp'])
+    private = email[email['recipient'] == 'alex.doe.private@gmail.com']
+    assert len(private) == 1 and private['timestamp'].iloc[0].normalize() == END - pd.Timedelta(days=3)
@@ -0,0 +1,137 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from conftest import normalized
+from feature_store import STATE_DATASET, read_features
+import incremental_features
+from incremental_features import JOURNAL_DIR, incremental_daily_features, read_log_range
+from log_schema import days_to_timestamps
+
+
+def copy_head(log_files, directory, fraction):
+    """Copies of the logs cut after `fraction` of their lines; returns their paths and the cut-off tails."""
+    files, tails = {}, {}
+    for source, path in log_files.items():
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        cut = 1 + int((len(lines) - 1) * fraction)
+        files[source] = str(directory / os.path.basename(path))
+        with open(files[source], 'wb') as f:
+            f.writelines(lines[:cut])
+        tails[source] = b''.join(lines[cut:])
+    return files, tails
+
+
+def partition_files(root):
+    found = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            found[path] = os.stat(path).st_mtime_ns
+    return found
+
+
+def run(files, tmp_path):
+    return incremental_daily_features(files, str(tmp_path / 'watermarks.json'), str(tmp_path / 'store'),
+                                      chunksize=500)
+
+
+def test_incremental_matches_batch_and_rewrites_only_touched_dates(log_files, batch_features, tmp_path):
+    files, tails = copy_head(log_files, tmp_path, 0.8)
+    run(files, tmp_path)
+    before = partition_files(tmp_path / 'store')
+
+    for source, tail in tails.items():
+        with open(files[source], 'ab') as f:
+            f.write(tail)
+    _, touched = run(files, tmp_path)
+
+    touched_dates = {str(d.date()) for d in days_to_timestamps(touched.get_level_values('date').unique())}
+    after = partition_files(tmp_path / 'store')
+    untouched = [path for path in before if os.path.basename(os.path.dirname(path)).split('=')[1] not in touched_dates]
+    assert untouched
+    for path in untouched:
+        assert after.get(path) == before[path], f"{path} was rewritten though its date saw no new events"
+    assert len(touched) > 0
+    pd.testing.assert_frame_equal(normalized(read_features(root=str(tmp_path / 'store'))), normalized(batch_features))
+
+
+def test_no_new_rows_is_a_no_op(log_files, batch_features, tmp_path):
+    files, _ = copy_head(log_files, tmp_path, 1.0)
+    run(files, tmp_path)
+    daily_features, touched = run(files, tmp_path)
+    assert len(touched) == 0 and daily_features.empty
+    pd.testing.assert_frame_equal(normalized(read_features(root=str(tmp_path / 'store'))), normalized(batch_features))
+
+
+def test_regenerated_log_triggers_a_rebuild(log_files, batch_features, tmp_path):
+    files, _ = copy_head(log_files, tmp_path, 0.5)
+    run(files, tmp_path)
+    # Replaced with different contents, not appended to: the old counts must not survive.
+    for source, path in log_files.items():
+        shutil.copy(path, files[source])
+    with open(files['login'], 'rb') as f:
+        header, *lines = f.readlines()
+    with open(files['login'], 'wb') as f:
+        f.writelines([header] + lines[1:])
+    run(files, tmp_path)
+
+    stored = normalized(read_features(root=str(tmp_path / 'store')))
+    expected = normalized(batch_features)
+    first = lines[0].decode().split(',')
+    key = (expected['username'] == first[1]) & (expected['date'] == pd.Timestamp(first[0][:10]))
+    expected.loc[key, 'login_count'] -= 1
+    expected = expected[expected['login_count'] > 0].reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, expected)
+    assert os.path.isdir(tmp_path / 'store' / STATE_DATASET)
+
+
+class Killed(Exception):
+    pass
+
+
+def kill(*args, **kwargs):
+    raise Killed
+
+
+@pytest.mark.parametrize('step', ['write_journal', 'save_state', 'write_features', 'save_watermarks'])
+def test_run_killed_part_way_never_double_counts(log_files, batch_features, tmp_path, monkeypatch, step):
+    files, tails = copy_head(log_files, tmp_path, 0.8)
+    run(files, tmp_path)
+    for source, tail in tails.items():
+        with open(files[source], 'ab') as f:
+            f.write(tail)
+
+    if step == 'save_watermarks':
+        # Dies after the state and the features are written but before the watermarks are.
+        monkeypatch.setattr(incremental_features, step, kill)
+    else:
+        original = getattr(incremental_features, step)
+
+        def write_then_die(*args, **kwargs):
+            original(*args, **kwargs)
+            raise Killed
+        monkeypatch.setattr(incremental_features, step, write_then_die)
+    with pytest.raises(Killed):
+        run(files, tmp_path)
+    monkeypatch.undo()
+
+    run(files, tmp_path)
+    assert not os.path.exists(tmp_path / 'store' / JOURNAL_DIR)
+    pd.testing.assert_frame_equal(normalized(read_features(root=str(tmp_path / 'store'))), normalized(batch_features))
+    # And a further run with nothing new must not fold the same rows in again.
+    run(files, tmp_path)
+    pd.testing.assert_frame_equal(normalized(read_features(root=str(tmp_path / 'store'))), normalized(batch_features))
+
+
+def test_read_log_range_leaves_a_partial_line(tmp_path):
+    path = tmp_path / 'log.csv'
+    path.write_bytes(b'timestamp,username\n2025-09-08 09:00:00,ann\n2025-09-08 09:01:00,b')
+    chunks = list(read_log_range(str(path)))
+    assert len(chunks) == 1
+    chunk, offset = chunks[0]
+    assert chunk['username'].tolist() == ['ann']
+    assert offset == len(b'timestamp,username\n2025-09-08 09:00:00,ann\n')
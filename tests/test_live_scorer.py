@@ -0,0 +1,116 @@
+import os
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from compact_forest import CompactForest
+from conftest import normalized
+from feature_engine import FEATURE_COLUMNS
+from live_scorer import LiveScorer, LogTail
+from log_schema import days_to_timestamps
+
+HEADER = b'timestamp,username,action,success\n'
+
+
+def line(timestamp, username='ann'):
+    return f'{timestamp},{username},login,True\n'.encode()
+
+
+@pytest.fixture(scope='module')
+def model(batch_features):
+    return CompactForest.from_model(IsolationForest(n_estimators=50, random_state=0)
+                                    .fit(batch_features[FEATURE_COLUMNS]))
+
+
+def test_tail_returns_whole_lines_with_their_offsets(tmp_path):
+    path = tmp_path / 'login_logs.csv'
+    path.write_bytes(HEADER + line('2025-09-08 09:00:00'))
+    tail = LogTail(str(path), from_start=True)
+    chunk = tail.poll()
+    assert chunk['username'].tolist() == ['ann'] and chunk['_offset'].tolist() == [path.stat().st_size]
+
+    with open(path, 'ab') as f:
+        f.write(line('2025-09-08 09:05:00', 'bob') + b'2025-09-08 09:06')
+    chunk = tail.poll()
+    assert chunk['username'].tolist() == ['bob']
+    assert tail.poll() is None  # the partial line waits for its newline
+
+
+def test_tail_starts_at_the_end_unless_told_otherwise(tmp_path):
+    path = tmp_path / 'login_logs.csv'
+    path.write_bytes(HEADER + line('2025-09-08 09:00:00'))
+    tail = LogTail(str(path))
+    assert tail.poll() is None
+    with open(path, 'ab') as f:
+        f.write(line('2025-09-08 09:05:00', 'bob'))
+    assert tail.poll()['username'].tolist() == ['bob']
+
+
+def test_tail_rereads_a_truncated_file(tmp_path):
+    path = tmp_path / 'login_logs.csv'
+    path.write_bytes(HEADER + line('2025-09-08 09:00:00') + line('2025-09-08 09:01:00'))
+    tail = LogTail(str(path), from_start=True)
+    tail.poll()
+    with open(path, 'r+b') as f:  # same inode, shorter contents
+        f.truncate(0)
+        f.write(HEADER + line('2025-09-09 09:00:00', 'cid'))
+    chunk = tail.poll()
+    assert chunk['username'].tolist() == ['cid']
+    assert chunk['_offset'].tolist() == [path.stat().st_size]
+    assert tail.reopened == 1
+
+
+def test_tail_follows_a_rotated_file(tmp_path):
+    path = tmp_path / 'login_logs.csv'
+    path.write_bytes(HEADER + line('2025-09-08 09:00:00'))
+    tail = LogTail(str(path), from_start=True)
+    tail.poll()
+    # Rotated: moved aside and replaced by a new, already longer file.
+    os.rename(path, tmp_path / 'login_logs.csv.1')
+    path.write_bytes(HEADER + b''.join(line(f'2025-09-09 09:0{i}:00', f'user{i}') for i in range(5)))
+    assert tail.poll()['username'].tolist() == [f'user{i}' for i in range(5)]
+    assert tail.reopened == 1
+    assert tail.poll() is None
+
+
+def write_logs(log_files, directory, start=None, end=None):
+    """Copies of the fixture logs holding only rows with start <= timestamp < end."""
+    files = {}
+    for source, path in log_files.items():
+        logs = pd.read_csv(path, dtype=str, keep_default_na=False)
+        keep = pd.Series(True, index=logs.index)
+        if start is not None:
+            keep &= logs['timestamp'] >= start
+        if end is not None:
+            keep &= logs['timestamp'] < end
+        files[source] = str(directory / os.path.basename(path))
+        logs[keep].to_csv(files[source], index=False)
+    return files
+
+
+def test_vectors_match_the_batch_features_of_the_day(log_files, batch_features, model, tmp_path):
+    files = write_logs(log_files, tmp_path, '2025-09-24', '2025-09-25')
+    scorer = LiveScorer(model, files, from_start=True)
+    alerts = scorer.poll()
+
+    vectors = scorer.vectors[scorer.vectors['login_count'] > 0].fillna(0).astype('int64').rename_axis('username').reset_index()
+    vectors['date'] = days_to_timestamps([scorer.current_date])[0]
+    expected = normalized(batch_features)
+    expected = expected[expected['date'] == '2025-09-24'].reset_index(drop=True)
+    pd.testing.assert_frame_equal(normalized(vectors[expected.columns]), expected, check_dtype=False)
+    # Each alert is raised once, from a model score below zero.
+    assert len({a['username'] for a in alerts}) == len(alerts)
+    assert all(a['anomaly_score'] < 0 and a['date'] == '2025-09-24' for a in alerts)
+
+
+def test_events_for_a_rolled_over_day_are_counted_not_scored(log_files, model, tmp_path):
+    files = write_logs(log_files, tmp_path, '2025-09-24', '2025-09-25')
+    scorer = LiveScorer(model, files, from_start=True)
+    scorer.poll()
+    vectors = scorer.vectors.copy()
+    with open(files['login'], 'ab') as f:
+        f.write(line('2025-09-23 09:00:00', 'alex.doe') + line('2025-09-23 09:30:00', 'alex.doe'))
+    assert scorer.poll() == []
+    assert scorer.late_events == 2
+    pd.testing.assert_frame_equal(scorer.vectors, vectors)
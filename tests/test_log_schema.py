@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import log_schema
+from log_schema import (FEATURE_INPUTS, LOG_SCHEMAS, TIMESTAMP_FORMAT, day_numbers, days_to_timestamps,
+                        parse_timestamps, read_typed_log, read_typed_range, timestamps_to_days)
+
+
+def as_text(typed, source):
+    """A typed frame turned back into the strings of the CSV it was read from."""
+    typed = typed.copy()
+    if source == 'file':
+        typed['filepath'] = typed['filepath_prefix'].astype(str) + typed['filename'].astype(str)
+    expected_days = (typed['timestamp'].to_numpy().astype('datetime64[D]') - np.datetime64('1970-01-01')).astype(int)
+    assert (typed['day'].to_numpy() == expected_days).all()
+    text = pd.DataFrame({'timestamp': typed['timestamp'].dt.strftime(TIMESTAMP_FORMAT)})
+    for column in FEATURE_INPUTS[source][1:]:
+        text[column] = typed[column].astype(object).where(typed[column].notna(), '').astype(str)
+    return text
+
+
+def untyped(path, source):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)[FEATURE_INPUTS[source]]
+
+
+@pytest.fixture(params=['\n', '\r\n'], ids=['lf', 'crlf'])
+def logs(request, log_files, tmp_path):
+    """The fixture logs, also with the CRLF line endings the shipped logs have."""
+    if request.param == '\n':
+        return log_files
+    files = {}
+    for source, path in log_files.items():
+        with open(path, 'rb') as f:
+            files[source] = str(tmp_path / f'{source}.csv')
+            with open(files[source], 'wb') as out:
+                out.write(f.read().replace(b'\n', b'\r\n'))
+    return files
+
+
+@pytest.mark.parametrize('engine', ['pyarrow', 'c'])
+def test_whole_file_read_matches_the_untyped_read(logs, engine, monkeypatch):
+    monkeypatch.setattr(log_schema, '_CSV_ENGINE', engine)
+    for source, path in logs.items():
+        typed = read_typed_log(source, path)
+        for column, dtype in LOG_SCHEMAS[source].items():
+            if column in typed and dtype == 'category':
+                assert isinstance(typed[column].dtype, pd.CategoricalDtype), (source, column)
+        pd.testing.assert_frame_equal(as_text(typed, source), untyped(path, source), obj=source)
+
+
+def test_chunked_and_range_reads_match_the_untyped_read(logs):
+    for source, path in logs.items():
+        expected = untyped(path, source)
+        chunks = [as_text(chunk, source) for chunk in read_typed_log(source, path, chunksize=997)]
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected, obj=source)
+
+        with open(path, 'rb') as f:
+            header = len(f.readline())
+            body = f.read()
+        middle = body.index(b'\n', len(body) // 2) + 1
+        parts = [read_typed_range(source, path, header, header + middle),
+                 read_typed_range(source, path, header + middle, header + len(body))]
+        pd.testing.assert_frame_equal(pd.concat([as_text(p, source) for p in parts], ignore_index=True),
+                                      expected, obj=source)
+
+
+def test_day_numbers_round_trip():
+    timestamps = pd.Series(pd.to_datetime(['1970-01-01 00:00:00', '2025-09-30 23:59:59', '2025-10-01 00:00:00']))
+    days = day_numbers(timestamps)
+    assert days.dtype == np.int32 and days.tolist() == [0, 20361, 20362]
+    assert list(days_to_timestamps(days)) == list(timestamps.dt.normalize())
+    assert timestamps_to_days(['2025-09-30', pd.Timestamp('2025-10-01')]).tolist() == [20361, 20362]
+
+
+def test_timestamps_fall_back_to_iso_8601():
+    parsed = parse_timestamps(pd.Series(['2025-09-30 09:00:00', '2025-09-30T09:00:00.250']))
+    assert list(parsed) == [pd.Timestamp('2025-09-30 09:00:00'), pd.Timestamp('2025-09-30 09:00:00.250')]
@@ -0,0 +1,85 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from compact_forest import CompactForest, average_path_length
+from feature_engine import FEATURE_COLUMNS
+from model_refresh import day_fingerprints, refresh, reservoir_update, splice_trees
+
+PARAMS = {'n_estimators': 10, 'contamination': 'auto', 'random_state': 42}
+
+
+def fit(features, n_estimators, seed, max_samples=128):
+    return IsolationForest(n_estimators=n_estimators, max_samples=max_samples, random_state=seed).fit(features)
+
+
+def mean_depths(model, features):
+    """Average path length per row, recovered from score_samples."""
+    return -np.log2(-model.score_samples(features)) * average_path_length([model._max_samples])[0]
+
+
+def test_splice_trees_keeps_the_forest_consistent(batch_features):
+    features = batch_features[FEATURE_COLUMNS]
+    old, grown = fit(features, 10, 0), fit(features, 4, 1)
+    old_depths, grown_depths = mean_depths(old, features), mean_depths(grown, features)
+
+    spliced = splice_trees(copy.deepcopy(old), grown, 0)
+    assert spliced.n_estimators == len(spliced.estimators_) == len(spliced.estimators_features_) == 14
+    np.testing.assert_allclose(mean_depths(spliced, features), (10 * old_depths + 4 * grown_depths) / 14)
+
+    replaced = splice_trees(copy.deepcopy(old), grown, 10)
+    np.testing.assert_allclose(replaced.score_samples(features), grown.score_samples(features))
+    np.testing.assert_allclose(CompactForest.from_model(replaced).decision_function(features),
+                               replaced.decision_function(features), atol=1e-12)
+
+
+def test_splice_trees_rejects_other_sample_sizes(batch_features):
+    features = batch_features[FEATURE_COLUMNS]
+    with pytest.raises(ValueError):
+        splice_trees(fit(features, 5, 0, max_samples=128), fit(features, 5, 0, max_samples=64), 5)
+
+
+def test_reservoir_is_a_uniform_sample():
+    rows = pd.DataFrame({'id': np.arange(200)})
+    counts = np.zeros(len(rows))
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        reservoir, seen = reservoir_update(rows.iloc[:0], 0, rows.iloc[:50], 20, rng)
+        reservoir, seen = reservoir_update(reservoir, seen, rows.iloc[50:], 20, rng)  # offered in two batches
+        assert len(reservoir) == 20 and reservoir['id'].is_unique and seen == 200
+        counts[reservoir['id'].to_numpy()] += 1
+    # Each row is kept with probability 20/200: 200 times in 2000 rounds, sd ~13.
+    assert np.abs(counts - 200).max() < 70
+
+
+def test_reservoir_shrinks_to_a_lowered_capacity():
+    rows = pd.DataFrame({'id': np.arange(30)})
+    reservoir, _ = reservoir_update(rows, 30, rows.iloc[:0], 10, np.random.default_rng(0))
+    assert len(reservoir) == 10 and reservoir['id'].is_unique
+
+
+def test_refresh_resamples_only_changed_days(batch_features):
+    data = batch_features.copy()
+    state = refresh(data, None, reservoir_size=400, window_days=30, replace=4, params=PARAMS)
+    assert state['born'] == [1] * 10 and len(state['reservoir']) == 400
+    assert refresh(data, state, 400, 30, 4, PARAMS) is None  # nothing new
+
+    # A late log line lands in an earlier day, and one new day arrives.
+    day = pd.Timestamp('2025-09-15')
+    late = data.copy()
+    late.loc[pd.to_datetime(late['date']) == day, 'file_access_count'] += 1000
+    extra = late[pd.to_datetime(late['date']) == pd.Timestamp('2025-09-30')].assign(date=pd.Timestamp('2025-10-01'))
+    late = pd.concat([late, extra], ignore_index=True)
+    refreshed = refresh(late, state, 400, 30, 4, PARAMS)
+
+    assert refreshed['changed_days'] == ['2025-09-15', '2025-10-01']
+    assert refreshed['offered'] == (pd.to_datetime(late['date']) == day).sum() + len(extra)
+    assert refreshed['born'] == [1] * 6 + [2] * 4 and refreshed['model'].n_estimators == 10
+    sampled = refreshed['reservoir']
+    assert len(sampled) == 400
+    assert (sampled['date'] == day).any()
+    assert (sampled.loc[sampled['date'] == day, 'file_access_count'] >= 1000).all()
+    assert set(refreshed['day_fingerprints']) == set(day_fingerprints(late.assign(date=pd.to_datetime(late['date']))))
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from compact_forest import CompactForest
+from feature_engine import FEATURE_COLUMNS
+from model_registry import (data_fingerprint, latest_version, list_versions, load_metadata, load_model,
+                            register_model, resolve_version)
+
+
+@pytest.fixture(scope='module')
+def model(batch_features):
+    return IsolationForest(n_estimators=20, random_state=0).fit(batch_features[FEATURE_COLUMNS])
+
+
+def test_register_and_load(model, batch_features, tmp_path):
+    registry = str(tmp_path)
+    features = batch_features[FEATURE_COLUMNS]
+    first = register_model(model, batch_features, FEATURE_COLUMNS, {'anomalies': 1}, registry=registry)
+    second = register_model(model, batch_features, FEATURE_COLUMNS, registry=registry)
+
+    assert (first, second) == ('v0001', 'v0002')
+    assert latest_version(registry) == second == resolve_version('latest', registry)
+    assert [meta['version'] for meta in list_versions(registry)] == [first, second]
+    meta = load_metadata(first, registry)
+    assert meta['metrics'] == {'anomalies': 1}
+    assert meta['training_data']['rows'] == len(batch_features)
+    assert meta['training_data']['fingerprint'] == data_fingerprint(batch_features, FEATURE_COLUMNS)
+
+    compact = load_model(first, registry)
+    assert isinstance(compact, CompactForest)
+    np.testing.assert_allclose(compact.decision_function(features), model.decision_function(features))
+    estimator = load_model(first, registry, compact=False)
+    np.testing.assert_array_equal(estimator.decision_function(features), model.decision_function(features))
+
+
+def test_missing_version(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_model(registry=str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        resolve_version('v0042', str(tmp_path))
+
+
+def test_fingerprint_tracks_content_not_representation(batch_features):
+    fingerprint = data_fingerprint(batch_features, FEATURE_COLUMNS)
+    # As read from the CSV export and from the store: string or categorical users, string or [ns] dates.
+    for relabeled in (batch_features.assign(username=batch_features['username'].astype(str),
+                                            date=batch_features['date'].astype(str)),
+                      batch_features.assign(username=batch_features['username'].astype('category'),
+                                            date=pd.to_datetime(batch_features['date']).astype('datetime64[ns]'))):
+        assert data_fingerprint(relabeled, FEATURE_COLUMNS) == fingerprint
+    changed = batch_features.copy()
+    changed.loc[changed.index[0], 'login_count'] += 1
+    assert data_fingerprint(changed, FEATURE_COLUMNS) != fingerprint
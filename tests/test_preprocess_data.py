@@ -0,0 +1,16 @@
+import os
+
+import pandas as pd
+
+import preprocess_data
+from feature_engine import LOG_FILES
+
+
+def test_cprofile_implies_profile(log_files, tmp_path, monkeypatch):
+    for source, name in LOG_FILES.items():
+        pd.read_csv(log_files[source], dtype=str, keep_default_na=False).to_csv(tmp_path / name, index=False)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('sys.argv', ['preprocess_data.py', '--cprofile', 'preprocess.prof'])
+    preprocess_data.main()
+    assert os.path.getsize(tmp_path / 'preprocess.prof') > 0
+    assert os.listdir(tmp_path / 'profiles')
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+import remote_guide
+from remote_guide import HEADER, LockController, encode_message, handle_client, read_message
+
+
+async def _command(port, text):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(encode_message(text))
+    await writer.drain()
+    reply = await read_message(reader)
+    writer.close()
+    return reply
+
+
+async def _round(controller, senders):
+    server = await asyncio.start_server(lambda r, w: handle_client(r, w, controller), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        replies = await asyncio.gather(*(_command(port, 'LOCK_NOW') for _ in range(senders)))
+        status = await _command(port, 'STATUS')
+    return replies, status
+
+
+def test_concurrent_lock_requests_engage_one_lock_per_round():
+    controller = LockController(headless=True)
+    for _ in range(2):  # a second round after the analyst unlocks
+        replies, status = asyncio.run(_round(controller, senders=50))
+        assert replies.count('ACK LOCK_NOW locked') == 1
+        assert replies.count('ACK LOCK_NOW already_locked') == 49
+        assert status == 'ACK STATUS locked'
+        controller.unlock()
+        assert not controller.locked
+
+
+def test_one_lock_screen_for_many_threads(monkeypatch):
+    screens = []
+
+    class FakeScreen:
+        def __init__(self, on_shown=None, on_unlock=None):
+            screens.append(self)
+            self.on_shown = on_shown
+
+        def run(self):
+            time.sleep(0.05)
+            self.on_shown()
+
+    monkeypatch.setattr(remote_guide, 'LockScreenApp', FakeScreen)
+    controller = LockController()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(controller.request_lock())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(engaged for _, engaged in results) == 1
+    assert len({id(shown) for shown, _ in results}) == 1
+    results[0][0].result(timeout=5)
+    assert len(screens) == 1 and controller.locked
+
+
+def test_gui_failure_is_reported_and_releases_the_lock(monkeypatch):
+    class BrokenScreen:
+        def __init__(self, **kwargs):
+            raise RuntimeError("no display")
+
+    monkeypatch.setattr(remote_guide, 'LockScreenApp', BrokenScreen)
+    controller = LockController()
+    shown, engaged = controller.request_lock()
+    assert engaged and isinstance(shown.exception(timeout=5), RuntimeError)
+    assert not controller.locked
+
+
+def test_replies_and_oversized_messages():
+    controller = LockController(headless=True)
+
+    async def scenario():
+        server = await asyncio.start_server(lambda r, w: handle_client(r, w, controller), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            replies = [await _command(port, 'PING'), await _command(port, 'REBOOT')]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(HEADER.pack(10_000) + b'x')
+            await writer.drain()
+            replies.append(await read_message(reader))
+            writer.close()
+        return replies
+
+    assert asyncio.run(scenario()) == ['ACK PING', 'ERR unknown command', None]
+    assert not controller.locked
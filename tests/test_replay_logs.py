@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from compact_forest import CompactForest
+from feature_engine import FEATURE_COLUMNS, LOG_FILES
+from live_scorer import LiveScorer
+from replay_logs import load_events, replay
+
+
+def test_events_are_merged_in_time_order(log_files):
+    headers, events = load_events(os.path.dirname(log_files['login']))
+    assert events['timestamp'].is_monotonic_increasing
+    for source, path in log_files.items():
+        with open(path, 'rb') as f:
+            assert headers[source] == f.readline()
+            assert b''.join(events.loc[events['source'] == source, 'line']) == f.read()
+
+
+def test_replay_rewrites_the_logs_and_alerts_trace_back_to_written_lines(log_files, batch_features, tmp_path):
+    headers, events = load_events(os.path.dirname(log_files['login']))
+    events = events[events['timestamp'] >= '2025-09-22'].reset_index(drop=True)
+    out_dir = str(tmp_path / 'replay')
+    model = CompactForest.from_model(IsolationForest(n_estimators=50, random_state=0)
+                                     .fit(batch_features[FEATURE_COLUMNS]))
+    scorer = LiveScorer(model, {source: os.path.join(out_dir, name) for source, name in LOG_FILES.items()},
+                        from_start=True)
+
+    written_at, alerts = {}, []
+    done = threading.Event()
+
+    def score_loop():
+        while not done.is_set():
+            alerts.extend(scorer.poll())
+            time.sleep(0.005)
+        alerts.extend(scorer.poll())
+
+    worker = threading.Thread(target=score_loop)
+    worker.start()
+    replay(headers, events, out_dir, speedup=1e7, written_at=written_at)
+    done.set()
+    worker.join()
+
+    for source, name in LOG_FILES.items():
+        with open(os.path.join(out_dir, name), 'rb') as f:
+            assert f.read() == headers[source] + b''.join(events.loc[events['source'] == source, 'line'])
+    assert len(written_at) == len(events)
+    assert scorer.events_seen == len(events)
+    assert alerts and all((a['source'], a['offset']) in written_at for a in alerts)
+    assert all(a['detected_at'] >= written_at[(a['source'], a['offset'])] for a in alerts)
+    assert pd.Timestamp(max(a['date'] for a in alerts)) <= events['timestamp'].iloc[-1]
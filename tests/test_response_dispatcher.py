@@ -0,0 +1,140 @@
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+
+import response_dispatcher
+from remote_guide import LockController, encode_message, handle_client, read_message
+from response_dispatcher import ResponseDispatcher, load_endpoints, summarize
+
+
+@pytest.fixture
+def serve():
+    """Starts `handler(reader, writer)` on a local port in a background loop; returns the port."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def start(handler):
+        server = asyncio.run_coroutine_threadsafe(asyncio.start_server(handler, '127.0.0.1', 0), loop).result()
+        servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    yield start
+    for server in servers:
+        server.close()
+        asyncio.run_coroutine_threadsafe(server.wait_closed(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def dispatchers(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_dispatcher, 'RETRY_BACKOFF', 0.01)
+    created = []
+
+    def make(endpoints, **kwargs):
+        kwargs.setdefault('log_path', str(tmp_path / 'dispatch_log.jsonl'))
+        created.append(ResponseDispatcher(endpoints, **kwargs))
+        return created[-1]
+
+    yield make
+    for dispatcher in created:
+        if dispatcher._thread.is_alive():
+            dispatcher.close()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_locks_each_endpoint_and_reuses_the_connection(serve, dispatchers, tmp_path):
+    controller = LockController(headless=True)
+    connections = []
+
+    def guard(reader, writer):
+        connections.append(writer)
+        return handle_client(reader, writer, controller)
+
+    port = serve(guard)
+    dispatcher = dispatchers({'ann': [('127.0.0.1', port)]})
+    first, = dispatcher.dispatch(['ann', 'ann'])
+    second, = dispatcher.dispatch(['ann'])
+    assert (first['outcome'], first['attempts']) == ('locked', 1)
+    assert (second['outcome'], second['attempts']) == ('already_locked', 1)
+    assert len(connections) == 1  # the second batch went over the pooled connection
+    with open(tmp_path / 'dispatch_log.jsonl') as f:
+        assert [json.loads(line)['outcome'] for line in f] == ['locked', 'already_locked']
+    assert summarize([first, second]).startswith('2 deliveries: locked=1, already_locked=1')
+
+
+def test_unmapped_users_are_reported_without_a_delivery(dispatchers):
+    dispatcher = dispatchers({})
+    result, = dispatcher.dispatch(['nobody'])
+    assert result['outcome'] == 'unmapped'
+    assert result['host'] is None and result['port'] is None and result['attempts'] == 0
+
+
+def test_retries_back_off_until_exhausted(dispatchers):
+    dispatcher = dispatchers({'ann': [('127.0.0.1', closed_port())]}, retries=2)
+    result, = dispatcher.dispatch(['ann'])
+    assert result['outcome'] == 'failed' and result['attempts'] == 3
+    assert result['reply'].startswith('ConnectionRefusedError')
+    # Two sleeps, 0.01 s then 0.02 s, between the three attempts.
+    assert result['latency_ms'] >= 30
+
+
+def test_a_dropped_connection_is_retried(serve, dispatchers):
+    calls = []
+
+    async def flaky(reader, writer):
+        calls.append(await read_message(reader))
+        if len(calls) > 1:
+            writer.write(encode_message('ACK LOCK_NOW locked'))
+            await writer.drain()
+        writer.close()
+
+    port = serve(flaky)
+    result, = dispatchers({'ann': [('127.0.0.1', port)]}, retries=1).dispatch(['ann'])
+    assert (result['outcome'], result['attempts']) == ('locked', 2)
+    assert calls == ['LOCK_NOW', 'LOCK_NOW']
+
+
+def test_silent_endpoint_times_out(serve, dispatchers):
+    async def silent(reader, writer):
+        await reader.read()  # never replies
+        writer.close()
+
+    port = serve(silent)
+    result, = dispatchers({'ann': [('127.0.0.1', port)]}, retries=1, reply_timeout=0.05).dispatch(['ann'])
+    assert result['outcome'] == 'failed' and result['attempts'] == 2
+    assert result['reply'] == 'TimeoutError'
+
+
+def test_rejected_command_keeps_the_listener_reply(serve, dispatchers):
+    port = serve(lambda r, w: handle_client(r, w, LockController(headless=True)))
+    result, = dispatchers({'ann': [('127.0.0.1', port)]}).dispatch(['ann'], command='REBOOT')
+    assert result['outcome'] == 'rejected' and result['reply'] == 'ERR unknown command'
+
+
+def test_close_stops_the_loop_and_drops_pooled_connections(serve, dispatchers):
+    port = serve(lambda r, w: handle_client(r, w, LockController(headless=True)))
+    dispatcher = dispatchers({'ann': [('127.0.0.1', port)]})
+    dispatcher.dispatch(['ann'])
+    writers = [writer for pool in dispatcher._idle.values() for _, writer, _ in pool]
+    assert writers
+    dispatcher.close()
+    assert not dispatcher._thread.is_alive() and dispatcher._loop.is_closed()
+    assert all(writer.is_closing() for writer in writers) and not dispatcher._idle
+
+
+def test_load_endpoints_defaults_the_port(tmp_path):
+    path = tmp_path / 'endpoints.csv'
+    path.write_text('username,host,port\nann,10.0.0.1,6000\nann,10.0.0.2,\nbob,10.0.0.3,\n')
+    assert load_endpoints(str(path)) == {'ann': [('10.0.0.1', 6000), ('10.0.0.2', 5000)], 'bob': [('10.0.0.3', 5000)]}
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from feature_engine import FEATURE_COLUMNS
+from rolling_features import BASELINE_WINDOWS, BurstCounter, RollingBaseline, baseline_features
+
+
+def reference_baselines(daily_features, days):
+    """Mean, std and z of each feature over the user's rows in [date - days, date), via pandas rolling."""
+    frames = []
+    for username, rows in daily_features.groupby('username', observed=True):
+        rows = rows.set_index(pd.to_datetime(rows['date']).astype('datetime64[ns]')).sort_index()
+        window = rows[FEATURE_COLUMNS].astype(float).rolling(f'{days}D', closed='left')
+        mean, std = window.mean().fillna(0), window.std(ddof=0).fillna(0)
+        z = ((rows[FEATURE_COLUMNS] - mean) / std).where(std > 1e-9, 0)
+        stats = {f'{col}_{name}_{days}d': frame[col] for col in FEATURE_COLUMNS
+                 for name, frame in (('mean', mean), ('std', std), ('z', z))}
+        frames.append(pd.DataFrame(stats).assign(username=str(username)).rename_axis('date').reset_index())
+    return pd.concat(frames).sort_values(['username', 'date']).reset_index(drop=True)
+
+
+def test_baselines_match_pandas_rolling_windows(batch_features):
+    rolling = baseline_features(batch_features)
+    rolling['username'] = rolling['username'].astype(str)
+    rolling['date'] = pd.to_datetime(rolling['date']).astype('datetime64[ns]')
+    rolling = rolling.sort_values(['username', 'date']).reset_index(drop=True)
+    for days in BASELINE_WINDOWS:
+        expected = reference_baselines(batch_features, days)
+        pd.testing.assert_frame_equal(rolling[expected.columns], expected, check_exact=False, atol=1e-5)
+
+
+def test_baseline_window_holds_exactly_the_previous_days():
+    baseline = RollingBaseline(days=7, width=1)
+    for day in range(8):
+        mean, _, _ = baseline.update(day, ['ann'], np.array([[float(day)]]))
+    # Day 7 is compared against days 0..6, all seven of them.
+    assert mean[0, 0] == np.mean(range(7))
+    mean, _, _ = baseline.update(8, ['ann'], np.array([[0.0]]))
+    assert mean[0, 0] == np.mean(range(1, 8))
+
+
+def reference_bursts(codes, minutes, window):
+    """Events of the same user in (minute - window, minute], up to and including each event, via pandas rolling."""
+    events = pd.DataFrame({'code': codes, 'time': pd.to_datetime(minutes, unit='m'), 'one': 1})
+    counts = pd.Series(0, index=events.index)
+    for _, rows in events.groupby('code'):
+        counted = rows.set_index('time')['one'].rolling(f'{window}min').sum()
+        counts[rows.index] = counted.to_numpy().astype(int)
+    return counts.to_numpy()
+
+
+def test_burst_counter_matches_pandas_rolling_in_any_chunking():
+    rng = np.random.default_rng(0)
+    minutes = np.sort(rng.integers(0, 3 * 24 * 60, size=4000))
+    codes = rng.integers(0, 25, size=len(minutes))
+    for window in (1, 15, 60):
+        expected = reference_bursts(codes, minutes, window)
+        for chunksize in (len(minutes), 997, 1):
+            counter = BurstCounter(window)
+            counts = np.concatenate([counter.add(codes[i:i + chunksize], minutes[i:i + chunksize])
+                                     for i in range(0, len(minutes), chunksize)])
+            np.testing.assert_array_equal(counts, expected, err_msg=f"{window}-minute window, chunks of {chunksize}")
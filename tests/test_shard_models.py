@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from anomaly_explainer import feature_contributions
+from feature_engine import FEATURE_COLUMNS
+from model_registry import load_metadata, load_model, register_shards
+from shard_models import ShardedModel, train_shards
+
+PARAMS = {'n_estimators': 10, 'contamination': 'auto', 'random_state': 42}
+
+
+def test_registered_shards_score_like_their_forests(batch_features, tmp_path):
+    shard_dir, registry = str(tmp_path / 'shards'), str(tmp_path / 'registry')
+    manifest, report = train_shards(batch_features, shard_dir, 'role', workers=1, params=PARAMS)
+    assert set(report['status']) == {'new'}
+    _, rerun = train_shards(batch_features, shard_dir, 'role', workers=1, params=PARAMS)
+    assert set(rerun['status']) == {'unchanged'}
+
+    version = register_shards(shard_dir, batch_features, {'anomalies': 0}, registry)
+    model = load_model(version, registry)
+    assert isinstance(model, ShardedModel) and load_metadata(version, registry)['kind'] == 'sharded'
+
+    data = batch_features[FEATURE_COLUMNS + model.routing_columns]
+    scores = model.decision_function(data)
+    routes = model.route(data)
+    for key, forest in model.forests.items():
+        rows = (routes == key).to_numpy()
+        np.testing.assert_allclose(scores[rows], forest.decision_function(data.loc[rows, FEATURE_COLUMNS]))
+
+    flagged, inliers = data[scores < 0], data[scores >= 0]
+    contributions = feature_contributions(model, flagged, inliers)
+    assert list(contributions.columns) == FEATURE_COLUMNS and contributions.index.equals(flagged.index)
+    assert not contributions.isna().any().any()
+
+
+def test_insider_check_counts_scenario_days_whatever_the_newest_row(batch_features, tmp_path, monkeypatch):
+    import shard_models
+    from model_registry import list_versions
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shard_models, 'MODEL_PARAMS', PARAMS)
+    flagged = []
+    for extra_days in (0, 10):
+        # Rows past the scenario end (a later log delivery) must not move the scenario days.
+        later = batch_features[batch_features['date'] == batch_features['date'].max()].copy()
+        later['date'] = later['date'] + pd.Timedelta(days=extra_days)
+        data = pd.concat([batch_features, later]) if extra_days else batch_features
+        data.to_csv('daily_user_features.csv', index=False)
+        monkeypatch.setattr('sys.argv', ['shard_models.py', '--workers', '1', '--register', '--dir', f'shards{extra_days}'])
+        shard_models.main()
+        flagged.append(list_versions()[-1]['metrics']['insider_days_flagged'])
+    assert flagged[0] > 0 and flagged[0] == flagged[1]
@@ -0,0 +1,104 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+
+import siem_export
+from siem_export import BulkSink, StubBulkServer, bulk_lines
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(siem_export, 'RETRY_BACKOFF', 0.001)
+
+
+def documents(n, index='test-events'):
+    frame = pd.DataFrame({'username': [f'user{i % 7}' for i in range(n)], 'value': range(n)})
+    return bulk_lines(frame, index, [f'doc-{i}' for i in range(n)])
+
+
+@pytest.mark.parametrize('in_flight', [1, 4])
+def test_every_document_arrives_exactly_once(in_flight):
+    lines = documents(3000)
+    stub = StubBulkServer(reject_rate=0.3, seed=1).start()
+    try:
+        sink = BulkSink(stub.url, batch_events=100, in_flight=in_flight, retries=12)
+        sink.add(lines)
+        stats = sink.close()
+    finally:
+        stub.stop()
+    assert stats['accepted'] == stats['documents'] == len(lines) and stats['failed'] == 0
+    assert stats['resent'] > 0
+    assert stub.documents['test-events'] == len(stub.ids) == len(lines)
+    assert stub.connections <= in_flight
+
+
+class RejectingStub(StubBulkServer):
+    """Rejects doc-0 for good, as a mapping error would."""
+
+    def _bulk(self, body):
+        reply = super()._bulk(body)
+        for item in reply['items']:
+            if item['index']['_id'] == 'doc-0':
+                item['index'].update(status=400, error={'type': 'mapper_parsing_exception'})
+                reply['errors'] = True
+        return reply
+
+
+def test_permanent_rejections_are_failed_not_resent():
+    stub = RejectingStub().start()
+    try:
+        sink = BulkSink(stub.url, batch_events=10, in_flight=2)
+        sink.add(documents(50))
+        stats = sink.close()
+    finally:
+        stub.stop()
+    assert (stats['accepted'], stats['failed'], stats['resent']) == (49, 1, 0)
+    assert any('mapper_parsing_exception' in error for error in sink.errors)
+
+
+def test_items_missing_from_a_reply_are_resent(tmp_path):
+    sink = BulkSink(str(tmp_path / 'unused.ndjson'))
+    lines = documents(4)
+    reply = {'errors': True, 'items': [{'index': {'status': 201}}, {'index': {'status': 429}}, 'garbage']}
+    retry, rejected = sink._partition(lines, reply)
+    sink.close()
+    assert retry == lines[1:] and rejected == 0
+    assert any('3 item statuses for 4 documents' in error for error in sink.errors)
+
+
+def test_file_sink_writes_batches_whole_and_in_order(tmp_path):
+    path = tmp_path / 'export.ndjson'
+    lines = documents(1234)
+    sink = BulkSink(str(path), batch_events=100)
+    sink.add(lines)
+    stats = sink.close()
+    assert path.read_bytes() == b''.join(lines)
+    assert stats['accepted'] == len(lines) and stats['batches'] == 13
+    assert [json.loads(line)['index']['_id'] for line in path.read_bytes().splitlines()[::2][:2]] == ['doc-0', 'doc-1']
+
+
+def test_open_batches_are_flushed_on_a_timer():
+    stub = StubBulkServer().start()
+    try:
+        sink = BulkSink(stub.url, batch_events=1000, flush_seconds=0.05, in_flight=1)
+        sink.add(documents(5))
+        deadline = time.time() + 5
+        while len(stub.ids) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(stub.ids) == 5  # delivered before close()
+        sink.close()
+    finally:
+        stub.stop()
+
+
+def test_producer_blocks_on_busy_senders():
+    stub = StubBulkServer(delay=0.05).start()
+    try:
+        sink = BulkSink(stub.url, batch_events=1, in_flight=1)
+        sink.add(documents(6))
+        stats = sink.close()
+    finally:
+        stub.stop()
+    assert stats['accepted'] == 6 and sink.blocked_seconds > 0.05
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+import sweep_model
+from feature_engine import FEATURE_COLUMNS
+from sweep_model import cheapest_catching, evaluate, insider_days, run_sweep
+
+GRID = {'n_estimators': [10, 30], 'max_samples': [64, 10_000], 'max_features': [1.0], 'contamination': ['auto', 0.05]}
+# Everything but the timings is a pure function of the data, grid and seed.
+STABLE = ['n_estimators', 'max_samples', 'max_features', 'contamination', 'insider_days_flagged', 'insider_recall',
+          'false_positive_rate', 'alerts', 'insider_best_rank', 'tree_nodes']
+
+
+def test_evaluate_counts_and_ranks():
+    scores = np.array([-0.9, -0.7, -0.6, -0.4, -0.3, -0.45])
+    labels = np.array([False, True, False, False, False, True])
+    metrics = evaluate(scores, 'auto', labels)  # flagged: score < -0.5
+    assert metrics == {'insider_days_flagged': 1, 'insider_recall': 0.5, 'false_positive_rate': 0.5,
+                       'alerts': 3, 'insider_best_rank': 2}
+    # A contamination share flags that share of the lowest scores.
+    assert evaluate(scores, 0.5, labels)['alerts'] == 3
+    assert evaluate(scores, 0.5, np.zeros(6, dtype=bool))['insider_best_rank'] is None
+
+
+def test_sweep_ranks_the_insider_like_a_direct_fit(batch_features):
+    labels = insider_days(batch_features)
+    assert labels.sum() == 4
+    results = run_sweep(batch_features, FEATURE_COLUMNS, GRID, workers=1, seed=7)
+    assert len(results) == 8
+    matrix = batch_features[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    for row in results[results['contamination'] == 'auto'].itertuples():
+        model = IsolationForest(n_estimators=row.n_estimators, max_samples=row.max_samples,
+                                max_features=row.max_features, random_state=7).fit(matrix)
+        scores = model.score_samples(matrix)
+        assert row.insider_best_rank == int((scores < scores[labels].min()).sum()) + 1
+        assert row.alerts == int((model.predict(matrix) < 0).sum())
+        # max_samples above the row count is capped rather than rejected.
+        assert row.max_samples <= len(matrix)
+
+
+def test_sweep_does_not_depend_on_workers(batch_features):
+    one = run_sweep(batch_features, FEATURE_COLUMNS, GRID, workers=1)
+    two = run_sweep(batch_features, FEATURE_COLUMNS, GRID, workers=2)
+    pd.testing.assert_frame_equal(one[STABLE], two[STABLE])
+
+
+def test_cheapest_catching_picks_the_lowest_cost_within_limits():
+    results = pd.DataFrame({
+        'name': ['misses', 'noisy', 'slow', 'cheap', 'cheap_noisier'],
+        'insider_recall': [0.5, 1.0, 1.0, 1.0, 1.0],
+        'false_positive_rate': [0.0, 0.05, 0.01, 0.01, 0.015],
+        'fit_seconds': [0.01, 0.01, 2.0, 0.2, 0.2],
+        'score_us_per_row': [1.0, 1.0, 5.0, 1.0, 1.0],
+    })
+    assert cheapest_catching(results)['name'] == 'cheap'
+    assert cheapest_catching(results, min_recall=0.4, max_fpr=0.0)['name'] == 'misses'
+    assert cheapest_catching(results, max_fpr=0.001) is None
+
+
+def test_main_saves_the_full_results_table(batch_features, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sweep_model, 'GRID', GRID)
+    batch_features.to_csv('daily_user_features.csv', index=False)
+    monkeypatch.setattr('sys.argv', ['sweep_model.py', '--workers', '1', '--out', 'sweep.csv'])
+    sweep_model.main()
+
+    saved = pd.read_csv('sweep.csv', keep_default_na=False)
+    expected = run_sweep(batch_features, FEATURE_COLUMNS, workers=1)
+    assert list(saved.columns) == list(expected.columns)
+    expected['contamination'] = expected['contamination'].astype(str)
+    saved['contamination'] = saved['contamination'].astype(str)
+    pd.testing.assert_frame_equal(saved[STABLE], expected[STABLE], check_dtype=False)
@@ -1,17 +1,52 @@
+import argparse
+import time
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 import joblib
+import numpy as np
+
+from attack_enrichment import ATTACK_RULES_FILE, AttackRuleIndex, load_rules
+from compact_forest import CompactForest
+from feature_store import load_daily_features
+from model_registry import REGISTRY_DIR, register_model
+from pipeline_profiler import PipelineProfiler
+from rolling_features import ROLLING_FILE, with_rolling_features
+
+parser = argparse.ArgumentParser(description="Train the insider threat IsolationForest.")
+parser.add_argument('--profile', action='store_true',
+                    help="Record per-stage wall/CPU time, peak RSS and rows to a JSON report in profiles/.")
+parser.add_argument('--cprofile', metavar='FILE',
+                    help="Also dump cProfile stats for the whole run to FILE; implies --profile.")
+parser.add_argument('--rolling', action='store_true',
+                    help=f"Also train on the rolling baseline and burst features in '{ROLLING_FILE}'.")
+parser.add_argument('--attack-rules', default=ATTACK_RULES_FILE,
+                    help="JSON file of MITRE ATT&CK tagging rules (built-in rules if it does not exist).")
+args = parser.parse_args()
+profiler = PipelineProfiler('train', enabled=args.profile or bool(args.cprofile),
+                           cprofile_path=args.cprofile)
 
 print("Starting model training...")
 
 # --- 1. Load the Preprocessed Data ---
 try:
-    data = pd.read_csv('daily_user_features.csv')
-    print("Loaded daily_user_features.csv successfully.")
+    # Reads the columnar feature store when present, else the CSV export.
+    with profiler.stage('load_features') as record:
+        data = load_daily_features()
+        record['rows'] = len(data)
+    print("Loaded daily user features successfully.")
 except FileNotFoundError:
     print("Error: 'daily_user_features.csv' not found. Please run preprocess_data.py first.")
     exit()
 
+if args.rolling:
+    try:
+        with profiler.stage('load_rolling_features', rows=len(data)):
+            data = with_rolling_features(data)
+        print("Added rolling baseline and burst features.")
+    except FileNotFoundError:
+        print(f"Error: '{ROLLING_FILE}' not found. Please run preprocess_data.py --rolling first.")
+        exit()
+
 # --- 2. Prepare Data for the Model ---
 # The model needs only the numerical features. We exclude identifiers.
 features = data.drop(columns=['username', 'date'])
@@ -29,21 +64,37 @@ model = IsolationForest(
 )
 
 print("Training Isolation Forest model...")
-model.fit(features)
+fit_started = time.perf_counter()
+with profiler.stage('fit', rows=len(features)):
+    model.fit(features)
+fit_seconds = time.perf_counter() - fit_started
 print("Model training complete.")
 
 # --- 4. Get Predictions ---
 # The model gives us two things:
 # 1. Anomaly Score: A score where lower values are more anomalous.
 # 2. Prediction: -1 for anomalies (outliers) and 1 for inliers (normal points).
-data['anomaly_score'] = model.decision_function(features)
-data['is_anomaly'] = model.predict(features)
+# Both come from one walk of the flattened forest (same scores as sklearn's
+# decision_function); predict is just the sign of the score.
+with profiler.stage('export_forest'):
+    compact = CompactForest.from_model(model, n_jobs=-1)
+with profiler.stage('decision_function', rows=len(features)):
+    data['anomaly_score'] = compact.decision_function(features)
+with profiler.stage('predict', rows=len(features)):
+    data['is_anomaly'] = np.where(data['anomaly_score'] < 0, -1, 1)
+
+# Tag every user-day with the MITRE ATT&CK techniques its indicators map to.
+attack_index = AttackRuleIndex(load_rules(args.attack_rules))
+with profiler.stage('attack_enrichment', rows=len(data)):
+    data = attack_index.enrich(data)
 
 # --- 5. Analyze and Display Results ---
 print("\n--- Anomaly Detection Results ---")
 
 # Find all records that the model flagged as anomalies
 anomalies = data[data['is_anomaly'] == -1]
+insider_username = 'alex.doe'
+insider_anomalies = anomalies[anomalies['username'] == insider_username]
 
 if anomalies.empty:
     print("No anomalies were detected.")
@@ -51,19 +102,42 @@ else:
     print(f"Total anomalies detected: {len(anomalies)}")
     print("Top 10 most anomalous activities (lower score is more anomalous):")
     # Using .to_string() to ensure all columns are displayed in the terminal
-    print(anomalies.sort_values(by='anomaly_score').head(10).to_string())
+    print(anomalies.sort_values(by='anomaly_score').head(10).drop(columns=attack_index.flag_columns).to_string())
 
-    # Specifically check if our known insider's activity was caught
-    insider_username = 'alex.doe'
-    insider_anomalies = anomalies[anomalies['username'] == insider_username]
+    technique_days = anomalies[attack_index.flag_columns].sum()
+    print("\nMITRE ATT&CK techniques among anomalies (user-days):")
+    for technique, days in zip(attack_index.techniques, technique_days):
+        print(f"  {technique} {attack_index.names[technique]}: {days}")
 
+    # Specifically check if our known insider's activity was caught
     if not insider_anomalies.empty:
         print(f"\n✅ SUCCESS: Malicious activity for '{insider_username}' was correctly identified as an anomaly.")
+        for _, row in insider_anomalies[insider_anomalies['attack_techniques'] != ''].iterrows():
+            print(f"   {pd.Timestamp(row['date']).date()}: {attack_index.describe(row['attack_techniques'])}")
     else:
-        print(f"\n⚠️ NOTE: Malicious activity for '{insider_username}' was NOT flagged. You might need to tune the 'contamination' parameter.")
+        print(f"\n⚠️ NOTE: Malicious activity for '{insider_username}' was NOT flagged. Run sweep_model.py to find parameters that catch it.")
 
 # --- 6. Save the Trained Model ---
 # We save the model to a file so our dashboard can use it later without retraining.
 model_filename = 'insider_threat_model.pkl'
-joblib.dump(model, model_filename)
-print(f"\nTrained model saved successfully to '{model_filename}'")
\ No newline at end of file
+with profiler.stage('save_model'):
+    joblib.dump(model, model_filename)
+print(f"\nTrained model saved successfully to '{model_filename}'")
+
+# Versioned copy with its feature schema, training-data fingerprint and metrics.
+metrics = {
+    'anomalies': len(anomalies),
+    'anomaly_rate': round(len(anomalies) / max(len(data), 1), 6),
+    'insider_anomaly_days': len(insider_anomalies),
+    'mean_anomaly_score': round(float(data['anomaly_score'].mean()), 6),
+    'fit_seconds': round(fit_seconds, 3),
+    'attack_technique_days': {t: int(anomalies[c].sum()) for t, c in zip(attack_index.techniques, attack_index.flag_columns)},
+}
+with profiler.stage('register_model'):
+    version = register_model(model, data, features.columns, metrics)
+print(f"Registered as model version {version} in '{REGISTRY_DIR}/'.")
+
+report_path = profiler.write()
+if report_path:
+    print(f"\nStage profile:\n{profiler.summary()}")
+    print(f"Profile report saved to '{report_path}'")
\ No newline at end of file